@@ -0,0 +1,309 @@
+"""
+Solver benchmarks and work-precision diagrams.
+
+Every solver runs on every problem for a range of step widths (fixed-step solvers) or
+tolerances (adaptive solvers). Per run the harness records the best wall time of a few
+repetitions, the number of RHS and Jacobian evaluations, the peak memory allocated
+during the solve (tracemalloc) and the maximum error over the returned trajectory
+against a dense high-accuracy reference.
+
+Results are written as JSON, plotted as work-precision diagrams and can be compared
+against a baseline file to detect regressions:
+
+    python -m analysis.benchmark --output benchmark.json --plot work_precision.png
+    python -m analysis.benchmark --output new.json --baseline benchmark.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Optional
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.explicit_solver import euler_explicit, RK4
+from solver.explicit_stepcontrol_solver import (stepcontrol_mid_point_rule, stepcontrol_dormand_prince,
+                                                stepcontrol_bogacki_shampine)
+from solver.events import interior_breakpoints, one_sided
+from solver.exponential_solver import exponential_integrator
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from solver.implicit_solver import euler_implicit, trapezoidal_rule, BDF2, stepcontrol_rosenbrock
+from solver.stats import SolverStats, InstrumentedODE
+from solver.symplectic_solver import stormer_verlet, strang_splitting, yoshida4
+from system_odes.pendulum_ode import damped_pendulum_ode
+from system_odes.dp_ec_battery_model import dp_ec_battery
+
+
+def _solve_ivp_runner(method: str):
+    def run(fcn, t_interval, z0, rtol):
+        options = {'jac': fcn.jacobian} if method in ('BDF', 'Radau') and hasattr(fcn, 'jacobian') else {}
+        sol = solve_ivp(fcn, t_interval, z0, method=method, rtol=rtol, atol=rtol * 1e-3, **options)
+        return sol.t, sol.y.T
+    return run
+
+
+def _adaptive_runner(solver):
+    def run(fcn, t_interval, z0, rtol):
+        t, u = solver(fcn, t_interval, z0, rtol=rtol, atol=rtol * 1e-3)[:2]
+        return t, u
+    return run
+
+
+# name -> (setting, runner(fcn, t_interval, z0, setting) -> (t, u));
+# setting is 'h' for fixed-step and 'rtol' for adaptive solvers
+SOLVERS = {
+    'euler_explicit': ('h', euler_explicit),
+    'RK4': ('h', RK4),
+    'stormer_verlet': ('h', stormer_verlet),
+    'strang_splitting': ('h', strang_splitting),
+    'yoshida4': ('h', yoshida4),
+    'euler_implicit': ('h', euler_implicit),
+    'trapezoidal_rule': ('h', trapezoidal_rule),
+    'BDF2': ('h', BDF2),
+    'exponential_integrator': ('h', exponential_integrator),
+    'stepcontrol_mid_point_rule': ('rtol', _adaptive_runner(stepcontrol_mid_point_rule)),
+    'stepcontrol_bogacki_shampine': ('rtol', _adaptive_runner(stepcontrol_bogacki_shampine)),
+    'stepcontrol_dormand_prince': ('rtol', _adaptive_runner(stepcontrol_dormand_prince)),
+    'stepcontrol_extrapolation': ('rtol', _adaptive_runner(stepcontrol_extrapolation)),
+    'stepcontrol_rosenbrock': ('rtol', _adaptive_runner(stepcontrol_rosenbrock)),
+    'solve_ivp_RK45': ('rtol', _solve_ivp_runner('RK45')),
+    'solve_ivp_BDF': ('rtol', _solve_ivp_runner('BDF')),
+}
+
+# Only applicable to ODEs with a state_space() attribute
+_LINEAR_ONLY = ('exponential_integrator',)
+# Solvers that need the split() interface of mechanical ODEs
+_SPLIT_ONLY = ('stormer_verlet', 'strang_splitting', 'yoshida4')
+
+DEFAULT_SOLVERS = ('euler_explicit', 'RK4', 'stepcontrol_mid_point_rule', 'solve_ivp_RK45')
+
+
+def _dense_reference(fcn, t_interval, z0):
+    """
+    reference(t) -> states of shape (len(t), dof) from DOP853 at rtol = atol = 1e-13 with
+    dense output. The integration restarts on every breakpoint of fcn with the one-sided
+    right-hand side (see solver.events), so the load steps of the battery stay sharp.
+    """
+    stops = np.concatenate(([t_interval[0]], interior_breakpoints(fcn, t_interval), [t_interval[-1]]))
+    z = np.asarray(z0, dtype=float)
+    segments = []
+    for t_a, t_b in zip(stops[:-1], stops[1:]):
+        sol = solve_ivp(one_sided(fcn, t_a, t_b), (t_a, t_b), z, method='DOP853', rtol=1e-13, atol=1e-13,
+                        dense_output=True)
+        segments.append(sol.sol)
+        z = sol.y[:, -1]
+
+    def reference(t):
+        t = np.asarray(t, dtype=float)
+        segment_of = np.clip(np.searchsorted(stops, t, side='right') - 1, 0, len(segments) - 1)
+        u = np.empty((len(t), len(z)))
+        for k, segment in enumerate(segments):
+            in_segment = segment_of == k
+            if np.any(in_segment):
+                u[in_segment] = segment(t[in_segment]).T
+        return u
+    return reference
+
+
+# name -> problem definition. The battery step widths stay at the explicit stability
+# limit (tau1 = 0.01 s) or below; the ranges keep a full run at a few minutes.
+PROBLEMS = {
+    'pendulum': {
+        'fcn': damped_pendulum_ode,
+        't_interval': (0.0, 10.0),
+        'z0': (np.deg2rad(75), 0.0),
+        'h': (0.1, 0.05, 0.02, 0.01, 0.005, 0.002),
+        'rtol': (1e-3, 1e-4, 1e-5, 1e-6, 1e-7),
+    },
+    'battery': {
+        'fcn': dp_ec_battery,
+        't_interval': (0.0, 100.0),
+        'z0': (0.8, 0.0, 0.0),
+        'h': (0.02, 0.01, 0.005, 0.002),
+        'rtol': (1e-3, 1e-4, 1e-5, 1e-6),
+    },
+}
+
+
+def _finite_or_none(value: float) -> Optional[float]:
+    """JSON has no inf / NaN; unstable runs are recorded with None."""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def benchmark_run(problem: str, solver: str, setting: float, repeat: int = 3,
+                  reference=None) -> dict:
+    """
+    Benchmarks one solver on one problem for one step width / tolerance. reference is the
+    _dense_reference of the problem, computed if not given.
+    """
+    spec = PROBLEMS[problem]
+    setting_name, runner = SOLVERS[solver]
+    t_interval, z0 = spec['t_interval'], np.array(spec['z0'], dtype=float)
+    if reference is None:
+        reference = _dense_reference(spec['fcn'], t_interval, z0)
+
+    wall_time = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner(spec['fcn'], t_interval, z0, setting)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    # Counting and tracing slow the solve down, hence a separate run
+    stats = SolverStats()
+    # Also counts the analytic Jacobian and split() forces, so solve_ivp's work ends up in stats too
+    counted = InstrumentedODE(spec['fcn'], stats, count_attributes=True)
+    tracemalloc.start()
+    try:
+        with np.errstate(all='ignore'):
+            t, u = runner(counted, t_interval, z0, setting)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The whole trajectory counts: the battery error peaks after the load steps and has
+    # decayed again by the end of the interval
+    error = np.max(np.abs(np.asarray(u) - reference(t)))
+    return {
+        'problem': problem,
+        'solver': solver,
+        'setting_name': setting_name,
+        'setting': setting,
+        'wall_time': wall_time,
+        'n_rhs': stats.n_rhs,
+        'n_jac': stats.n_jacobian,
+        'n_steps': len(t) - 1,
+        'peak_memory_bytes': peak_memory,
+        'error': _finite_or_none(error),
+    }
+
+
+def run_benchmarks(problems=None, solvers=DEFAULT_SOLVERS, repeat: int = 3) -> dict:
+    """Runs all solvers on all problems over their step widths / tolerances."""
+    problems = list(PROBLEMS) if problems is None else problems
+    results = []
+    for problem in problems:
+        spec = PROBLEMS[problem]
+        reference = _dense_reference(spec['fcn'], spec['t_interval'], np.array(spec['z0'], dtype=float))
+        for solver in solvers:
+            if solver in _LINEAR_ONLY and not hasattr(spec['fcn'], 'state_space'):
+                continue
+            if solver in _SPLIT_ONLY and not hasattr(spec['fcn'], 'split'):
+                continue
+            setting_name = SOLVERS[solver][0]
+            for setting in spec[setting_name]:
+                results.append(benchmark_run(problem, solver, setting, repeat, reference))
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def write_json(benchmarks: dict, path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(benchmarks, f, indent=2)
+
+
+def read_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def plot_work_precision(benchmarks: dict, filename: Optional[str] = None):
+    """
+    Work-precision diagrams, one column per problem: wall time (top) and RHS
+    evaluations (bottom) over the maximum trajectory error, one line per solver.
+    """
+    import matplotlib.pyplot as plt
+
+    results = benchmarks['results']
+    problems = list(dict.fromkeys(r['problem'] for r in results))
+    fig, axes = plt.subplots(2, len(problems), figsize=(6 * len(problems), 8), squeeze=False)
+    for col, problem in enumerate(problems):
+        for solver in dict.fromkeys(r['solver'] for r in results if r['problem'] == problem):
+            runs = [r for r in results if r['problem'] == problem and r['solver'] == solver
+                    and r['error'] is not None and r['error'] > 0]
+            error = [r['error'] for r in runs]
+            axes[0, col].loglog(error, [r['wall_time'] for r in runs], 'o-', label=solver)
+            axes[1, col].loglog(error, [r['n_rhs'] for r in runs], 'o-', label=solver)
+        axes[0, col].set_title(problem)
+        axes[0, col].set_ylabel('Wall time [s]')
+        axes[1, col].set_ylabel('RHS evaluations')
+        for ax in axes[:, col]:
+            ax.set_xlabel('Maximum error over the trajectory')
+            ax.grid(True, which='both', alpha=0.3)
+            ax.invert_xaxis()
+        axes[0, col].legend(fontsize='small')
+    fig.tight_layout()
+    if filename is not None:
+        fig.savefig(filename, dpi=150)
+    return fig
+
+
+def compare_benchmarks(baseline: dict, current: dict, time_factor: float = 1.5,
+                       error_factor: float = 2.0) -> list:
+    """
+    Regressions of current against baseline, matched on (problem, solver, setting):
+    wall time up by more than time_factor, error up by more than error_factor, more RHS
+    evaluations, or a run that became unstable. Returns a list of readable messages.
+    """
+    def key(r):
+        return r['problem'], r['solver'], r['setting']
+
+    baseline_runs = {key(r): r for r in baseline['results']}
+    regressions = []
+    for run in current['results']:
+        old = baseline_runs.get(key(run))
+        if old is None:
+            continue
+        name = f"{run['problem']}/{run['solver']} {run['setting_name']}={run['setting']:g}"
+        if run['wall_time'] > time_factor * old['wall_time']:
+            regressions.append(f"{name}: wall time {old['wall_time']:.3g}s -> {run['wall_time']:.3g}s")
+        if run['n_rhs'] > old['n_rhs']:
+            regressions.append(f"{name}: RHS evaluations {old['n_rhs']} -> {run['n_rhs']}")
+        if old['error'] is not None:
+            if run['error'] is None:
+                regressions.append(f"{name}: became unstable")
+            elif run['error'] > error_factor * old['error'] and run['error'] > 1e-14:
+                regressions.append(f"{name}: error {old['error']:.3g} -> {run['error']:.3g}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ODE solvers and draw work-precision diagrams.")
+    parser.add_argument('--output', default='benchmark.json', help="JSON result file")
+    parser.add_argument('--plot', default=None, help="Work-precision diagram (e.g. work_precision.png)")
+    parser.add_argument('--problems', nargs='+', choices=list(PROBLEMS), default=None)
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), default=list(DEFAULT_SOLVERS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=None, help="Earlier JSON result file to compare against")
+    parser.add_argument('--time-factor', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    benchmarks = run_benchmarks(args.problems, args.solvers, args.repeat)
+    write_json(benchmarks, args.output)
+    print(f"Wrote {len(benchmarks['results'])} results to {args.output}")
+    if args.plot is not None:
+        import matplotlib
+        matplotlib.use('Agg')
+        plot_work_precision(benchmarks, args.plot)
+        print(f"Wrote work-precision diagram to {args.plot}")
+
+    if args.baseline is not None:
+        regressions = compare_benchmarks(read_json(args.baseline), benchmarks, args.time_factor)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
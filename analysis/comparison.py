@@ -0,0 +1,249 @@
+"""
+Parallel solver comparisons for the main.py / main_stiff.py workflows.
+
+A comparison is a declarative list of cases, one dict per solver run:
+
+    cases = [
+        {'solver': 'euler_explicit', 'ode': 'pendulum', 'h': 0.01},
+        {'solver': 'RK4', 'ode': 'pendulum', 'h': 0.1},
+        {'solver': 'stepcontrol_mid_point_rule', 'ode': 'pendulum', 'rtol': 1e-4, 'dense_output': True},
+    ]
+    show_comparison(cases)
+
+'solver' is a name from SOLVERS, 'ode' a name from ODES (or a module level function),
+'t_interval', 'z0' and 'name' are optional; all other entries are passed to the
+solver as keyword arguments. comparison_cases builds the cases for all combinations
+of solvers and settings.
+
+The cases run concurrently in a process pool. Every worker copies the arrays of its
+result into one shared memory block, so only their layout is pickled, and the main
+process copies them out once. A comparison therefore takes about as long as its
+slowest case.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from solver.dense_output import HermiteDenseOutput, PolynomialDenseOutput
+from solver.explicit_solver import euler_explicit, RK4
+from solver.explicit_stepcontrol_solver import (stepcontrol_mid_point_rule, stepcontrol_dormand_prince,
+                                                stepcontrol_bogacki_shampine)
+from solver.exponential_solver import exponential_integrator
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from solver.implicit_solver import euler_implicit, trapezoidal_rule, BDF2, stepcontrol_rosenbrock
+from solver.symplectic_solver import stormer_verlet, strang_splitting, yoshida4
+from solver.jit_solver import euler_explicit_jit, RK4_jit, stepcontrol_mid_point_rule_jit
+from system_odes.pendulum_ode import damped_pendulum_ode
+from system_odes.dp_ec_battery_model import dp_ec_battery
+
+SOLVERS = {solver.__name__: solver for solver in (
+    euler_explicit, RK4, stormer_verlet, strang_splitting, yoshida4, euler_implicit, trapezoidal_rule, BDF2, exponential_integrator,
+    stepcontrol_mid_point_rule, stepcontrol_bogacki_shampine, stepcontrol_dormand_prince,
+    stepcontrol_extrapolation, stepcontrol_rosenbrock, euler_explicit_jit, RK4_jit, stepcontrol_mid_point_rule_jit)}
+
+# name -> (fcn, default t_interval, default z0), the settings of main.py and main_stiff.py
+ODES = {
+    'pendulum': (damped_pendulum_ode, (0.0, 5.0), (np.deg2rad(75), 0.0)),
+    'battery': (dp_ec_battery, (0.0, 100.0), (0.8, 0.0, 0.0)),
+}
+
+# Settings that name a case, in this order
+_NAME_SETTINGS = ('h', 'h_init', 'rtol', 'atol')
+
+
+def comparison_cases(solvers, odes=('pendulum',), **settings) -> list:
+    """
+    Cases for all combinations of solvers, odes and settings, e.g.
+    comparison_cases(['RK4', 'stepcontrol_mid_point_rule'], h=[0.1, 0.05], rtol=[1e-3]).
+    Every solver only combines the settings it accepts (h for RK4, rtol for the midpoint rule).
+    """
+    cases = []
+    for solver, ode in itertools.product(solvers, odes):
+        accepted = inspect.signature(SOLVERS[solver]).parameters
+        names = [name for name in settings if name in accepted]
+        for values in itertools.product(*(np.atleast_1d(settings[name]).tolist() for name in names)):
+            cases.append({'solver': solver, 'ode': ode, **dict(zip(names, values))})
+    return cases
+
+
+def case_name(case: dict) -> str:
+    """Display name of a case, e.g. 'RK4 (pendulum, h=0.1)'."""
+    if 'name' in case:
+        return case['name']
+    ode = case.get('ode', 'pendulum')
+    details = [ode if isinstance(ode, str) else ode.__name__]
+    details += [f"{key}={case[key]:g}" for key in _NAME_SETTINGS if key in case]
+    return f"{case['solver']} ({', '.join(details)})"
+
+
+def _solve(case: dict) -> tuple:
+    ode = case.get('ode', 'pendulum')
+    fcn, t_interval, z0 = ODES[ode] if isinstance(ode, str) else (ode, None, None)
+    t_interval = case.get('t_interval', t_interval)
+    z0 = np.asarray(case.get('z0', z0), dtype=float)
+    options = {key: value for key, value in case.items()
+               if key not in ('solver', 'ode', 't_interval', 'z0', 'name')}
+    return SOLVERS[case['solver']](fcn, list(t_interval), z0, **options)
+
+
+# Constructor arrays of the dense outputs, shared like the other result arrays
+_DENSE_OUTPUT_ARRAYS = {
+    HermiteDenseOutput: ('values_time', 'values_state', 'values_derivative'),
+    PolynomialDenseOutput: ('values_time', 'step_width', 'coefficients'),
+}
+
+
+def _share_result(result: tuple) -> tuple:
+    """
+    Copies all arrays of a solver result (also those of a dense output) into one new
+    shared memory block. Returns (block name or None, layout); the layout holds
+    ('array', offset, shape, dtype), ('dense', class, [array layouts]) or ('object', value).
+    """
+    arrays = []
+
+    def describe(value):
+        if isinstance(value, np.ndarray):
+            arrays.append(value)
+            return ('array', len(arrays) - 1)
+        if type(value) in _DENSE_OUTPUT_ARRAYS:
+            fields = _DENSE_OUTPUT_ARRAYS[type(value)]
+            return ('dense', type(value), [describe(getattr(value, field)) for field in fields])
+        return ('object', value)
+
+    layout = [describe(value) for value in result]
+    offsets = np.cumsum([0] + [array.nbytes for array in arrays])
+    if offsets[-1] == 0:
+        return None, _resolve_layout(layout, arrays, offsets)
+
+    block = shared_memory.SharedMemory(create=True, size=int(offsets[-1]))
+    try:
+        for array, offset in zip(arrays, offsets):
+            np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)[...] = array
+    finally:
+        block.close()
+    return block.name, _resolve_layout(layout, arrays, offsets)
+
+
+def _resolve_layout(layout: list, arrays: list, offsets: np.ndarray) -> list:
+    def resolve(entry):
+        if entry[0] == 'array':
+            array = arrays[entry[1]]
+            return ('array', int(offsets[entry[1]]), array.shape, array.dtype.str)
+        if entry[0] == 'dense':
+            return ('dense', entry[1], [resolve(item) for item in entry[2]])
+        return entry
+    return [resolve(entry) for entry in layout]
+
+
+def _run_case(case: dict) -> tuple:
+    """Solves one case in a worker process; returns the shared memory handle of the result."""
+    return _share_result(_solve(case))
+
+
+def _collect_result(name, layout: list) -> tuple:
+    """Copies a shared result out of its block and frees the block."""
+    block = shared_memory.SharedMemory(name=name) if name is not None else None
+
+    def restore(entry):
+        if entry[0] == 'array':
+            _, offset, shape, dtype = entry
+            return np.ndarray(shape, dtype, buffer=block.buf, offset=offset).copy()
+        if entry[0] == 'dense':
+            return entry[1](*(restore(item) for item in entry[2]))
+        return entry[1]
+
+    try:
+        return tuple(restore(entry) for entry in layout)
+    finally:
+        if block is not None:
+            block.close()
+            block.unlink()
+
+
+def _free_block(name) -> None:
+    """Unlinks a shared result block that was not collected, if it still exists."""
+    if name is None:
+        return
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def run_comparison(cases: list, max_workers: int = None) -> dict:
+    """
+    Runs all cases concurrently and returns {case name: solver result tuple}, in the
+    order of cases. max_workers=1 runs them one after another in this process.
+    If cases raise, the exception of the first of them is raised once all cases have
+    finished, after freeing the shared blocks of the others.
+    """
+    names = [case_name(case) for case in cases]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Case names must be unique, give duplicates a 'name': {names}")
+    if max_workers == 1:
+        return {name: _solve(case) for name, case in zip(names, cases)}
+
+    # Workers must register their blocks with the tracker of this process, which unlinks them
+    resource_tracker.ensure_running()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_case, case) for case in cases]
+
+    # All cases have finished here, so every block left over after an exception can be freed
+    results = {}
+    try:
+        for name, future in zip(names, futures):
+            results[name] = _collect_result(*future.result())
+    finally:
+        for name, future in zip(names, futures):
+            if name not in results and future.exception() is None:
+                _free_block(future.result()[0])
+    return results
+
+
+def _visualization_run(result: tuple) -> tuple:
+    """(t, u), or (t, u, dense_output) for adaptive runs with dense output, as the visualizations expect."""
+    dense_output = [value for value in result if type(value) in _DENSE_OUTPUT_ARRAYS]
+    return (result[0], result[1]) + tuple(dense_output[:1])
+
+
+def show_comparison(cases: list, max_workers: int = None, reference: bool = True) -> dict:
+    """
+    Runs the cases with run_comparison and shows the results: the pendulum cases in a
+    VisualizePendulum animation (with reference solution), the battery cases with
+    visualize_dp_ec_battery. Returns the results.
+    """
+    from visualization.pendulum.visualize_pendulum import VisualizePendulum
+    from visualization.dp_ec_battery import visualize_dp_ec_battery
+
+    results = run_comparison(cases, max_workers)
+    by_ode = {}
+    for case, (name, result) in zip(cases, results.items()):
+        by_ode.setdefault(case.get('ode', 'pendulum'), {})[name] = _visualization_run(result)
+
+    if 'pendulum' in by_ode:
+        VisualizePendulum(by_ode['pendulum'], reference).animate()
+    if 'battery' in by_ode:
+        visualize_dp_ec_battery(by_ode['battery'])
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run a solver comparison in parallel and visualize it.")
+    parser.add_argument('cases', help="JSON file with a list of cases, see analysis.comparison")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--no-reference', action='store_true', help="Hide the pendulum reference solution")
+    args = parser.parse_args(argv)
+
+    with open(args.cases) as f:
+        cases = json.load(f)
+    show_comparison(cases, args.workers, reference=not args.no_reference)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Parameter sweeps and Monte Carlo studies over the DP-EC battery parameters.
+
+A sweep is a list of parameter sets (see parameter_grid and sample_parameters). The
+sets are split into batches, every batch is solved at once as an ensemble with array
+valued BatteryModel parameters (one parameter set per run), and the batches are
+distributed over a ProcessPoolExecutor.
+
+Finished batches are written as compressed column files into a SweepStore directory.
+Every run is identified by a hash of its parameters, so restarting an interrupted
+sweep with the same (deterministically seeded) parameter sets only solves the runs
+that are not in the store yet.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from solver.explicit_solver import euler_explicit_ensemble, RK4_ensemble
+from solver.exponential_solver import exponential_integrator
+from system_odes.dp_ec_battery_model import BatteryModel, get_battery_parameters, get_load_profile
+from system_odes.load_profile import LoadProfile
+
+SWEEP_PARAMETERS = ('R0', 'R1', 'C1', 'R2', 'C2', 'Qn')
+
+_SOLVERS = ('exponential', 'RK4', 'euler_explicit')
+
+
+def parameter_grid(**values) -> list:
+    """
+    Cartesian product of the given parameter values, e.g.
+    parameter_grid(R0=[0.004, 0.005], C2=np.linspace(1500, 2500, 5)) -> 10 parameter sets.
+    """
+    for name in values:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter '{name}', use one of {SWEEP_PARAMETERS}.")
+    names = list(values)
+    return [dict(zip(names, map(float, combination)))
+            for combination in itertools.product(*(np.atleast_1d(values[name]) for name in names))]
+
+
+def sample_parameters(distributions: dict, n_samples: int, seed: int = 0) -> list:
+    """
+    Monte Carlo parameter sets. distributions maps a parameter name to
+    ('uniform', low, high), ('normal', mean, std) or ('lognormal', mean, sigma).
+
+    Every parameter draws from its own generator seeded with (seed, parameter index),
+    so the same seed always gives the same sets, and increasing n_samples only appends
+    new sets: a restarted or extended sweep finds the earlier runs in its store.
+    """
+    columns = {}
+    for name, (kind, a, b) in distributions.items():
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter '{name}', use one of {SWEEP_PARAMETERS}.")
+        rng = np.random.default_rng([seed, SWEEP_PARAMETERS.index(name)])
+        if kind == 'uniform':
+            columns[name] = rng.uniform(a, b, n_samples)
+        elif kind == 'normal':
+            columns[name] = rng.normal(a, b, n_samples)
+        elif kind == 'lognormal':
+            columns[name] = rng.lognormal(a, b, n_samples)
+        else:
+            raise ValueError(f"Unknown distribution '{kind}', use 'uniform', 'normal' or 'lognormal'.")
+    return [{name: float(column[k]) for name, column in columns.items()} for k in range(n_samples)]
+
+
+def run_key(params: dict) -> str:
+    """Content hash of a parameter set; parameters that are not swept take their defaults."""
+    defaults = get_battery_parameters()
+    values = [float(params.get(name, defaults[name])) for name in SWEEP_PARAMETERS]
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()
+
+
+class SweepStore:
+    """
+    Directory of column files, one compressed .npz per finished batch, plus meta.json
+    with the sweep settings and the shared (decimated) time grid time.npy.
+
+    Columns: 'key', one float64 column per entry of SWEEP_PARAMETERS, the scalar results
+    'soc_end', 'u_term_end', 'u_term_min', and the float32 trajectories 'z' (n, N, 3)
+    and 'u_term' (n, N).
+    """
+    directory: str
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _batch_files(self) -> list:
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.startswith('batch_') and name.endswith('.npz'))
+
+    def check_settings(self, settings: dict) -> None:
+        """Stores the sweep settings on first use; later sweeps must use the same ones."""
+        path = os.path.join(self.directory, 'meta.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            if stored != settings:
+                raise ValueError(f"The store {self.directory} holds a sweep with different settings: {stored}")
+        else:
+            with open(path, 'w') as f:
+                json.dump(settings, f, indent=2)
+
+    def completed_keys(self) -> set:
+        keys = set()
+        for path in self._batch_files():
+            with np.load(path) as batch:
+                keys.update(batch['key'].tolist())
+        return keys
+
+    def write_time(self, t: np.ndarray) -> None:
+        path = os.path.join(self.directory, 'time.npy')
+        if not os.path.exists(path):
+            np.save(path, t)
+
+    def write_batch(self, columns: dict) -> None:
+        """Writes one batch atomically, an interrupted sweep never leaves a partial file behind."""
+        index = len(self._batch_files())
+        path = os.path.join(self.directory, f'batch_{index:05d}.npz')
+        while os.path.exists(path):
+            index += 1
+            path = os.path.join(self.directory, f'batch_{index:05d}.npz')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp_path, path)
+
+    def load(self) -> tuple:
+        """Returns (t, columns) with all batches concatenated per column."""
+        t = np.load(os.path.join(self.directory, 'time.npy'))
+        batches = [dict(np.load(path)) for path in self._batch_files()]
+        if not batches:
+            return t, {}
+        return t, {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+
+def _run_batch(keys: list, param_sets: list, t_interval: tuple, z0: tuple, h: float,
+               solver: str, every_n: int, load_profile: LoadProfile) -> tuple:
+    """Solves one batch as an ensemble, one parameter set per run. Runs in a worker process."""
+    params = get_battery_parameters()
+    for name in SWEEP_PARAMETERS:
+        params[name] = np.array([p.get(name, params[name]) for p in param_sets], dtype=float)
+    model = BatteryModel(params, load_profile)
+
+    Z0 = np.tile(np.asarray(z0, dtype=float), (len(param_sets), 1))
+    if solver == 'exponential':
+        t, u = exponential_integrator(model, t_interval, Z0, h)
+    else:
+        ensemble_solver = RK4_ensemble if solver == 'RK4' else euler_explicit_ensemble
+        t, u = ensemble_solver(model.rhs_vectorized, t_interval, Z0, h, breakpoints=model.breakpoints)
+
+    # Terminal voltage for all runs and times at once, parameters broadcast per run
+    R0 = params['R0'][:, None]
+    u_oc = model.U_min + (model.U_max - model.U_min) * u[..., 0]
+    u_term = u_oc - u[..., 1] - u[..., 2] - model.current(t) * R0
+
+    columns = {'key': np.array(keys)}
+    for name in SWEEP_PARAMETERS:
+        columns[name] = params[name]
+    columns['soc_end'] = u[:, -1, 0]
+    columns['u_term_end'] = u_term[:, -1]
+    columns['u_term_min'] = u_term.min(axis=1)
+    columns['z'] = u[:, ::every_n].astype(np.float32)
+    columns['u_term'] = u_term[:, ::every_n].astype(np.float32)
+    return t[::every_n], columns
+
+
+def run_sweep(parameter_sets: list, store_dir: str, t_interval: tuple = (0.0, 100.0),
+              z0: tuple = (0.8, 0.0, 0.0), h: float = 0.1, solver: str = 'exponential',
+              batch_size: int = 64, max_workers: int = None, every_n: int = 10,
+              load_profile: LoadProfile = None) -> SweepStore:
+    """
+    Runs the battery model for all parameter sets and streams the results into a SweepStore.
+
+    Runs already in the store are skipped. solver is 'exponential' (exact, default),
+    'RK4' or 'euler_explicit' (ensemble versions). load_profile defaults to the active
+    profile. max_workers=1 runs all batches in this process.
+    Returns the store; its load() gives the results.
+    """
+    if solver not in _SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', use one of {_SOLVERS}.")
+    if load_profile is None:
+        # Worker processes do not see set_load_profile of this process
+        load_profile = get_load_profile()
+
+    store = SweepStore(store_dir)
+    store.check_settings({'t_interval': [float(t) for t in t_interval], 'z0': [float(z) for z in z0],
+                          'h': float(h), 'solver': solver, 'every_n': int(every_n),
+                          'load_times': load_profile.times.tolist(), 'load_values': load_profile.values.tolist(),
+                          'interpolation': load_profile.interpolation})
+
+    done = store.completed_keys()
+    pending = {}
+    for params in parameter_sets:
+        key = run_key(params)
+        if key not in done:
+            pending[key] = params   # Also drops duplicate sets
+    keys = list(pending)
+    batches = [keys[k:k + batch_size] for k in range(0, len(keys), batch_size)]
+    settings = (tuple(t_interval), tuple(z0), h, solver, every_n, load_profile)
+
+    if max_workers == 1:
+        for batch in batches:
+            t, columns = _run_batch(batch, [pending[key] for key in batch], *settings)
+            store.write_time(t)
+            store.write_batch(columns)
+        return store
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_batch, batch, [pending[key] for key in batch], *settings)
+                   for batch in batches]
+        for future in as_completed(futures):
+            t, columns = future.result()
+            store.write_time(t)
+            store.write_batch(columns)
+    return store
@@ -0,0 +1,211 @@
+"""
+On-disk store for single simulation runs.
+
+A run is a directory with one .npy file per column ('t', 'z' and, for adaptive
+solvers, 'h' and 'error') and meta.json with the solver, the ODE, its parameters, the
+tolerances and any further metadata. Columns are appended chunk by chunk as they come
+from the solver (e.g. the stream_* solvers), so a run never has to fit into memory;
+the .npy headers are updated after every chunk, so an interrupted run stays readable.
+
+open_run returns the columns as read-only memory maps. A StoredRun unpacks like the
+(t, u) tuples of the solvers, so it can be put into the results dicts of the
+visualizations directly; decimated() reduces long runs by min/max decimation, one
+chunk at a time.
+"""
+
+import json
+import os
+from typing import Optional
+import numpy as np
+from visualization.downsample import minmax_indices
+
+# Fixed header size, so the header can be rewritten with the final length in place
+_HEADER_SIZE = 128
+_COLUMNS = ('t', 'z', 'h', 'error')
+
+
+def _npy_header(dtype: np.dtype, shape: tuple) -> bytes:
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': shape})
+    magic = np.lib.format.magic(1, 0)
+    n_pad = _HEADER_SIZE - len(magic) - 2 - len(header) - 1
+    return magic + (len(header) + n_pad + 1).to_bytes(2, 'little') + header.encode('latin1') + b' ' * n_pad + b'\n'
+
+
+def _json_value(value):
+    """Parameters and tolerances as JSON: arrays become lists, callables their names."""
+    if isinstance(value, dict):
+        return {str(key): _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value).tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if callable(value):
+        return getattr(value, '__name__', repr(value))
+    return value
+
+
+class _ColumnFile:
+    """A .npy file that grows along its first axis."""
+
+    def __init__(self, path: str, dtype: np.dtype, row_shape: tuple) -> None:
+        self.dtype = np.dtype(dtype)
+        self.row_shape = row_shape
+        self.length = 0
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self) -> None:
+        self._file.seek(0)
+        self._file.write(_npy_header(self.dtype, (self.length,) + self.row_shape))
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        if values.shape[1:] != self.row_shape:
+            raise ValueError(f"Chunk of shape {values.shape} does not continue rows of shape {self.row_shape}.")
+        self._file.write(values.tobytes())
+        self.length += len(values)
+        self._write_header()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ResultWriter:
+    """
+    Writes one run into the directory path, chunk by chunk:
+
+        with ResultWriter('runs/rk4', solver='RK4', ode=damped_pendulum_ode,
+                          params=get_pendulum_parameters(), tolerances={'h': 0.01}) as writer:
+            for t, z in stream_RK4(damped_pendulum_ode, [0, 1000], z0, 0.01):
+                writer.write(t, z)
+
+    The columns are fixed by the first write: 'h' and 'error' are stored if given there.
+    dtype applies to all columns except 't', which is always float64.
+    """
+    path: str
+    metadata: dict
+
+    def __init__(self, path: str, solver: str, ode=None, params: Optional[dict] = None,
+                 tolerances: Optional[dict] = None, dtype=np.float64, **metadata) -> None:
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.metadata = {'solver': solver, 'ode': _json_value(ode), 'params': _json_value(params or {}),
+                         'tolerances': _json_value(tolerances or {}),
+                         **{key: _json_value(value) for key, value in metadata.items()}}
+        self._columns = None
+        os.makedirs(path, exist_ok=True)
+        self._write_meta(complete=False)
+
+    def _write_meta(self, complete: bool) -> None:
+        meta = dict(self.metadata, complete=complete,
+                    columns=[] if self._columns is None else list(self._columns),
+                    n_points=0 if self._columns is None else self._columns['t'].length)
+        tmp_path = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def write(self, t: np.ndarray, z: np.ndarray, h: Optional[np.ndarray] = None,
+              error: Optional[np.ndarray] = None) -> None:
+        """Appends a chunk of points; z has shape (n, dof), h and error shape (n,)."""
+        chunk = {'t': np.atleast_1d(t), 'z': np.asarray(z), 'h': h, 'error': error}
+        chunk = {name: values for name, values in chunk.items() if values is not None}
+        if self._columns is None:
+            self._columns = {name: _ColumnFile(os.path.join(self.path, f'{name}.npy'),
+                                               np.float64 if name == 't' else self.dtype,
+                                               np.shape(values)[1:])
+                             for name, values in chunk.items()}
+            self._write_meta(complete=False)
+        if chunk.keys() != self._columns.keys():
+            raise ValueError(f"Every chunk must contain the columns {list(self._columns)}.")
+        for name, values in chunk.items():
+            self._columns[name].append(values)
+
+    def write_stream(self, chunks) -> None:
+        """Appends all (t, z) chunks of a stream_* solver."""
+        for t, z in chunks:
+            self.write(t, z)
+
+    def close(self) -> None:
+        if self._columns is not None:
+            for column in self._columns.values():
+                column.close()
+        self._write_meta(complete=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def save_run(path: str, t: np.ndarray, z: np.ndarray, h: Optional[np.ndarray] = None,
+             error: Optional[np.ndarray] = None, solver: str = '', ode=None, params: Optional[dict] = None,
+             tolerances: Optional[dict] = None, dtype=np.float64, **metadata) -> None:
+    """Stores the arrays of a finished solver run, e.g. save_run(path, *stepcontrol_mid_point_rule(...))."""
+    with ResultWriter(path, solver, ode, params, tolerances, dtype, **metadata) as writer:
+        writer.write(t, z, h, error)
+
+
+class StoredRun:
+    """
+    A run read back by open_run. t, z, h and error are read-only memory maps (h and
+    error None if not stored), metadata is the content of meta.json. A run closed
+    before its first write has zero-length t and z.
+
+    Iterating gives (t, z), and run[0], run[1] and len(run) behave like the (t, u)
+    tuple of a solver, so a StoredRun can stand in for one.
+    """
+    path: str
+    metadata: dict
+    t: np.ndarray
+    z: np.ndarray
+    h: Optional[np.ndarray]
+    error: Optional[np.ndarray]
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.metadata = json.load(f)
+        columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                   for name in self.metadata['columns']}
+        # An interrupted writer may have appended a chunk to some of the columns only
+        n_points = min((len(values) for values in columns.values()), default=0)
+        self.t, self.z, self.h, self.error = (columns[name][:n_points] if name in columns else None
+                                              for name in _COLUMNS)
+        if self.t is None:
+            self.t, self.z = np.zeros(0), np.zeros((0, 0))
+
+    @property
+    def complete(self) -> bool:
+        return self.metadata['complete']
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return (self.t, self.z)[index]
+
+    def __iter__(self):
+        return iter((self.t, self.z))
+
+    def decimated(self, bucket_width: float, chunk_size: int = 1_000_000) -> tuple:
+        """
+        (t, z) in memory, reduced to the minimum and maximum of every state per bucket of
+        width bucket_width (see visualization.downsample). Reads chunk_size points at a
+        time, buckets restart at chunk borders.
+        """
+        keep = [minmax_indices(self.t[start:start + chunk_size], self.z[start:start + chunk_size],
+                               bucket_width) + start
+                for start in range(0, len(self.t), chunk_size)]
+        idx = np.concatenate(keep) if keep else np.zeros(0, dtype=int)
+        return np.array(self.t[idx]), np.array(self.z[idx])
+
+    def __repr__(self) -> str:
+        return (f"StoredRun('{self.path}', solver={self.metadata['solver']!r}, "
+                f"n_points={len(self.t)}, complete={self.complete})")
+
+
+def open_run(path: str) -> StoredRun:
+    return StoredRun(path)
@@ -0,0 +1,125 @@
+import numpy as np
+
+class HermiteDenseOutput:
+    """
+    Continuous solution built from accepted step points.
+
+    Between two neighbouring points the solution is the cubic Hermite
+    polynomial matching the states and their derivatives at both ends.
+    Evaluation is vectorized: one searchsorted call locates the step
+    for every requested time.
+
+    A point may appear twice, e.g. on a breakpoint where the derivative jumps:
+    the first entry holds the left limit for the step ending there, the second
+    the right limit for the step starting there.
+    """
+    values_time: np.ndarray
+    values_state: np.ndarray
+    values_derivative: np.ndarray
+
+    def __init__(self, values_time: np.ndarray, values_state: np.ndarray,
+                 values_derivative: np.ndarray) -> None:
+        self.values_time = np.asarray(values_time, dtype=float)
+        self.values_state = np.asarray(values_state, dtype=float)
+        self.values_derivative = np.asarray(values_derivative, dtype=float)
+        if not (len(self.values_time) == len(self.values_state) == len(self.values_derivative)):
+            raise ValueError("Time, state and derivative arrays must have the same length.")
+
+    @property
+    def t_min(self) -> float:
+        return self.values_time[0]
+
+    @property
+    def t_max(self) -> float:
+        return self.values_time[-1]
+
+    def __call__(self, t) -> np.ndarray:
+        """
+        Evaluates the interpolant at t (scalar or array).
+        Returns shape (dof,) for a scalar t and (len(t), dof) otherwise.
+        """
+        t_arr = np.atleast_1d(np.asarray(t, dtype=float))
+        if np.any(t_arr < self.t_min) or np.any(t_arr > self.t_max):
+            raise ValueError(f"Requested times outside of the solution interval [{self.t_min}, {self.t_max}].")
+
+        # Index of the step [t_k, t_k+1] containing each requested time
+        idx = np.searchsorted(self.values_time, t_arr, side='right') - 1
+        idx = np.clip(idx, 0, len(self.values_time) - 2)
+
+        t0 = self.values_time[idx]
+        h = self.values_time[idx + 1] - t0
+        s = ((t_arr - t0) / h)[:, None]
+
+        # Cubic Hermite basis functions on s in [0, 1]
+        h00 = (1 + 2 * s) * (1 - s) ** 2
+        h10 = s * (1 - s) ** 2
+        h01 = s ** 2 * (3 - 2 * s)
+        h11 = s ** 2 * (s - 1)
+
+        h = h[:, None]
+        z = (h00 * self.values_state[idx] + h10 * h * self.values_derivative[idx]
+             + h01 * self.values_state[idx + 1] + h11 * h * self.values_derivative[idx + 1])
+
+        if np.ndim(t) == 0:
+            return z[0]
+        return z
+
+
+class PolynomialDenseOutput:
+    """
+    Continuous solution with one polynomial per step, e.g. of stepcontrol_extrapolation.
+
+    Step k runs from values_time[k] to values_time[k+1]; there the solution is
+    sum_i coefficients[k][i] * x^i with x = (t - values_time[k]) / step_width[k] - 1/2.
+    step_width[k] is the width the polynomial was built for, which may exceed the step if
+    an event ended the integration inside it. Polynomials of lower degree are padded
+    with zeros. Evaluation is vectorized like HermiteDenseOutput.
+    """
+    values_time: np.ndarray
+    step_width: np.ndarray
+    coefficients: np.ndarray
+
+    def __init__(self, values_time: np.ndarray, step_width: np.ndarray, coefficients) -> None:
+        self.values_time = np.asarray(values_time, dtype=float)
+        self.step_width = np.asarray(step_width, dtype=float)
+        if isinstance(coefficients, np.ndarray):
+            self.coefficients = coefficients.astype(float, copy=False)
+        else:
+            coefficients = [np.asarray(c, dtype=float) for c in coefficients]
+            degree = max(len(c) for c in coefficients)
+            self.coefficients = np.zeros((len(coefficients), degree) + coefficients[0].shape[1:])
+            for k, c in enumerate(coefficients):
+                self.coefficients[k, :len(c)] = c
+        if not (len(self.values_time) - 1 == len(self.step_width) == len(self.coefficients)):
+            raise ValueError("Expected one step width and one polynomial per step.")
+
+    @property
+    def t_min(self) -> float:
+        return self.values_time[0]
+
+    @property
+    def t_max(self) -> float:
+        return self.values_time[-1]
+
+    def __call__(self, t) -> np.ndarray:
+        """
+        Evaluates the polynomials at t (scalar or array).
+        Returns shape (dof,) for a scalar t and (len(t), dof) otherwise.
+        """
+        t_arr = np.atleast_1d(np.asarray(t, dtype=float))
+        if np.any(t_arr < self.t_min) or np.any(t_arr > self.t_max):
+            raise ValueError(f"Requested times outside of the solution interval [{self.t_min}, {self.t_max}].")
+
+        idx = np.searchsorted(self.values_time, t_arr, side='right') - 1
+        idx = np.clip(idx, 0, len(self.step_width) - 1)
+        x = ((t_arr - self.values_time[idx]) / self.step_width[idx] - 0.5)[:, None]
+
+        # Horner scheme over the degrees, all requested times at once
+        coefficients = self.coefficients[idx]
+        z = coefficients[:, -1]
+        for i in range(coefficients.shape[1] - 2, -1, -1):
+            z = z * x + coefficients[:, i]
+
+        if np.ndim(t) == 0:
+            return z[0]
+        return z
@@ -0,0 +1,122 @@
+"""
+Discontinuities and events.
+
+Breakpoints: an ODE may declare times where its right-hand side jumps (e.g. current
+switches) as fcn.breakpoints, or they are passed to a solver as breakpoints=...
+Solvers then end a step exactly on every breakpoint and evaluate the right-hand side
+one-sided there: the step ending at a breakpoint sees the left limit, the step
+starting there the right limit. That way no step straddles a jump.
+
+Events: an event function g(t, z) returns a float whose zero crossings are located
+by root finding on the Hermite interpolant of the step, without re-integrating.
+Like in scipy, it may carry the attributes terminal (stop the integration at the
+first crossing) and direction (> 0 only rising, < 0 only falling crossings).
+"""
+
+import numpy as np
+from scipy.optimize import brentq
+from solver.dense_output import HermiteDenseOutput
+
+
+def interior_breakpoints(fcn, t_interval: list, breakpoints=None) -> np.ndarray:
+    """Sorted breakpoints strictly inside t_interval; defaults to fcn.breakpoints if not given."""
+    if breakpoints is None:
+        breakpoints = getattr(fcn, 'breakpoints', ())
+    breakpoints = np.unique(np.asarray(breakpoints, dtype=float))
+    return breakpoints[(breakpoints > t_interval[0]) & (breakpoints < t_interval[-1])]
+
+
+def next_stop(t: float, t_end: float, breakpoints: np.ndarray) -> float:
+    """The next breakpoint after t, or t_end if there is none."""
+    i = np.searchsorted(breakpoints, t, side='right')
+    return breakpoints[i] if i < len(breakpoints) else t_end
+
+
+def one_sided(fcn, t_a: float, t_b: float):
+    """
+    Wraps fcn so that all stage times are clamped into the open step (t_a, t_b),
+    i.e. the right limit is used at the step start and the left limit at the step end.
+    """
+    t_lo = np.nextafter(t_a, np.inf)
+    t_hi = np.nextafter(t_b, -np.inf)
+    return lambda t, z: fcn(min(max(t, t_lo), t_hi), z)
+
+
+class EventDetector:
+    """
+    Tracks the sign of every event function from step to step and records the crossings.
+    t_events[i] and z_events[i] collect the crossings of events[i].
+    """
+    events: list
+    t_events: list
+    z_events: list
+
+    def __init__(self, events, t0: float, z0: np.ndarray) -> None:
+        self.events = list(events) if isinstance(events, (list, tuple)) else [events]
+        self.t_events = [[] for _ in self.events]
+        self.z_events = [[] for _ in self.events]
+        self._g_prev = np.array([g(t0, z0) for g in self.events], dtype=float)
+        self._state_shape = np.shape(z0)
+
+    def check(self, t_prev: float, z_prev: np.ndarray, t: float, z: np.ndarray, derivatives):
+        """
+        Checks the step [t_prev, t] for crossings. derivatives() returns (dz_prev, dz) and is
+        only called if a crossing needs to be located, so fixed-step solvers pay no extra
+        RHS calls otherwise. Returns (t_event, z_event) of the first terminal crossing or None.
+        """
+        g_new = np.array([g(t, z) for g in self.events], dtype=float)
+        rising = (self._g_prev < 0) & (g_new >= 0)
+        falling = (self._g_prev > 0) & (g_new <= 0)
+        self._g_prev = g_new
+
+        crossings = []
+        for i, g in enumerate(self.events):
+            direction = getattr(g, 'direction', 0)
+            if (rising[i] and direction >= 0) or (falling[i] and direction <= 0):
+                crossings.append(i)
+        if not crossings:
+            return None
+
+        dz_prev, dz = derivatives()
+        step = HermiteDenseOutput([t_prev, t], [z_prev, z], [dz_prev, dz])
+        located = []
+        for i in crossings:
+            g = self.events[i]
+            if g_new[i] == 0.0:
+                t_event = t
+            else:
+                t_event = brentq(lambda s: g(s, step(s)), t_prev, t, xtol=1e-12 * max(1.0, abs(t)))
+            located.append((t_event, i))
+
+        # Report crossings in time order, stop at the first terminal one
+        for t_event, i in sorted(located):
+            z_event = step(t_event)
+            self.t_events[i].append(t_event)
+            self.z_events[i].append(z_event)
+            if getattr(self.events[i], 'terminal', False):
+                return t_event, z_event
+        return None
+
+    def results(self):
+        """Event times and states as lists of arrays, one entry per event function."""
+        return ([np.array(t_ev) for t_ev in self.t_events],
+                [np.array(z_ev).reshape((len(z_ev),) + self._state_shape) for z_ev in self.z_events])
+
+
+def _steps_with_events(fcn, steps, detector: EventDetector):
+    """
+    Wraps a step generator yielding (t, z, h, error, dz, dz_next) with event detection.
+    On a terminal event the last step is cut at the event and the generator stops.
+    """
+    t_prev, z_prev, dz_prev = None, None, None
+    for t, z, h, err, dz, dz_next in steps:
+        if t_prev is not None:
+            # The step starts with the derivative its predecessor handed on, ends with the left limit
+            terminal = detector.check(t_prev, z_prev, t, z, lambda: (dz_prev, dz))
+            if terminal is not None:
+                t_event, z_event = terminal
+                dz_event = fcn(t_event, z_event)
+                yield t_event, z_event, t_event - t_prev, err, dz_event, dz_event
+                return
+        yield t, z, h, err, dz, dz_next
+        t_prev, z_prev, dz_prev = t, z, dz_next
@@ -1,13 +1,240 @@
 import numpy as np
 import math
+from solver.events import interior_breakpoints, one_sided, EventDetector
+from solver.stats import _start_stats, _finish_stats, _step_with_callback
+from solver.step_size import auto_step_width
 
-def euler_explicit(fcn, t_interval: list, z0: np.ndarray, h: float):
+def number_of_steps(t_interval: list, h: float) -> int:
+    """Number of fixed steps of width h needed to cover t_interval (last step may be shorter)."""
+    span = t_interval[-1] - t_interval[0]
+    # The small tolerance avoids an extra sliver step due to round-off in span / h
+    return max(int(math.ceil(span / h - 1e-9)), 0)
 
-    return #np.array(t_container), np.array(u_container)
 
+def time_grid(t_interval: list, h: float, breakpoints: np.ndarray = ()) -> np.ndarray:
+    """
+    Uniform grid of width h over t_interval, ending exactly on t_end.
+    Breakpoints inside the interval are added to the grid; grid points closer than
+    1e-6*h to a breakpoint are replaced by it, so no sliver steps arise.
+    """
+    n_steps = number_of_steps(t_interval, h)
+    grid = np.arange(n_steps + 1) * h + t_interval[0]
+    grid[-1] = t_interval[-1]
+    if len(breakpoints) == 0:
+        return grid
 
+    distance = np.min(np.abs(grid[:, None] - np.asarray(breakpoints)[None, :]), axis=1)
+    return np.union1d(grid[distance > 1e-6 * h], breakpoints)
 
-def RK4(fcn, t_interval: list, z0: np.ndarray, h: float):
 
-    return #np.array(t_container), np.array(u_container)
+def _prepare_output(t_interval: list, h: float, state_shape: tuple, out, time_axis: int,
+                    breakpoints: np.ndarray = ()):
+    """
+    Returns the time grid and the state buffer, either freshly allocated or taken from out=(t_out, u_out).
+    The state buffer has n_steps + 1 entries along time_axis.
+    """
+    grid = time_grid(t_interval, h, breakpoints) if len(breakpoints) else None
+    n_steps = number_of_steps(t_interval, h) if grid is None else len(grid) - 1
+    u_shape = list(state_shape)
+    u_shape.insert(time_axis, n_steps + 1)
+    u_shape = tuple(u_shape)
 
+    if out is None:
+        t_out = np.empty(n_steps + 1)
+        u_out = np.empty(u_shape)
+    else:
+        t_out, u_out = out
+        if t_out.shape != (n_steps + 1,) or u_out.shape != u_shape:
+            raise ValueError(f"Output buffers must have shapes {(n_steps + 1,)} and {u_shape}, "
+                             f"got {t_out.shape} and {u_out.shape}.")
+
+    if grid is not None:
+        t_out[:] = grid
+        return n_steps, t_out, u_out
+
+    # Uniform grid; the last point is pinned to t_end so a shorter final step lands exactly on it
+    np.multiply(np.arange(n_steps + 1), h, out=t_out)
+    t_out += t_interval[0]
+    t_out[-1] = t_interval[-1]
+    return n_steps, t_out, u_out
+
+
+def _step_functions(fcn, t_out: np.ndarray, breakpoints: np.ndarray) -> dict:
+    """
+    One-sided wrappers of fcn for the steps that start or end on a breakpoint,
+    keyed by step index. All other steps use fcn itself.
+    """
+    if len(breakpoints) == 0:
+        return {}
+    at_breakpoint = np.isin(t_out, breakpoints)
+    return {n: one_sided(fcn, t_out[n], t_out[n + 1])
+            for n in np.flatnonzero(at_breakpoint[:-1] | at_breakpoint[1:])}
+
+
+def _euler_step(fcn, t: float, z: np.ndarray, h: float, z_new: np.ndarray) -> None:
+    """One explicit Euler step from z, written in place into z_new."""
+    np.multiply(fcn(t, z), h, out=z_new)
+    z_new += z
+
+
+def _rk4_step(fcn, t: float, z: np.ndarray, h: float, z_new: np.ndarray, z_stage: np.ndarray) -> None:
+    """One classic RK4 step from z into z_new; z_stage is a scratch buffer for the stage arguments."""
+    k1 = fcn(t, z)
+    np.multiply(k1, h / 2, out=z_stage)
+    z_stage += z
+    k2 = fcn(t + h / 2, z_stage)
+    np.multiply(k2, h / 2, out=z_stage)
+    z_stage += z
+    k3 = fcn(t + h / 2, z_stage)
+    np.multiply(k3, h, out=z_stage)
+    z_stage += z
+    k4 = fcn(t + h, z_stage)
+
+    # z_new = z + h/6 * (k1 + 2*k2 + 2*k3 + k4), accumulated in place
+    np.add(k2, k3, out=z_new)
+    z_new *= 2
+    z_new += k1
+    z_new += k4
+    z_new *= h / 6
+    z_new += z
+
+
+def _fixed_step_solve(step, fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple,
+                      breakpoints, events):
+    """Shared driver of euler_explicit and RK4 with breakpoints and events."""
+    z0 = np.asarray(z0, dtype=float)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=0,
+                                            breakpoints=breakpoints)
+    u_out[0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+
+    if events is None:
+        for n in range(n_steps):
+            step(f_steps.get(n, fcn), t_out[n], u_out[n], t_out[n + 1] - t_out[n], u_out[n + 1])
+        return t_out, u_out
+
+    detector = EventDetector(events, t_out[0], z0)
+    for n in range(n_steps):
+        f_step = f_steps.get(n, fcn)
+        step(f_step, t_out[n], u_out[n], t_out[n + 1] - t_out[n], u_out[n + 1])
+        terminal = detector.check(t_out[n], u_out[n], t_out[n + 1], u_out[n + 1],
+                                  lambda: (f_step(t_out[n], u_out[n]), f_step(t_out[n + 1], u_out[n + 1])))
+        if terminal is not None:
+            # The event replaces point n + 1 and ends the trajectory
+            t_out[n + 1], u_out[n + 1] = terminal
+            t_out, u_out = t_out[:n + 2], u_out[:n + 2]
+            break
+    return (t_out, u_out) + detector.results()
+
+
+def _resolve_step_width(solver, fcn, t_interval: list, z0: np.ndarray, h, target_error) -> float:
+    """h, or for h='auto' the step width that meets target_error, see solver.step_size."""
+    if isinstance(h, str):
+        if h != 'auto':
+            raise ValueError(f"h must be a step width or 'auto', not '{h}'.")
+        if target_error is None:
+            raise ValueError("h='auto' needs a target_error.")
+        return auto_step_width(solver, fcn, t_interval, z0, target_error)
+    return h
+
+
+def euler_explicit(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                   breakpoints=None, events=None, stats=False, target_error: float = None):
+    """
+    Explicit Euler method with fixed step width h.
+
+    The step count is computed up front and the results are written into preallocated
+    arrays. Pass out=(t_out, u_out) with shapes (N,) and (N, dof) to reuse buffers across runs.
+
+    Breakpoints (default: fcn.breakpoints) are added to the time grid and the right-hand
+    side is evaluated one-sided there, see solver.events. With events, the event times
+    and states (lists with one array per event function) are appended to the returned
+    tuple, and a terminal event ends the integration early.
+
+    With stats=True (or a SolverStats) a SolverStats with RHS calls, step counts and
+    timings is appended to the returned tuple, see solver.stats.
+
+    h='auto' chooses the largest step width expected to reach a global error of
+    target_error from short pilot runs, see solver.step_size.
+    """
+    h = _resolve_step_width(euler_explicit, fcn, t_interval, z0, h, target_error)
+    stats, fcn = _start_stats(stats, fcn)
+    step = _step_with_callback(_euler_step, stats)
+    return _finish_stats(_fixed_step_solve(step, fcn, t_interval, z0, h, out, breakpoints, events), stats)
+
+
+def RK4(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+        breakpoints=None, events=None, stats=False, target_error: float = None):
+    """
+    Classic fourth order Runge-Kutta method with fixed step width h.
+    Output handling, breakpoints, events, stats and h='auto' as in euler_explicit.
+    """
+    h = _resolve_step_width(RK4, fcn, t_interval, z0, h, target_error)
+    stats, fcn = _start_stats(stats, fcn)
+    z_stage = np.empty(np.shape(z0))
+
+    def step(fcn, t, z, h, z_new):
+        _rk4_step(fcn, t, z, h, z_new, z_stage)
+
+    step = _step_with_callback(step, stats)
+    return _finish_stats(_fixed_step_solve(step, fcn, t_interval, z0, h, out, breakpoints, events), stats)
+
+
+def euler_explicit_ensemble(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                            breakpoints=None, stats=False):
+    """
+    Advances many initial states in lockstep with the explicit Euler method.
+
+    fcn must accept stacked states of shape (n_runs, dof), e.g.
+    damped_pendulum_ode_vectorized or dp_ec_battery_vectorized.
+    z0 has shape (n_runs, dof), the returned states have shape (n_runs, n_steps, dof).
+    out=(t_out, u_out) may be passed to reuse buffers across runs. Breakpoints and stats as in
+    euler_explicit; a vectorized RHS call counts as one evaluation per run.
+    """
+    stats, fcn = _start_stats(stats, fcn, stacked=True)
+    step = _step_with_callback(_euler_step, stats)
+    z0 = np.atleast_2d(np.asarray(z0, dtype=float))
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=1,
+                                            breakpoints=breakpoints)
+    u_out[:, 0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+
+    # Step in contiguous working arrays and copy each result into the strided output slot
+    z, z_new = z0.copy(), np.empty_like(z0)
+    for n in range(n_steps):
+        step(f_steps.get(n, fcn), t_out[n], z, t_out[n + 1] - t_out[n], z_new)
+        u_out[:, n + 1] = z_new
+        z, z_new = z_new, z
+
+    return _finish_stats((t_out, u_out), stats)
+
+
+def RK4_ensemble(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                 breakpoints=None, stats=False):
+    """
+    Advances many initial states in lockstep with the classic Runge-Kutta method.
+    Shapes, output handling, breakpoints and stats as in euler_explicit_ensemble.
+    """
+    stats, fcn = _start_stats(stats, fcn, stacked=True)
+    z0 = np.atleast_2d(np.asarray(z0, dtype=float))
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=1,
+                                            breakpoints=breakpoints)
+    u_out[:, 0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+
+    z, z_new = z0.copy(), np.empty_like(z0)
+    z_stage = np.empty_like(z0)
+
+    def step(fcn, t, z, h, z_new):
+        _rk4_step(fcn, t, z, h, z_new, z_stage)
+
+    step = _step_with_callback(step, stats)
+    for n in range(n_steps):
+        step(f_steps.get(n, fcn), t_out[n], z, t_out[n + 1] - t_out[n], z_new)
+        u_out[:, n + 1] = z_new
+        z, z_new = z_new, z
+
+    return _finish_stats((t_out, u_out), stats)
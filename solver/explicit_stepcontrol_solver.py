@@ -1,5 +1,316 @@
-import numpy as np
-
-def stepcontrol_mid_point_rule(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1):
-
-    return # np.array(t_container), np.array(u_container), np.array(h_container), np.array(error_container)
+import numpy as np
+from solver.dense_output import HermiteDenseOutput
+from solver.events import interior_breakpoints, next_stop, one_sided, EventDetector, _steps_with_events
+from solver.stats import _start_stats, _finish_stats, _steps_with_callback
+
+def error_norm(err: np.ndarray, z: np.ndarray, z_new: np.ndarray, rtol: float, atol: float) -> float:
+    """
+    Normalized RMS error score: <= 1 means the step meets the tolerance. A step that
+    overflowed gives NaN, so steps are accepted by testing err <= 1.0, never err > 1.0.
+    """
+    scale = atol + rtol * np.maximum(np.abs(z), np.abs(z_new))
+    return float(np.sqrt(np.mean((err / scale) ** 2)))
+
+
+def _check_step_width(h: float, t: float, t_end: float) -> None:
+    """
+    Raises once rejected steps have shrunk h to the round-off of t, where the solution
+    cannot make progress any more (a NaN error estimate, a singularity of the ODE).
+    """
+    if h < 10 * np.finfo(float).eps * max(abs(t), abs(t_end)):
+        raise RuntimeError(f"Step width {h:g} at t = {t} fell below the round-off of t.")
+
+
+def _plan_step(fcn, t: float, h: float, t_end: float, breakpoints: np.ndarray, at_breakpoint: bool):
+    """
+    Clips the proposed step width h so the step ends on the next breakpoint or t_end.
+    Returns (h_step, t_new, lands, hits_breakpoint, f_step); f_step is evaluated one-sided
+    if the step starts or ends on a breakpoint.
+    """
+    stop = next_stop(t, t_end, breakpoints)
+    lands = h >= stop - t
+    h_step = stop - t if lands else h
+    # Landing steps use the stop itself, so no round-off accumulates on t
+    t_new = stop if lands else t + h_step
+    hits_breakpoint = lands and stop < t_end
+    f_step = one_sided(fcn, t, t_new) if (at_breakpoint or hits_breakpoint) else fcn
+    return h_step, t_new, lands, hits_breakpoint, f_step
+
+
+def _restart_derivative(fcn, t: float, z: np.ndarray, dz: np.ndarray, at_breakpoint: bool) -> np.ndarray:
+    """
+    Derivative the step after an accepted point (t, z) starts from: dz, the derivative at
+    the end of the accepted step, except on a breakpoint, where it is the right limit.
+    """
+    return fcn(np.nextafter(t, np.inf), z) if at_breakpoint else dz
+
+
+def _mid_point_step(fcn, t: float, z: np.ndarray, h: float, k1: np.ndarray):
+    """
+    One explicit midpoint step, embedded with explicit Euler for the error estimate.
+    Returns the midpoint solution and the difference to the Euler solution.
+    """
+    k2 = fcn(t + h / 2, z + h / 2 * k1)
+    z_new = z + h * k2
+    z_euler = z + h * k1
+    return z_new, z_new - z_euler
+
+
+def _mid_point_steps(fcn, t_interval: list, z0: np.ndarray, h_init: float,
+                     rtol: float, atol: float, increase_factor: float, decrease_factor: float,
+                     breakpoints=None, stats=None):
+    """
+    Generator over the accepted steps of the step-controlled midpoint rule.
+    Yields (t, z, h, error, dz, dz_next) for the initial state and every accepted step,
+    where dz = fcn(t, z) is the derivative at the end of the step and dz_next the one
+    reused as the first stage of the following step. Both are the same array except on
+    a breakpoint, where dz is the left and dz_next the right limit (see solver.events).
+
+    Step control uses a target zone for the normalized error score:
+    above 1 the step is rejected and h is decreased, below 0.5 the step is
+    accepted and h is increased, in between h is kept.
+    """
+    t = t_interval[0]
+    t_end = t_interval[-1]
+    z = np.asarray(z0, dtype=float)
+    h = h_init
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    at_breakpoint = False
+    k1 = fcn(t, z)
+    yield t, z, h, 0.0, k1, k1
+
+    while t < t_end - 1e-12 * max(1.0, abs(t_end)):
+        # Never step past t_end or the next breakpoint
+        h_step, t_new, lands, hits_breakpoint, f_step = _plan_step(fcn, t, h, t_end, breakpoints, at_breakpoint)
+        z_new, err_vec = _mid_point_step(f_step, t, z, h_step, k1)
+        err = error_norm(err_vec, z, z_new, rtol, atol)
+
+        if not err <= 1.0:
+            h = h_step * decrease_factor
+            _check_step_width(h, t, t_end)
+            if stats is not None:
+                stats.n_rejected += 1
+            continue
+
+        t = t_new
+        z = z_new
+        at_breakpoint = hits_breakpoint
+        # The first stage of the next step is the derivative at the accepted point,
+        # the end of this step sees the left limit on a breakpoint
+        dz = f_step(t, z)
+        k1 = _restart_derivative(fcn, t, z, dz, at_breakpoint)
+        yield t, z, h_step, err, dz, k1
+
+        # A step shortened to land on a stop keeps the proposed width for the next one
+        if err < 0.5 and not lands:
+            h = h_step * increase_factor
+
+
+def _collect_steps(steps, dense_output: bool):
+    """
+    Gathers the (t, z, h, error, dz, dz_next) tuples of a step generator into the solver
+    return arrays. The dense output gets a breakpoint twice, with the left limit of the
+    derivative for the step ending there and the right limit for the step starting there.
+    """
+    t_container, u_container, h_container, error_container = [], [], [], []
+    t_dense, u_dense, du_dense = [], [], []
+    for t, z, h, err, dz, dz_next in steps:
+        t_container.append(t)
+        u_container.append(z)
+        h_container.append(h)
+        error_container.append(err)
+        if dense_output:
+            t_dense.append(t)
+            u_dense.append(z)
+            du_dense.append(dz)
+            if dz_next is not dz and not np.array_equal(dz_next, dz):
+                t_dense.append(t)
+                u_dense.append(z)
+                du_dense.append(dz_next)
+
+    t_arr, u_arr = np.array(t_container), np.array(u_container)
+    if dense_output:
+        return (t_arr, u_arr, np.array(h_container), np.array(error_container),
+                HermiteDenseOutput(np.array(t_dense), np.array(u_dense), np.array(du_dense)))
+    return t_arr, u_arr, np.array(h_container), np.array(error_container)
+
+
+def _solve_adaptive(fcn, steps, t_interval: list, z0: np.ndarray, dense_output: bool, events, stats=None):
+    """
+    Runs a step generator, with event detection if events are given, and collects the results.
+    stats, if given, receives the step callbacks and is appended to the results.
+    """
+    steps = _steps_with_callback(steps, stats)
+    if events is None:
+        return _finish_stats(_collect_steps(steps, dense_output), stats)
+    detector = EventDetector(events, t_interval[0], np.asarray(z0, dtype=float))
+    result = _collect_steps(_steps_with_events(fcn, steps, detector), dense_output) + detector.results()
+    return _finish_stats(result, stats)
+
+
+def stepcontrol_mid_point_rule(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                               rtol: float = 1e-3, atol: float = 1e-6,
+                               increase_factor: float = 1.4, decrease_factor: float = 0.5,
+                               dense_output: bool = False, breakpoints=None, events=None, stats=False):
+    """
+    Explicit midpoint rule with adaptive step width.
+
+    Returns the accepted time points, states, the step width that led to each
+    point and the normalized error score of that step.
+    With dense_output=True a HermiteDenseOutput is appended to the returned tuple,
+    which evaluates the solution at arbitrary times without re-integrating.
+
+    Steps end exactly on breakpoints (default: fcn.breakpoints). With events, the event
+    times and states (lists with one array per event function) are appended to the
+    returned tuple, and a terminal event ends the integration early; see solver.events.
+
+    With stats=True (or a SolverStats) a SolverStats with RHS calls, accepted and
+    rejected steps and timings is appended last, see solver.stats.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    steps = _mid_point_steps(fcn, t_interval, z0, h_init, rtol, atol, increase_factor, decrease_factor,
+                             breakpoints, stats)
+    return _solve_adaptive(fcn, steps, t_interval, z0, dense_output, events, stats)
+
+
+class EmbeddedRKTableau:
+    """
+    Butcher tableau of an embedded Runge-Kutta pair with the FSAL property
+    (the last stage is evaluated at the new solution and reused as the first
+    stage of the next step).
+    """
+    c: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+    e: np.ndarray       # b - b_hat, weights of the local error estimate
+    error_order: int    # Order of the lower order solution, used by the step controller
+
+    def __init__(self, c, a, b, b_hat, error_order: int) -> None:
+        self.c = np.array(c, dtype=float)
+        self.a = np.array(a, dtype=float)
+        self.b = np.array(b, dtype=float)
+        self.e = self.b - np.array(b_hat, dtype=float)
+        self.error_order = error_order
+
+    @property
+    def n_stages(self) -> int:
+        return len(self.c)
+
+
+DORMAND_PRINCE_54 = EmbeddedRKTableau(
+    c=[0, 1/5, 3/10, 4/5, 8/9, 1, 1],
+    a=[[0, 0, 0, 0, 0, 0, 0],
+       [1/5, 0, 0, 0, 0, 0, 0],
+       [3/40, 9/40, 0, 0, 0, 0, 0],
+       [44/45, -56/15, 32/9, 0, 0, 0, 0],
+       [19372/6561, -25360/2187, 64448/6561, -212/729, 0, 0, 0],
+       [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656, 0, 0],
+       [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0]],
+    b=[35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0],
+    b_hat=[5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40],
+    error_order=4,
+)
+
+BOGACKI_SHAMPINE_32 = EmbeddedRKTableau(
+    c=[0, 1/2, 3/4, 1],
+    a=[[0, 0, 0, 0],
+       [1/2, 0, 0, 0],
+       [0, 3/4, 0, 0],
+       [2/9, 1/3, 4/9, 0]],
+    b=[2/9, 1/3, 4/9, 0],
+    b_hat=[7/24, 1/4, 1/3, 1/8],
+    error_order=2,
+)
+
+
+def _embedded_rk_steps(fcn, t_interval: list, z0: np.ndarray, h_init: float,
+                       rtol: float, atol: float, tableau: EmbeddedRKTableau, breakpoints=None,
+                       safety: float = 0.9, min_factor: float = 0.2, max_factor: float = 10.0, stats=None):
+    """
+    Generator over the accepted steps of an embedded Runge-Kutta pair.
+    Yields (t, z, h, error, dz, dz_next) like _mid_point_steps.
+
+    The step width is chosen by a PI controller,
+    h_new = h * safety * err^(-0.7/k) * err_prev^(0.4/k) with k = error_order + 1,
+    which damps the oscillations of the classic controller. After a rejected
+    step the width is not allowed to grow.
+    """
+    t = t_interval[0]
+    t_end = t_interval[-1]
+    z = np.asarray(z0, dtype=float)
+    h = h_init
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    at_breakpoint = False
+
+    k = tableau.error_order + 1
+    alpha, beta = 0.7 / k, 0.4 / k
+    err_prev = 1e-4
+
+    K = np.empty((tableau.n_stages,) + z.shape)
+    K[0] = fcn(t, z)
+    dz = K[0].copy()
+    yield t, z, h, 0.0, dz, dz
+
+    rejected = False
+    while t < t_end - 1e-12 * max(1.0, abs(t_end)):
+        h_step, t_new, lands, hits_breakpoint, f_step = _plan_step(fcn, t, h, t_end, breakpoints, at_breakpoint)
+
+        for i in range(1, tableau.n_stages - 1):
+            K[i] = f_step(t + tableau.c[i] * h_step, z + h_step * np.tensordot(tableau.a[i, :i], K[:i], axes=1))
+        z_new = z + h_step * np.tensordot(tableau.b, K, axes=1)
+        # FSAL: the last stage is the derivative at the new point
+        k_last = f_step(t_new, z_new)
+        K[-1] = k_last
+        err = error_norm(h_step * np.tensordot(tableau.e, K, axes=1), z, z_new, rtol, atol)
+
+        if not err <= 1.0:
+            factor = max(min_factor, safety * err ** (-1 / k))
+            h = h_step * factor
+            _check_step_width(h, t, t_end)
+            rejected = True
+            if stats is not None:
+                stats.n_rejected += 1
+            continue
+
+        t = t_new
+        z = z_new
+        at_breakpoint = hits_breakpoint
+        # The FSAL stage is the left limit on a breakpoint, the next step needs the right one
+        k_next = _restart_derivative(fcn, t, z, k_last, at_breakpoint)
+        K[0] = k_next
+        yield t, z, h_step, err, k_last, k_next
+
+        if err == 0.0:
+            factor = max_factor
+        else:
+            factor = min(max_factor, max(min_factor, safety * err ** (-alpha) * err_prev ** beta))
+        if rejected:
+            factor = min(factor, 1.0)
+        if not lands or factor < 1.0:
+            h = h_step * factor
+        err_prev = max(err, 1e-4)
+        rejected = False
+
+
+def stepcontrol_dormand_prince(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                               rtol: float = 1e-3, atol: float = 1e-6, dense_output: bool = False,
+                               breakpoints=None, events=None, stats=False):
+    """
+    Dormand-Prince 5(4) pair with FSAL and PI step control.
+    Same arguments and return values as stepcontrol_mid_point_rule.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    steps = _embedded_rk_steps(fcn, t_interval, z0, h_init, rtol, atol, DORMAND_PRINCE_54, breakpoints, stats=stats)
+    return _solve_adaptive(fcn, steps, t_interval, z0, dense_output, events, stats)
+
+
+def stepcontrol_bogacki_shampine(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                                 rtol: float = 1e-3, atol: float = 1e-6, dense_output: bool = False,
+                                 breakpoints=None, events=None, stats=False):
+    """
+    Bogacki-Shampine 3(2) pair with FSAL and PI step control.
+    Same arguments and return values as stepcontrol_mid_point_rule.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    steps = _embedded_rk_steps(fcn, t_interval, z0, h_init, rtol, atol, BOGACKI_SHAMPINE_32, breakpoints, stats=stats)
+    return _solve_adaptive(fcn, steps, t_interval, z0, dense_output, events, stats)
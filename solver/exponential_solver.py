@@ -0,0 +1,115 @@
+"""
+Exact exponential integrator for linear ODEs dz/dt = A @ z + B * u(t) with an input
+that is constant over each step, such as the DP-EC battery model with its
+piecewise constant current profile.
+
+Per step width h the propagators Phi = expm(A*h) and Gamma = int_0^h expm(A*s) ds @ B
+are computed once, then every step is a single matrix multiply:
+z_n+1 = Phi @ z_n + Gamma * u_n. This is exact whenever the input does not change
+within a step and unconditionally stable, regardless of the stiffness of A.
+"""
+
+import numpy as np
+from scipy.linalg import expm
+from solver.explicit_solver import _prepare_output
+from solver.events import interior_breakpoints
+from solver.stats import _start_stats, _finish_stats, _TimedPhase
+
+
+def exponential_propagators(A: np.ndarray, B: np.ndarray, h: float):
+    """
+    Returns (Phi, Gamma) for step width h, both from one matrix exponential of the
+    augmented matrix [[A, B], [0, 0]] * h.
+    """
+    n = len(A)
+    B = np.asarray(B, dtype=float).reshape(n, -1)
+    M = np.zeros((n + B.shape[1], n + B.shape[1]))
+    M[:n, :n] = A
+    M[:n, n:] = B
+    E = expm(M * h)
+    return E[:n, :n], E[:n, n:]
+
+
+def _transposed_propagators(A: np.ndarray, B: np.ndarray, h: float, per_run: bool):
+    """
+    Phi.T and Gamma.T, transposed once so a batch of row states is advanced with z @ Phi.T.
+    With per_run, A and B are stacked per run and so are the results.
+    """
+    if not per_run:
+        Phi, Gamma = exponential_propagators(A, B, h)
+        return Phi.T.copy(), Gamma.T.copy()
+    pairs = [exponential_propagators(A_r, B_r, h) for A_r, B_r in zip(A, B)]
+    return (np.stack([Phi.T for Phi, _ in pairs]), np.stack([Gamma.T for _, Gamma in pairs]))
+
+
+def exponential_integrator(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                           breakpoints=None, stats=False):
+    """
+    Exact integrator for linear ODEs that expose fcn.state_space() -> (A, B, input_fcn),
+    e.g. dp_ec_battery. input_fcn is evaluated once on the array of all step midpoints.
+
+    The input is sampled at the middle of each step. Input switches declared as
+    breakpoints (default: fcn.breakpoints) are added to the time grid, so no step
+    straddles a switch and the result is exact for any h.
+    z0 may be a single state (dof,) or a batch (n_runs, dof); the result has shape
+    (N, dof) or (n_runs, N, dof), like RK4 and RK4_ensemble. For a batch, A and B may
+    also be stacked per run, shapes (n_runs, dof, dof) and (n_runs, dof), e.g. from a
+    BatteryModel with one parameter set per run.
+
+    With stats, the matrix exponentials count as LU decompositions (the linear algebra
+    phase), fcn itself is never called. Stats as in euler_explicit otherwise.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    callback = stats.step_callback if stats is not None else None
+    state_space = getattr(fcn, 'state_space', None)
+    if state_space is None:
+        raise ValueError("The exponential integrator needs a linear ODE with a state_space() attribute.")
+    A, B, input_fcn = state_space()
+
+    z0 = np.asarray(z0, dtype=float)
+    batched = z0.ndim == 2
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=1 if batched else 0,
+                                            breakpoints=breakpoints)
+
+    # Inputs at the step midpoints
+    t_mid = (t_out[:-1] + t_out[1:]) / 2
+    inputs = np.asarray(input_fcn(t_mid), dtype=float).reshape(n_steps, -1)
+
+    if batched:
+        u_out[:, 0] = z0
+    else:
+        u_out[0] = z0
+
+    per_run = np.ndim(A) == 3
+    if per_run and not batched:
+        raise ValueError("Per-run state space matrices need a batch of initial states.")
+
+    # Only the steps around breakpoints and the last step differ from h, so few propagator
+    # pairs are needed. Nominal steps use h itself, grid differences would vary by round-off.
+    propagators = {}
+    z = np.atleast_2d(z0).copy()
+    for n in range(n_steps):
+        h_step = t_out[n + 1] - t_out[n]
+        if abs(h_step - h) <= 1e-9 * h:
+            h_step = h
+        if h_step not in propagators:
+            if stats is not None:
+                with _TimedPhase(stats, 'lu'):
+                    propagators[h_step] = _transposed_propagators(A, B, h_step, per_run)
+            else:
+                propagators[h_step] = _transposed_propagators(A, B, h_step, per_run)
+        Phi_T, Gamma_T = propagators[h_step]
+
+        if per_run:
+            z = (z[:, None, :] @ Phi_T)[:, 0] + inputs[n] @ Gamma_T
+        else:
+            z = z @ Phi_T + inputs[n] @ Gamma_T
+        if batched:
+            u_out[:, n + 1] = z
+        else:
+            u_out[n + 1] = z[0]
+        if callback is not None:
+            callback(t_out[n + 1], z if batched else z[0], h_step, None)
+
+    return _finish_stats((t_out, u_out), stats)
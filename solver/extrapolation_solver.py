@@ -0,0 +1,260 @@
+"""
+Gragg-Bulirsch-Stoer extrapolation for smooth problems at tight tolerances.
+
+Every step of width H runs Gragg's modified midpoint rule (the explicit midpoint
+rule of stepcontrol_mid_point_rule, started with one Euler step) with n_j = 2, 4, 6, ...
+substeps. Its result has an error expansion in even powers of H/n_j, so the
+Aitken-Neville tableau
+
+    T[j][i] = T[j][i-1] + (T[j][i-1] - T[j-1][i-1]) / ((n_j / n_(j-i))^2 - 1)
+
+raises the order by two per column: T[j][j] is of order 2(j+1). The difference of the
+last two columns estimates the error. Both the step width and the number of rows
+(the order) are adapted by the work per unit step, as in ODEX (Hairer, Norsett,
+Wanner, Solving ODEs I, II.9).
+
+With dense output the rows use n_j = 2, 6, 10, ... (4j+2) substeps instead: then the
+midpoint of every row is a substep point, where the central differences of the
+stored derivatives give y', y'', ... at t + H/2. These are extrapolated like the
+solution and, together with the states and derivatives at both ends of the step, give
+one polynomial per step of about the order of the step itself (ODEX's dense output).
+Steps whose polynomial is not accurate enough in the interior are rejected.
+"""
+
+from math import comb, factorial
+import numpy as np
+from solver.dense_output import PolynomialDenseOutput
+from solver.events import interior_breakpoints
+from solver.explicit_stepcontrol_solver import (error_norm, _check_step_width, _plan_step, _restart_derivative,
+                                                _solve_adaptive)
+from solver.stats import _start_stats
+
+# Interior points at which the interpolation error of a step is checked, x = s - 1/2 for s in (0, 1)
+_CHECK_POINTS = np.linspace(-0.5, 0.5, 9)[1:-1]
+
+
+def _modified_midpoint(fcn, t: float, z: np.ndarray, H: float, n: int, f0: np.ndarray) -> np.ndarray:
+    """Gragg's modified midpoint rule: n substeps of width H/n from (t, z) with f0 = fcn(t, z)."""
+    h = H / n
+    z_prev = z
+    z_cur = z + h * f0
+    for m in range(1, n):
+        z_prev, z_cur = z_cur, z_prev + 2 * h * fcn(t + m * h, z_cur)
+    return z_cur
+
+
+def _modified_midpoint_dense(fcn, t: float, z: np.ndarray, H: float, n: int, f0: np.ndarray):
+    """
+    _modified_midpoint that also returns the state at the midpoint t + H/2 (n/2 odd)
+    and the derivatives at the substeps 0..n-1 (rows of an array).
+    """
+    h = H / n
+    f_values = np.empty((n,) + np.shape(z))
+    f_values[0] = f0
+    z_prev = z
+    z_cur = z + h * f0
+    z_mid = z_cur
+    for m in range(1, n):
+        f_values[m] = fcn(t + m * h, z_cur)
+        z_prev, z_cur = z_cur, z_prev + 2 * h * f_values[m]
+        if m + 1 == n // 2:
+            z_mid = z_cur
+    return z_cur, z_mid, f_values
+
+
+def _extrapolate(values: list, n: np.ndarray) -> np.ndarray:
+    """Aitken-Neville extrapolation of approximations with an even error expansion in 1/n to n -> infinity."""
+    table = list(values)
+    for i in range(1, len(table)):
+        for j in range(len(table) - 1, i - 1, -1):
+            table[j] = table[j] + (table[j] - table[j - 1]) / ((n[j] / n[j - i]) ** 2 - 1)
+    return table[-1]
+
+
+def _midpoint_taylor(midpoints: list, n: np.ndarray, H: float, degree: int) -> list:
+    """
+    Scaled Taylor coefficients H^m y^(m)(t + H/2) / m!, m = 0..degree, at the step midpoint
+    from the rows (z_mid, f_values) of _modified_midpoint_dense. y^(k+1) is the k-th central
+    difference of the derivatives around the midpoint, available in the rows j >= k/2.
+    """
+    taylor = [_extrapolate([z_mid for z_mid, _ in midpoints], n)]
+    for m in range(1, degree + 1):
+        k = m - 1
+        first = (k + 1) // 2
+        values = []
+        for j in range(first, len(midpoints)):
+            f_values = midpoints[j][1]
+            mid = n[j] // 2
+            difference = sum((-1) ** i * comb(k, i) * f_values[mid + k - 2 * i] for i in range(k + 1))
+            values.append(difference * (n[j] / (2 * H)) ** k)
+        taylor.append(H ** m / factorial(m) * _extrapolate(values, n[first:len(midpoints)]))
+    return taylor
+
+
+def _step_polynomial(taylor: list, z: np.ndarray, z_new: np.ndarray, dz: np.ndarray, dz_new: np.ndarray,
+                     H: float) -> np.ndarray:
+    """
+    Coefficients of the polynomial sum_i c_i x^i, x = (t - t_start) / H - 1/2, with the
+    given Taylor coefficients at the midpoint and four more degrees matching the states
+    and derivatives at both ends of the step.
+    """
+    powers = np.arange(len(taylor), len(taylor) + 4)
+    low = np.arange(len(taylor))
+    c_low = np.array(taylor)
+    rows = []
+    rhs = []
+    for x, state, derivative in ((-0.5, z, dz), (0.5, z_new, dz_new)):
+        rows.append(x ** powers)
+        rhs.append(state - (x ** low) @ c_low)
+        rows.append(powers * x ** (powers - 1))
+        rhs.append(H * derivative - (low[1:] * x ** (low[1:] - 1)) @ c_low[1:])
+    return np.concatenate([c_low, np.linalg.solve(np.array(rows), np.array(rhs))])
+
+
+def _evaluate_polynomial(coefficients: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Horner evaluation of coefficients (degree+1, dof) at the points x; returns (len(x), dof)."""
+    z = np.broadcast_to(coefficients[-1], (len(x),) + coefficients.shape[1:])
+    for c in coefficients[-2::-1]:
+        z = z * x[:, None] + c
+    return z
+
+
+def _extrapolation_steps(fcn, t_interval: list, z0: np.ndarray, h_init: float, rtol: float, atol: float,
+                         k_max: int, breakpoints=None, stats=None, polynomials=None, safety: float = 0.94,
+                         min_factor: float = 0.02, max_factor: float = 4.0):
+    """
+    Generator over the accepted steps of the extrapolation method.
+    Yields (t, z, h, error, dz, dz_next) like _mid_point_steps.
+
+    Row j (0-based) of the tableau uses n_j = 2(j+1) substeps. A step targeting row k
+    checks for convergence at the rows k-1, k and k+1 and is rejected if none
+    converges. After every step the next k and H minimize the RHS calls per unit step.
+
+    If polynomials is a list, the rows use n_j = 4j+2 substeps and the width and the
+    dense output coefficients of every accepted step are appended to it before the step
+    is yielded (an event may cut the yielded step short, the polynomial stays valid).
+    """
+    t = t_interval[0]
+    t_end = t_interval[-1]
+    z = np.asarray(z0, dtype=float)
+    H = h_init
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    at_breakpoint = False
+
+    dense = polynomials is not None
+    n = 4 * np.arange(k_max) + 2 if dense else 2 * np.arange(1, k_max + 1)
+    # RHS calls for the rows 0..j: n_i - 1 per row plus the derivative at the step start
+    work = np.cumsum(n - 1) + 1.0
+    # Initial target row from the tolerance, as in ODEX
+    k = int(max(1, min(k_max - 2, -np.log10(rtol + 1e-40) * 0.6 + 0.5)))
+
+    f0 = fcn(t, z)
+    yield t, z, H, 0.0, f0, f0
+
+    rejected = False
+    while t < t_end - 1e-12 * max(1.0, abs(t_end)):
+        h_step, t_new, lands, hits_breakpoint, f_step = _plan_step(fcn, t, H, t_end, breakpoints, at_breakpoint)
+
+        table = []
+        midpoints = []
+        h_opt = np.zeros(k_max)
+        accepted_row = None
+        for j in range(min(k + 1, k_max - 1) + 1):
+            if dense:
+                z_end, z_mid, f_values = _modified_midpoint_dense(f_step, t, z, h_step, n[j], f0)
+                midpoints.append((z_mid, f_values))
+                row = [z_end]
+            else:
+                row = [_modified_midpoint(f_step, t, z, h_step, n[j], f0)]
+            for i in range(1, j + 1):
+                row.append(row[i - 1] + (row[i - 1] - table[j - 1][i - 1]) / ((n[j] / n[j - i]) ** 2 - 1))
+            table.append(row)
+            if j == 0:
+                continue
+
+            err = error_norm(row[j] - row[j - 1], z, row[j], rtol, atol)
+            # The error estimate belongs to the order 2j solution, i.e. a local error ~ H^(2j+1)
+            factor = safety * (0.65 / max(err, 1e-16)) ** (1 / (2 * j + 1))
+            h_opt[j] = h_step * min(max_factor, max(min_factor, factor))
+            if j >= k - 1 and err <= 1.0:
+                accepted_row = j
+                break
+
+        rows = np.arange(1, len(table))
+        cost = work[rows] / h_opt[rows]
+        if accepted_row is None:
+            # Retry with the most economical row seen so far
+            k = int(rows[np.argmin(cost)])
+            H = min(h_opt[k], 0.5 * h_step)
+            _check_step_width(H, t, t_end)
+            rejected = True
+            if stats is not None:
+                stats.n_rejected += 1
+            continue
+
+        j = accepted_row
+        z_new = table[j][j]
+        dz = f_step(t_new, z_new)
+        if dense:
+            # Degree 2j from the midpoint, checked against the polynomial with one degree less
+            taylor = _midpoint_taylor(midpoints[:j + 1], n, h_step, 2 * j)
+            coefficients = _step_polynomial(taylor, z, z_new, f0, dz, h_step)
+            lower = _step_polynomial(taylor[:-1], z, z_new, f0, dz, h_step)
+            difference = _evaluate_polynomial(coefficients, _CHECK_POINTS)
+            difference[:, :] -= _evaluate_polynomial(lower, _CHECK_POINTS)
+            err_dense = error_norm(np.max(np.abs(difference), axis=0), z, z_new, rtol, atol)
+            if not err_dense <= 1.0:
+                H = h_step * max(0.2, safety * err_dense ** (-1 / (2 * j + 4)))
+                _check_step_width(H, t, t_end)
+                rejected = True
+                if stats is not None:
+                    stats.n_rejected += 1
+                continue
+            polynomials.append((h_step, coefficients))
+
+        t = t_new
+        z = z_new
+        at_breakpoint = hits_breakpoint
+        f0 = _restart_derivative(fcn, t, z, dz, at_breakpoint)
+        yield t, z, h_step, err, dz, f0
+
+        # Order control: one row less if that is clearly cheaper, one more if it promises to be
+        k_new = j
+        if j >= 2 and cost[j - 2] < 0.8 * cost[j - 1]:
+            k_new = j - 1
+        elif j + 1 <= k_max - 2 and not rejected and (j == 1 or cost[j - 1] < 0.9 * cost[j - 2]):
+            k_new = j + 1
+        h_new = h_opt[k_new] if k_new <= j else h_opt[j] * work[k_new] / work[j]
+        if rejected:
+            h_new = min(h_new, h_step)
+        k = k_new
+        # A step shortened to land on a stop keeps the proposed width unless the error asks for less
+        H = h_new if (not lands or h_new < h_step) else max(H, h_new)
+        rejected = False
+
+
+def stepcontrol_extrapolation(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                              rtol: float = 1e-9, atol: float = 1e-12, k_max: int = 8,
+                              dense_output: bool = False, breakpoints=None, events=None, stats=False):
+    """
+    Gragg-Bulirsch-Stoer extrapolation with adaptive step width and order, for
+    reference quality solutions of smooth problems. k_max is the maximum number of
+    tableau rows, i.e. orders up to 2*k_max.
+
+    Arguments and return values are those of stepcontrol_mid_point_rule, except that the
+    dense output is a PolynomialDenseOutput of about the order of the steps, so sampling
+    it keeps the accuracy of the long steps. It switches to the dense step sequence,
+    hence the steps differ from a run without dense output.
+    """
+    if k_max < 3:
+        raise ValueError("k_max must be at least 3.")
+
+    stats, fcn = _start_stats(stats, fcn)
+    polynomials = [] if dense_output else None
+    steps = _extrapolation_steps(fcn, t_interval, z0, h_init, rtol, atol, k_max, breakpoints, stats, polynomials)
+    result = _solve_adaptive(fcn, steps, t_interval, z0, False, events, stats)
+    if not dense_output:
+        return result
+    step_width = [h for h, _ in polynomials]
+    coefficients = [c for _, c in polynomials]
+    return result[:4] + (PolynomialDenseOutput(result[0], step_width, coefficients),) + result[4:]
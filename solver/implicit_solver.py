@@ -0,0 +1,282 @@
+"""
+Implicit solvers for stiff systems such as the DP-EC battery model.
+
+The fixed-step methods (implicit Euler, trapezoidal rule, BDF2) all lead to a
+nonlinear system of the form z_new - gamma_h * fcn(t_new, z_new) = rhs per step,
+which is solved by a simplified Newton iteration. The LU decomposition of
+I - gamma_h * J is cached and only recomputed when gamma_h changes noticeably or
+when the Newton iteration stops converging with the current Jacobian.
+
+Jacobians come from a JacobianProvider (see solver.jacobian): analytic if the ODE
+provides one, otherwise finite differences; constant Jacobians are computed once.
+"""
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from solver.explicit_solver import _prepare_output, _step_functions
+from solver.explicit_stepcontrol_solver import (error_norm, _check_step_width, _plan_step, _restart_derivative,
+                                                _solve_adaptive)
+from solver.events import interior_breakpoints
+from solver.jacobian import JacobianProvider
+from solver.stats import _start_stats, _finish_stats, _TimedPhase
+
+
+class NewtonIteration:
+    """
+    Simplified Newton iteration for z - gamma_h * fcn(t, z) = rhs with a cached LU decomposition.
+    Jacobian evaluations and LU decompositions are counted and timed in stats if given.
+    """
+    fcn: callable
+    jac: callable
+    tol: float
+    max_iter: int
+    refactor_ratio: float
+    n_jacobian_evaluations: int = 0
+    n_lu_decompositions: int = 0
+
+    def __init__(self, fcn, jac=None, tol: float = 1e-10, max_iter: int = 8,
+                 refactor_ratio: float = 0.2, stats=None) -> None:
+        self.fcn = fcn
+        self.jac = jac if isinstance(jac, JacobianProvider) else JacobianProvider(fcn, jac, stats=stats)
+        self.stats = stats
+        self.tol = tol
+        self.max_iter = max_iter
+        self.refactor_ratio = refactor_ratio
+
+        self._J = None
+        self._lu = None
+        self._gamma_h_lu = None
+
+    def _update_jacobian(self, t: float, z: np.ndarray) -> None:
+        J = self.jac(t, z)
+        if J is not self._J:
+            self._J = J
+            self.n_jacobian_evaluations += 1
+            self._lu = None
+
+    def _update_lu(self, gamma_h: float) -> None:
+        # Reuse the decomposition while gamma_h stays close to the value it was built for
+        if (self._lu is not None and
+                abs(gamma_h - self._gamma_h_lu) <= self.refactor_ratio * abs(self._gamma_h_lu)):
+            return
+        if self.stats is not None:
+            with _TimedPhase(self.stats, 'lu'):
+                self._lu = lu_factor(np.eye(len(self._J)) - gamma_h * self._J)
+        else:
+            self._lu = lu_factor(np.eye(len(self._J)) - gamma_h * self._J)
+        self._gamma_h_lu = gamma_h
+        self.n_lu_decompositions += 1
+
+    def _iterate(self, fcn, t: float, z: np.ndarray, rhs: np.ndarray, gamma_h: float):
+        for _ in range(self.max_iter):
+            residual = z - gamma_h * fcn(t, z) - rhs
+            dz = lu_solve(self._lu, -residual)
+            z = z + dz
+            if np.max(np.abs(dz)) <= self.tol * (1.0 + np.max(np.abs(z))):
+                return z, True
+        return z, False
+
+    def solve(self, t: float, z_guess: np.ndarray, rhs: np.ndarray, gamma_h: float, fcn=None) -> np.ndarray:
+        """fcn replaces self.fcn in the residual, e.g. a one-sided wrapper for a step ending on a breakpoint."""
+        fcn = self.fcn if fcn is None else fcn
+        if self._J is None:
+            self._update_jacobian(t, z_guess)
+        self._update_lu(gamma_h)
+
+        z, converged = self._iterate(fcn, t, z_guess, rhs, gamma_h)
+        if not converged:
+            # The cached Jacobian or decomposition is stale: refresh both and retry once
+            self._update_jacobian(t, z_guess)
+            self._lu = None
+            self._update_lu(gamma_h)
+            z, converged = self._iterate(fcn, t, z_guess, rhs, gamma_h)
+            if not converged:
+                raise RuntimeError(f"Newton iteration did not converge at t = {t}.")
+        return z
+
+
+def euler_implicit(fcn, t_interval: list, z0: np.ndarray, h: float, jac=None, out: tuple = None,
+                   breakpoints=None, stats=False):
+    """
+    Implicit (backward) Euler method with fixed step width h.
+    jac(t, z) optionally provides the Jacobian, otherwise fcn.jacobian or finite differences are used.
+    Output handling, breakpoints and stats as in euler_explicit.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    callback = stats.step_callback if stats is not None else None
+    z0 = np.asarray(z0, dtype=float)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=0, breakpoints=breakpoints)
+    u_out[0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+
+    newton = NewtonIteration(fcn, jac, stats=stats)
+    for n in range(n_steps):
+        h_step = t_out[n + 1] - t_out[n]
+        u_out[n + 1] = newton.solve(t_out[n + 1], u_out[n], u_out[n], h_step, f_steps.get(n))
+        if callback is not None:
+            callback(t_out[n + 1], u_out[n + 1], h_step, None)
+
+    return _finish_stats((t_out, u_out), stats)
+
+
+def trapezoidal_rule(fcn, t_interval: list, z0: np.ndarray, h: float, jac=None, out: tuple = None,
+                     breakpoints=None, stats=False):
+    """
+    Implicit trapezoidal rule (Crank-Nicolson) with fixed step width h.
+    Arguments as in euler_implicit.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    callback = stats.step_callback if stats is not None else None
+    z0 = np.asarray(z0, dtype=float)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=0, breakpoints=breakpoints)
+    u_out[0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+
+    newton = NewtonIteration(fcn, jac, stats=stats)
+    f_now = f_steps.get(0, fcn)(t_out[0], z0)
+    for n in range(n_steps):
+        h_step = t_out[n + 1] - t_out[n]
+        rhs = u_out[n] + h_step / 2 * f_now
+        # Explicit Euler predictor as starting guess
+        u_out[n + 1] = newton.solve(t_out[n + 1], u_out[n] + h_step * f_now, rhs, h_step / 2, f_steps.get(n))
+        # Derivative at the start of the next step, the right limit on a breakpoint
+        f_now = f_steps.get(n + 1, fcn)(t_out[n + 1], u_out[n + 1])
+        if callback is not None:
+            callback(t_out[n + 1], u_out[n + 1], h_step, None)
+
+    return _finish_stats((t_out, u_out), stats)
+
+
+def BDF2(fcn, t_interval: list, z0: np.ndarray, h: float, jac=None, out: tuple = None,
+         breakpoints=None, stats=False):
+    """
+    Two-step backward differentiation formula with fixed step width h.
+    The first step, and the first step after every breakpoint (the solution is not
+    smooth across it), is an implicit Euler step; shorter steps around breakpoints and
+    at the end use the variable step coefficients. Arguments as in euler_implicit.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    callback = stats.step_callback if stats is not None else None
+    z0 = np.asarray(z0, dtype=float)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=0, breakpoints=breakpoints)
+    u_out[0] = z0
+    f_steps = _step_functions(fcn, t_out, breakpoints)
+    restarts = np.isin(t_out, breakpoints)
+    restarts[0] = True
+
+    newton = NewtonIteration(fcn, jac, stats=stats)
+    for n in range(n_steps):
+        h_step = t_out[n + 1] - t_out[n]
+        if restarts[n]:
+            u_out[n + 1] = newton.solve(t_out[n + 1], u_out[n], u_out[n], h_step, f_steps.get(n))
+            if callback is not None:
+                callback(t_out[n + 1], u_out[n + 1], h_step, None)
+            continue
+
+        # Variable step BDF2 with step ratio omega = h_n / h_n-1 (omega = 1 on the uniform grid)
+        omega = h_step / (t_out[n] - t_out[n - 1])
+        rhs = ((1 + omega) ** 2 * u_out[n] - omega ** 2 * u_out[n - 1]) / (1 + 2 * omega)
+        gamma = (1 + omega) / (1 + 2 * omega)
+        # Linear extrapolation of the last two points as predictor
+        z_guess = u_out[n] + omega * (u_out[n] - u_out[n - 1])
+        u_out[n + 1] = newton.solve(t_out[n + 1], z_guess, rhs, gamma * h_step, f_steps.get(n))
+        if callback is not None:
+            callback(t_out[n + 1], u_out[n + 1], h_step, None)
+
+    return _finish_stats((t_out, u_out), stats)
+
+
+def _rosenbrock_steps(fcn, t_interval: list, z0: np.ndarray, h_init: float,
+                      rtol: float, atol: float, jac, time_derivative, breakpoints=None,
+                      safety: float = 0.9, min_factor: float = 0.2, max_factor: float = 5.0, stats=None):
+    """
+    Generator over the accepted steps of the Rosenbrock 2(3) pair of Shampine and Reichelt
+    (the method behind MATLAB's ode23s). Yields (t, z, h, error, dz, dz_next) like _mid_point_steps.
+
+    The Jacobian is requested at every step and W = I - h*d*J is decomposed again when
+    either changes. If the controller proposes a step width only slightly larger than
+    the current one, h is kept so W can be reused.
+    """
+    d = 1 / (2 + np.sqrt(2))
+    e32 = 6 + np.sqrt(2)
+
+    if not isinstance(jac, JacobianProvider):
+        jac = JacobianProvider(fcn, jac, stats=stats)
+    if time_derivative is None:
+        # Both built-in models are autonomous between current switches
+        time_derivative = lambda t, z: 0.0
+
+    t = t_interval[0]
+    t_end = t_interval[-1]
+    z = np.asarray(z0, dtype=float)
+    h = h_init
+    eye = np.eye(len(z))
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    at_breakpoint = False
+
+    F0 = fcn(t, z)
+    yield t, z, h, 0.0, F0, F0
+
+    J = None
+    lu, h_lu = None, None
+    while t < t_end - 1e-12 * max(1.0, abs(t_end)):
+        h_step, t_new, lands, hits_breakpoint, f_step = _plan_step(fcn, t, h, t_end, breakpoints, at_breakpoint)
+        J_new = jac(t, z)
+        if J_new is not J:
+            # A cached or constant Jacobian comes back as the same object, then W can be reused
+            J = J_new
+            lu = None
+        if lu is None or h_step != h_lu:
+            if stats is not None:
+                with _TimedPhase(stats, 'lu'):
+                    lu = lu_factor(eye - h_step * d * J)
+            else:
+                lu = lu_factor(eye - h_step * d * J)
+            h_lu = h_step
+        T = time_derivative(t, z)
+
+        # Non-finite stages give a NaN error score and a rejected step instead of an exception
+        k1 = lu_solve(lu, F0 + h_step * d * T, check_finite=False)
+        F1 = f_step(t + h_step / 2, z + h_step / 2 * k1)
+        k2 = lu_solve(lu, F1 - k1, check_finite=False) + k1
+        z_new = z + h_step * k2
+        F2 = f_step(t_new, z_new)
+        k3 = lu_solve(lu, F2 - e32 * (k2 - F1) - 2 * (k1 - F0) + h_step * d * T, check_finite=False)
+        err = error_norm(h_step / 6 * (k1 - 2 * k2 + k3), z, z_new, rtol, atol)
+
+        factor = max_factor if err == 0.0 else min(max_factor, max(min_factor, safety * err ** (-1 / 3)))
+        if not err <= 1.0:
+            h = h_step * factor
+            _check_step_width(h, t, t_end)
+            if stats is not None:
+                stats.n_rejected += 1
+            continue
+
+        t = t_new
+        z = z_new
+        at_breakpoint = hits_breakpoint
+        F0 = _restart_derivative(fcn, t, z, F2, at_breakpoint)
+        yield t, z, h_step, err, F2, F0
+
+        if lands and factor >= 1.0:
+            continue
+        h = h_step if 1.0 <= factor <= 1.2 else h_step * factor
+
+
+def stepcontrol_rosenbrock(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                           rtol: float = 1e-3, atol: float = 1e-6, jac=None, time_derivative=None,
+                           dense_output: bool = False, breakpoints=None, events=None, stats=False):
+    """
+    Adaptive linearly implicit Rosenbrock 2(3) method for stiff problems.
+
+    jac(t, z) optionally provides the Jacobian and time_derivative(t, z) the partial
+    derivative dfcn/dt (zero if not given). Returns the same tuple as stepcontrol_mid_point_rule,
+    breakpoints, events and stats are handled the same way.
+    """
+    stats, fcn = _start_stats(stats, fcn)
+    steps = _rosenbrock_steps(fcn, t_interval, z0, h_init, rtol, atol, jac, time_derivative, breakpoints,
+                              stats=stats)
+    return _solve_adaptive(fcn, steps, t_interval, z0, dense_output, events, stats)
@@ -0,0 +1,143 @@
+"""
+Jacobian providers for the implicit and linearly implicit solvers.
+
+A JacobianProvider wraps an ODE and returns dfcn/dz at (t, z). It uses, in this order:
+  1. an analytic Jacobian passed as jac or attached to the ODE as fcn.jacobian,
+  2. finite differences, evaluated in one call on stacked states if a vectorized
+     right-hand side is passed or attached as fcn.vectorized, column by column otherwise.
+Columns found to be constant (linear parts of the ODE) are computed once and reused,
+and results are cached for states/times within the given tolerances.
+"""
+
+import numpy as np
+from solver.stats import _TimedPhase
+
+# Relative state offsets of the probes used to detect constant columns. They differ in
+# sign and size, so a column that is merely symmetric around z (like cos(theta) at
+# theta=-0.05 and +0.05) does not agree at both probes.
+_PROBE_OFFSETS = (0.1, -0.37)
+
+
+def finite_difference_jacobian(fcn, t: float, z: np.ndarray, f0: np.ndarray = None,
+                               vectorized_fcn=None, columns: np.ndarray = None) -> np.ndarray:
+    """
+    Forward difference approximation of dfcn/dz.
+
+    With vectorized_fcn (accepting stacked states of shape (n_runs, dof)) all perturbed
+    states are evaluated in a single call. columns restricts the computation to a subset
+    of columns; the others are returned as zero.
+    """
+    z = np.asarray(z, dtype=float)
+    if f0 is None:
+        f0 = fcn(t, z)
+    n = len(z)
+    if columns is None:
+        columns = np.arange(n)
+
+    J = np.zeros((n, n))
+    if len(columns) == 0:
+        return J
+
+    dz = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(z[columns]))
+    if vectorized_fcn is not None:
+        # One row per perturbed column
+        z_pert = np.tile(z, (len(columns), 1))
+        z_pert[np.arange(len(columns)), columns] += dz
+        J[:, columns] = ((vectorized_fcn(t, z_pert) - f0) / dz[:, None]).T
+    else:
+        for dz_j, j in zip(dz, columns):
+            z_pert = z.copy()
+            z_pert[j] += dz_j
+            J[:, j] = (fcn(t, z_pert) - f0) / dz_j
+    return J
+
+
+class JacobianProvider:
+    """
+    Callable jac(t, z) with analytic / finite difference evaluation, detection of
+    constant columns and a cache keyed on (t, z) within t_tol and a relative z_tol.
+    Evaluations are counted and timed in stats (a SolverStats) if given.
+    """
+    fcn: callable
+    jac: callable
+    vectorized_fcn: callable
+    t_tol: float
+    z_tol: float
+    n_evaluations: int = 0
+    n_cache_hits: int = 0
+
+    def __init__(self, fcn, jac=None, vectorized_fcn=None, t_tol: float = 0.0, z_tol: float = 0.0,
+                 detect_constant: bool = True, stats=None) -> None:
+        self.fcn = fcn
+        self.jac = jac if jac is not None else getattr(fcn, 'jacobian', None)
+        self.vectorized_fcn = vectorized_fcn if vectorized_fcn is not None else getattr(fcn, 'vectorized', None)
+        self.t_tol = t_tol
+        self.z_tol = z_tol
+        self.detect_constant = detect_constant
+        self.stats = stats
+
+        self._constant_columns = None   # Boolean mask, known after the first evaluation
+        self._constant_part = None
+        self._cache_t = None
+        self._cache_z = None
+        self._cache_J = None
+
+    @property
+    def is_constant(self) -> bool:
+        """True once all columns were detected to be constant."""
+        return self._constant_columns is not None and bool(np.all(self._constant_columns))
+
+    def _evaluate(self, t: float, z: np.ndarray, columns: np.ndarray = None) -> np.ndarray:
+        self.n_evaluations += 1
+        if self.stats is not None:
+            with _TimedPhase(self.stats, 'jacobian'):
+                return self._compute(t, z, columns)
+        return self._compute(t, z, columns)
+
+    def _compute(self, t: float, z: np.ndarray, columns: np.ndarray = None) -> np.ndarray:
+        if self.jac is not None:
+            return np.asarray(self.jac(t, z), dtype=float)
+        return finite_difference_jacobian(self.fcn, t, z, vectorized_fcn=self.vectorized_fcn, columns=columns)
+
+    def _detect_constant_columns(self, t: float, z: np.ndarray, J: np.ndarray) -> None:
+        """
+        Compares the Jacobian at (t, z) with the ones at several perturbed times and states
+        (_PROBE_OFFSETS). Columns that agree at all probes are treated as constant from now on.
+        """
+        # Finite differences are only accurate to about sqrt(eps), analytic Jacobians to round-off
+        tol = 1e-12 if self.jac is not None else 1e-6
+        constant = np.ones(len(z), dtype=bool)
+        for offset in _PROBE_OFFSETS:
+            z_probe = z + offset * np.maximum(1.0, np.abs(z))
+            J_probe = self._evaluate(t + abs(offset) * 1e-2 * max(1.0, abs(t)), z_probe)
+            scale = np.maximum(1.0, np.maximum(np.abs(J), np.abs(J_probe)))
+            constant &= np.all(np.abs(J - J_probe) <= tol * scale, axis=0)
+        self._constant_columns = constant
+        self._constant_part = np.where(self._constant_columns, J, 0.0)
+
+    def _cache_hit(self, t: float, z: np.ndarray) -> bool:
+        if self._cache_J is None:
+            return False
+        if abs(t - self._cache_t) > self.t_tol:
+            return False
+        return bool(np.all(np.abs(z - self._cache_z) <= self.z_tol * np.maximum(1.0, np.abs(self._cache_z))))
+
+    def __call__(self, t: float, z: np.ndarray) -> np.ndarray:
+        z = np.asarray(z, dtype=float)
+        if self.is_constant or self._cache_hit(t, z):
+            self.n_cache_hits += 1
+            return self._cache_J
+
+        if self._constant_columns is None:
+            J = self._evaluate(t, z)
+            if self.detect_constant:
+                self._detect_constant_columns(t, z, J)
+        elif self.jac is None:
+            # Only the state dependent columns need new finite differences
+            columns = np.flatnonzero(~self._constant_columns)
+            J = self._constant_part + self._evaluate(t, z, columns)
+        else:
+            J = self._evaluate(t, z)
+
+        self._cache_t, self._cache_z, self._cache_J = t, z.copy(), J
+        return J
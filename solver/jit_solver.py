@@ -0,0 +1,249 @@
+"""
+Compiled fast path for euler_explicit, RK4 and stepcontrol_mid_point_rule.
+
+If numba is installed, the step loops below are compiled together with the ODE, so a
+step costs nanoseconds instead of the microseconds of a Python loop calling a Python
+function. The ODE must provide an allocation free kernel as attributes:
+
+    fcn.kernel(t, z, out, params)   writes dz/dt into out
+    fcn.kernel_params()             float array passed as params
+
+damped_pendulum_ode and dp_ec_battery do. Without numba, or for ODEs without a
+kernel, the functions fall back to the NumPy solvers with identical arguments and
+results, so code can always call the _jit variants.
+
+z0 may also be a batch of shape (n_runs, dof) for the fixed-step solvers; the
+fallback then uses the ensemble solvers with fcn.vectorized.
+"""
+
+import numpy as np
+from solver.explicit_solver import (euler_explicit, RK4, euler_explicit_ensemble, RK4_ensemble,
+                                    _prepare_output)
+from solver.explicit_stepcontrol_solver import stepcontrol_mid_point_rule
+from solver.events import interior_breakpoints
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+_EPS = np.finfo(float).eps
+
+_EULER = 0
+_RK4 = 1
+
+
+def _jit(fcn):
+    """Compiles fcn with numba if available, otherwise fcn stays plain Python."""
+    return numba.njit(cache=True)(fcn) if HAVE_NUMBA else fcn
+
+
+_compiled_kernels = {}
+
+
+def _compiled_kernel(kernel):
+    if kernel not in _compiled_kernels:
+        _compiled_kernels[kernel] = _jit(kernel)
+    return _compiled_kernels[kernel]
+
+
+@_jit
+def _fixed_step_loop(kernel, params, method, t_out, one_sided, u_out):
+    """
+    Euler or RK4 steps over the grid t_out for every run in u_out (n_runs, N, dof),
+    starting from u_out[:, 0]. Steps flagged in one_sided clamp their stage times into
+    the open step, like solver.events.one_sided. The arithmetic follows _euler_step and
+    _rk4_step operation by operation, so the results agree with euler_explicit and RK4.
+    """
+    n_runs, n_points, dof = u_out.shape
+    k1 = np.empty(dof)
+    k2 = np.empty(dof)
+    k3 = np.empty(dof)
+    k4 = np.empty(dof)
+    z_stage = np.empty(dof)
+    for r in range(n_runs):
+        for n in range(n_points - 1):
+            t = t_out[n]
+            h = t_out[n + 1] - t
+            t_lo = -np.inf
+            t_hi = np.inf
+            if one_sided[n]:
+                t_lo = np.nextafter(t, np.inf)
+                t_hi = np.nextafter(t_out[n + 1], -np.inf)
+            z = u_out[r, n]
+            z_new = u_out[r, n + 1]
+
+            kernel(min(max(t, t_lo), t_hi), z, k1, params)
+            if method == _EULER:
+                for j in range(dof):
+                    z_new[j] = k1[j] * h + z[j]
+                continue
+
+            for j in range(dof):
+                z_stage[j] = k1[j] * (h / 2) + z[j]
+            kernel(min(max(t + h / 2, t_lo), t_hi), z_stage, k2, params)
+            for j in range(dof):
+                z_stage[j] = k2[j] * (h / 2) + z[j]
+            kernel(min(max(t + h / 2, t_lo), t_hi), z_stage, k3, params)
+            for j in range(dof):
+                z_stage[j] = k3[j] * h + z[j]
+            kernel(min(max(t + h, t_lo), t_hi), z_stage, k4, params)
+            for j in range(dof):
+                z_new[j] = ((k2[j] + k3[j]) * 2 + k1[j] + k4[j]) * (h / 6) + z[j]
+
+
+@_jit
+def _mid_point_loop(kernel, params, t0, t_end, z0, h_init, rtol, atol, increase_factor, decrease_factor,
+                    breakpoints, capacity):
+    """
+    Step-controlled midpoint rule, the same algorithm as _mid_point_steps.
+    The output arrays start with the given capacity and double when full.
+    """
+    dof = len(z0)
+    t_arr = np.empty(capacity)
+    u_arr = np.empty((capacity, dof))
+    h_arr = np.empty(capacity)
+    e_arr = np.empty(capacity)
+    k1 = np.empty(dof)
+    k2 = np.empty(dof)
+    z_stage = np.empty(dof)
+    z_new = np.empty(dof)
+    z = z0.copy()
+
+    t = t0
+    h = h_init
+    at_breakpoint = False
+    kernel(t, z, k1, params)
+    t_arr[0] = t
+    u_arr[0] = z
+    h_arr[0] = h
+    e_arr[0] = 0.0
+    count = 1
+
+    while t < t_end - 1e-12 * max(1.0, abs(t_end)):
+        # Never step past t_end or the next breakpoint, see _plan_step
+        i = np.searchsorted(breakpoints, t, side='right')
+        stop = breakpoints[i] if i < len(breakpoints) else t_end
+        lands = h >= stop - t
+        h_step = stop - t if lands else h
+        t_new = stop if lands else t + h_step
+        hits_breakpoint = lands and stop < t_end
+
+        t_stage = t + h_step / 2
+        if at_breakpoint or hits_breakpoint:
+            t_stage = min(max(t_stage, np.nextafter(t, np.inf)), np.nextafter(t_new, -np.inf))
+        for j in range(dof):
+            z_stage[j] = z[j] + h_step / 2 * k1[j]
+        kernel(t_stage, z_stage, k2, params)
+
+        # Midpoint solution, embedded Euler solution for the error estimate, see error_norm
+        sum_squares = 0.0
+        for j in range(dof):
+            z_new[j] = z[j] + h_step * k2[j]
+            err_j = z_new[j] - (z[j] + h_step * k1[j])
+            scale = atol + rtol * max(abs(z[j]), abs(z_new[j]))
+            sum_squares += (err_j / scale) ** 2
+        err = np.sqrt(sum_squares / dof)
+
+        if not err <= 1.0:
+            h = h_step * decrease_factor
+            # See _check_step_width, a constant message compiles with numba
+            if h < 10 * _EPS * max(abs(t), abs(t_end)):
+                raise RuntimeError("Step width fell below the round-off of t.")
+            continue
+
+        t = t_new
+        z[:] = z_new
+        at_breakpoint = hits_breakpoint
+        kernel(np.nextafter(t, np.inf) if at_breakpoint else t, z, k1, params)
+
+        if count == len(t_arr):
+            t_arr = np.concatenate((t_arr, np.empty(len(t_arr))))
+            u_arr = np.concatenate((u_arr, np.empty((len(u_arr), dof))))
+            h_arr = np.concatenate((h_arr, np.empty(len(h_arr))))
+            e_arr = np.concatenate((e_arr, np.empty(len(e_arr))))
+        t_arr[count] = t
+        u_arr[count] = z
+        h_arr[count] = h_step
+        e_arr[count] = err
+        count += 1
+
+        if err < 0.5 and not lands:
+            h = h_step * increase_factor
+
+    return t_arr[:count].copy(), u_arr[:count].copy(), h_arr[:count].copy(), e_arr[:count].copy()
+
+
+def _uses_jit(fcn) -> bool:
+    return HAVE_NUMBA and getattr(fcn, 'kernel', None) is not None
+
+
+def _fixed_step_jit(method: int, fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple, breakpoints):
+    z0 = np.asarray(z0, dtype=float)
+    batched = z0.ndim == 2
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    n_steps, t_out, u_out = _prepare_output(t_interval, h, z0.shape, out, time_axis=1 if batched else 0,
+                                            breakpoints=breakpoints)
+    at_breakpoint = np.isin(t_out, breakpoints)
+    one_sided = at_breakpoint[:-1] | at_breakpoint[1:]
+
+    u_runs = u_out if batched else u_out[None]
+    u_runs[:, 0] = z0
+    _fixed_step_loop(_compiled_kernel(fcn.kernel), np.asarray(fcn.kernel_params(), dtype=float), method,
+                     t_out, one_sided, u_runs)
+    return t_out, u_out
+
+
+def _fallback(solver, ensemble_solver, fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple,
+              breakpoints):
+    if np.ndim(z0) == 1:
+        return solver(fcn, t_interval, z0, h, out=out, breakpoints=breakpoints)
+    vectorized = getattr(fcn, 'vectorized', None)
+    if vectorized is None:
+        raise ValueError("A batch of initial states needs numba and fcn.kernel, or fcn.vectorized.")
+    if breakpoints is None:
+        breakpoints = getattr(fcn, 'breakpoints', None)
+    return ensemble_solver(vectorized, t_interval, z0, h, out=out, breakpoints=breakpoints)
+
+
+def euler_explicit_jit(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                       breakpoints=None):
+    """
+    Compiled explicit Euler method; same arguments and results as euler_explicit
+    (without events). z0 may be a batch (n_runs, dof), then like euler_explicit_ensemble.
+    """
+    if not _uses_jit(fcn):
+        return _fallback(euler_explicit, euler_explicit_ensemble, fcn, t_interval, z0, h, out, breakpoints)
+    return _fixed_step_jit(_EULER, fcn, t_interval, z0, h, out, breakpoints)
+
+
+def RK4_jit(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None, breakpoints=None):
+    """
+    Compiled classic Runge-Kutta method; same arguments and results as RK4
+    (without events). z0 may be a batch (n_runs, dof), then like RK4_ensemble.
+    """
+    if not _uses_jit(fcn):
+        return _fallback(RK4, RK4_ensemble, fcn, t_interval, z0, h, out, breakpoints)
+    return _fixed_step_jit(_RK4, fcn, t_interval, z0, h, out, breakpoints)
+
+
+def stepcontrol_mid_point_rule_jit(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                                   rtol: float = 1e-3, atol: float = 1e-6,
+                                   increase_factor: float = 1.4, decrease_factor: float = 0.5,
+                                   breakpoints=None):
+    """
+    Compiled step-controlled midpoint rule; same arguments and results as
+    stepcontrol_mid_point_rule (without dense output and events).
+    """
+    if not _uses_jit(fcn):
+        return stepcontrol_mid_point_rule(fcn, t_interval, z0, h_init, rtol, atol, increase_factor,
+                                          decrease_factor, breakpoints=breakpoints)
+    z0 = np.asarray(z0, dtype=float)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    # Rough guess of the step count; the arrays grow if it is too small
+    capacity = max(64, int(4 * (t_interval[-1] - t_interval[0]) / h_init))
+    return _mid_point_loop(_compiled_kernel(fcn.kernel), np.asarray(fcn.kernel_params(), dtype=float),
+                           float(t_interval[0]), float(t_interval[-1]), z0, float(h_init), float(rtol),
+                           float(atol), float(increase_factor), float(decrease_factor), breakpoints, capacity)
@@ -0,0 +1,185 @@
+"""
+Solver statistics and per-step callbacks.
+
+The NumPy solvers accept stats=True (or a SolverStats instance to fill) and then append
+a SolverStats object to their returned tuple; the _jit variants and the stream_*
+generators do not. It reports the number of RHS calls,
+Jacobian evaluations and LU decompositions, accepted and rejected steps, and splits
+the wall time into the phases RHS, Jacobian, LU decomposition and the remainder
+spent in the solver itself.
+
+A SolverStats(step_callback=...) additionally calls step_callback(t, z, h, error)
+after every accepted step; error is None for fixed-step solvers. z may be a buffer
+that the solver reuses, copy it to keep it.
+
+With stats=False (the default) the ODE is not wrapped at all, so the only cost is a
+few checks per solve and per rejected step. Code that runs other solvers (e.g.
+scipy's solve_ivp) can count their work in a SolverStats with InstrumentedODE.
+"""
+
+import time
+from typing import Optional
+
+
+class SolverStats:
+    """Counters and phase timings [s] of one solver run."""
+    n_rhs: int
+    n_jacobian: int
+    n_lu: int
+    n_accepted: int
+    n_rejected: int
+    time_rhs: float
+    time_jacobian: float
+    time_lu: float
+    time_total: float
+    step_callback: Optional[callable]
+
+    def __init__(self, step_callback=None) -> None:
+        self.n_rhs = 0
+        self.n_jacobian = 0
+        self.n_lu = 0
+        self.n_accepted = 0
+        self.n_rejected = 0
+        self.time_rhs = 0.0
+        self.time_jacobian = 0.0
+        self.time_lu = 0.0
+        self.time_total = 0.0
+        self.step_callback = step_callback
+        self._t_start = None
+
+    @property
+    def time_solver(self) -> float:
+        """Time spent in the solver itself, i.e. outside of RHS, Jacobian and LU decomposition."""
+        return self.time_total - self.time_rhs - self.time_jacobian - self.time_lu
+
+    def __repr__(self) -> str:
+        return (f"SolverStats(steps: {self.n_accepted} accepted, {self.n_rejected} rejected | "
+                f"calls: {self.n_rhs} rhs, {self.n_jacobian} jacobian, {self.n_lu} lu | "
+                f"time: {self.time_total:.4g}s total, {self.time_rhs:.4g}s rhs, "
+                f"{self.time_jacobian:.4g}s jacobian, {self.time_lu:.4g}s lu, {self.time_solver:.4g}s solver)")
+
+
+class InstrumentedODE:
+    """
+    Counts and times the calls of an ODE in stats. Vectorized calls, and all calls if
+    stacked, count one evaluation per state. Other attributes (jacobian, breakpoints,
+    state_space, ...) are forwarded unchanged.
+
+    The solvers count Jacobian evaluations and the forces of split() themselves. With
+    count_attributes, calls of fcn.jacobian are counted as Jacobian evaluations and the
+    force of fcn.split() as RHS calls here, for callers that do not (e.g. solve_ivp).
+    """
+
+    def __init__(self, fcn, stats: SolverStats, stacked: bool = False, count_attributes: bool = False) -> None:
+        self._fcn = fcn
+        self._stats = stats
+        self._stacked = stacked
+        vectorized = getattr(fcn, 'vectorized', None)
+        if vectorized is not None:
+            def instrumented_vectorized(t, z):
+                start = time.perf_counter()
+                dz = vectorized(t, z)
+                stats.time_rhs += time.perf_counter() - start
+                stats.n_rhs += len(z)
+                return dz
+            self.vectorized = instrumented_vectorized
+        if not count_attributes:
+            return
+        jacobian = getattr(fcn, 'jacobian', None)
+        if jacobian is not None:
+            def instrumented_jacobian(t, z):
+                with _TimedPhase(stats, 'jacobian'):
+                    return jacobian(t, z)
+            self.jacobian = instrumented_jacobian
+        split = getattr(fcn, 'split', None)
+        if split is not None:
+            def instrumented_split():
+                velocity, force, damping = split()
+                return velocity, InstrumentedODE(force, stats), damping
+            self.split = instrumented_split
+
+    def __call__(self, t, z):
+        start = time.perf_counter()
+        dz = self._fcn(t, z)
+        self._stats.time_rhs += time.perf_counter() - start
+        self._stats.n_rhs += len(z) if self._stacked else 1
+        return dz
+
+    def __getattr__(self, name):
+        return getattr(self._fcn, name)
+
+
+def _start_stats(stats, fcn, stacked: bool = False):
+    """
+    Resolves the stats argument of a solver. Returns (SolverStats or None, fcn), where
+    fcn is wrapped for counting if statistics are collected; stacked marks an ODE that
+    is called with stacked states (ensemble solvers).
+    """
+    if stats is None or stats is False:
+        return None, fcn
+    if not isinstance(stats, SolverStats):
+        stats = SolverStats()
+    stats._t_start = time.perf_counter()
+    return stats, InstrumentedODE(fcn, stats, stacked)
+
+
+def _finish_stats(result: tuple, stats: Optional[SolverStats]) -> tuple:
+    """Appends the completed stats to the solver result; the first entry of result is the time grid."""
+    if stats is None:
+        return result
+    stats.time_total += time.perf_counter() - stats._t_start
+    stats.n_accepted += len(result[0]) - 1
+    return result + (stats,)
+
+
+class _TimedPhase:
+    """
+    Context for a 'jacobian' or 'lu' phase. RHS calls made inside the phase (finite
+    differences) stay attributed to the RHS, so the phase times do not overlap.
+    """
+
+    def __init__(self, stats: SolverStats, phase: str) -> None:
+        self._stats = stats
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._time_rhs = self._stats.time_rhs
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._start - (self._stats.time_rhs - self._time_rhs)
+        if self._phase == 'jacobian':
+            self._stats.n_jacobian += 1
+            self._stats.time_jacobian += elapsed
+        else:
+            self._stats.n_lu += 1
+            self._stats.time_lu += elapsed
+
+
+def _step_with_callback(step, stats: Optional[SolverStats]):
+    """Wraps a fixed step function step(fcn, t, z, h, z_new) so the step callback sees every new point."""
+    if stats is None or stats.step_callback is None:
+        return step
+    callback = stats.step_callback
+
+    def step_and_report(fcn, t, z, h, z_new):
+        step(fcn, t, z, h, z_new)
+        callback(t + h, z_new, h, None)
+    return step_and_report
+
+
+def _steps_with_callback(steps, stats: Optional[SolverStats]):
+    """Wraps a step generator yielding (t, z, h, error, dz, dz_next) so the step callback sees every accepted step."""
+    if stats is None or stats.step_callback is None:
+        return steps
+    return _report_steps(steps, stats.step_callback)
+
+
+def _report_steps(steps, callback):
+    steps = iter(steps)
+    # The first entry is the initial state, not a step
+    yield next(steps)
+    for t, z, h, err, dz, dz_next in steps:
+        callback(t, z, h, err)
+        yield t, z, h, err, dz, dz_next
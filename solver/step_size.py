@@ -0,0 +1,217 @@
+"""
+Step width selection for the fixed-step solvers from a target global error.
+
+auto_step_width runs pilots at the step widths h0, h0/2 and h0/4 and estimates the
+convergence order p and the error constant C of err = C*h^p from the differences of
+the states at the common time points (Richardson extrapolation). The maximum over the
+window matters for strongly damped problems such as the battery, where transient
+errors have decayed by the end of a window. Pilot steps are halved until the observed
+order is plausible, i.e. the method is in its asymptotic range (and stable); each
+halving also shortens the window to at most _MAX_WINDOW_STEPS pilot steps, so finding
+a stability limit stays cheap.
+
+The first window is the first pilot_fraction of t_interval. Windows in which the
+solution is exact up to round-off (e.g. before a load step) carry no information;
+as the pilot end state is then exact too, the search continues from there with a
+longer window. The first informative window gives the order; it is rounded to the
+nearest integer, as higher order terms bias it at the coarse pilot steps and the
+bias is amplified by log(h0 / h) when extrapolating far below them.
+
+The error constant is then calibrated on windows of doubling length from the same
+start (only h0 and h0/2 now that the order is known), until the predicted step width
+changes by less than 10 %, the window covers the interval, or the pilots would cost
+more than pilot_budget times the final run. The growth of the error with time is
+measured between the last two windows (clamped to [0, 2]) and extrapolates the
+error to the end of the interval.
+
+The result is the largest h meeting the target, at most the coarsest asymptotic pilot
+step. A target that needs more than max_steps steps (or pilots that do) raises a
+ValueError.
+
+Results are memoized per ODE, ODE parameters (fcn.kernel_params() if available),
+method, interval, initial state and target error.
+"""
+
+import numpy as np
+
+_step_width_cache = {}
+
+# Observed orders outside of this range mean the pilot steps are not yet asymptotic
+_MIN_ORDER = 0.5
+_MAX_ORDER = 10.0
+# Differences below this many ulps of the state are round-off
+_ROUNDOFF = 1e3 * np.finfo(float).eps
+# Pilot steps of width h0 per window after halving h0
+_MAX_WINDOW_STEPS = 64
+# Growth exponents of the global error with time: from not growing to quadratic
+_MIN_GROWTH = 0.0
+_MAX_GROWTH = 2.0
+
+
+def _ode_parameters(fcn) -> bytes:
+    kernel_params = getattr(fcn, 'kernel_params', None)
+    return np.asarray(kernel_params(), dtype=float).tobytes() if kernel_params is not None else b''
+
+
+def _pilot_window(fcn, t0: float, window: float) -> list:
+    """
+    [t0, t0 + window], shortened if it ends on a breakpoint of fcn: the right-hand side
+    at the end of the window would already see the value after the jump.
+    """
+    breakpoints = np.asarray(getattr(fcn, 'breakpoints', ()), dtype=float)
+    t_end = t0 + window
+    if np.any(np.abs(breakpoints - t_end) <= 1e-9 * max(1.0, abs(t_end))):
+        t_end = t0 + 0.99 * window
+    return [t0, t_end]
+
+
+def _pilot_differences(runs: list) -> list:
+    """
+    Max norm differences of consecutive pilot runs [(t, u), ...] over the time points all
+    of them share, i.e. the grid of the coarsest one (halving h keeps its points exactly).
+    """
+    common = runs[0][0]
+    for t, _ in runs[1:]:
+        common = np.intersect1d(common, t)
+    states = [np.asarray(u)[np.searchsorted(t, common)] for t, u in runs]
+    return [np.max(np.abs(a - b)) for a, b in zip(states, states[1:])]
+
+
+def _richardson(solver, fcn, t0: float, length: float, z0: np.ndarray, h0: float, max_iterations: int,
+                max_steps: int, order: int = None):
+    """
+    Pilot runs at h0, h0/2 and h0/4 over the window of length from t0 (h0 and h0/2 only
+    for a known order), compared by _pilot_differences. Returns (estimate, h0, t_window, z_end, n_steps): estimate is
+    (order, error constant) or None if the pilots agree up to round-off (no information
+    in this window); h0 is the coarsest pilot step that was used, z_end the end state of
+    the finest pilot and n_steps the number of steps of all pilots.
+    """
+    n_pilots = 3 if order is None else 2
+    n_steps = 0
+    for iteration in range(max_iterations):
+        if iteration > 0:
+            length = min(length, _MAX_WINDOW_STEPS * h0)
+        t_window = _pilot_window(fcn, t0, length)
+        window = t_window[1] - t_window[0]
+        if window / (h0 / 2 ** (n_pilots - 1)) > max_steps:
+            raise ValueError(f"The pilot runs of {solver.__name__} in {t_window} would need more than "
+                             f"{max_steps} steps of width {h0 / 2 ** (n_pilots - 1):.3g} to converge, "
+                             f"choose h manually.")
+        with np.errstate(all='ignore'):
+            runs = [solver(fcn, t_window, z0, h0 / 2 ** k)[:2] for k in range(n_pilots)]
+            differences = _pilot_differences(runs)
+        n_steps += sum(len(t) - 1 for t, _ in runs)
+        z_end = np.asarray(runs[-1][1][-1], dtype=float)
+        d_coarse = differences[0]
+        # Scaled by the initial state, unstable pilots blow their end states up
+        noise = _ROUNDOFF * max(1.0, np.max(np.abs(z0)))
+
+        if np.isfinite(d_coarse) and d_coarse <= noise:
+            return None, h0, t_window, z_end, n_steps
+        if order is not None:
+            if np.isfinite(d_coarse):
+                # err(h0/2) ~ d_coarse / (2^p - 1) = C * (h0/2)^p
+                return (order, d_coarse / (2 ** order - 1) / (h0 / 2) ** order), h0, t_window, z_end, n_steps
+        else:
+            d_fine = differences[1]
+            if np.isfinite(d_fine) and d_fine <= noise:
+                # Already exact up to round-off at h0/2, finer pilots carry no more information
+                return None, h0 / 2, t_window, z_end, n_steps
+            if np.isfinite(d_coarse) and np.isfinite(d_fine):
+                observed = np.log2(d_coarse / d_fine)
+                if _MIN_ORDER <= observed <= _MAX_ORDER:
+                    p = max(1, round(observed))
+                    # err(h0/4) ~ d_fine / (2^p - 1) = C * (h0/4)^p
+                    return (p, d_fine / (2 ** p - 1) / (h0 / 4) ** p), h0, t_window, z_end, n_steps
+        # Unstable, not yet asymptotic, or only the coarsest pilot differs (possibly unstable)
+        h0 /= 2
+    raise RuntimeError(f"No convergence of {solver.__name__} in the pilot window {t_window}, choose h manually.")
+
+
+def _predicted_step_width(windows: list, remaining: float, order: int, target_error: float,
+                          safety: float) -> float:
+    """
+    Step width meeting target_error after remaining time, from the error constants of
+    the calibration windows [(length, constant), ...] starting at the same time.
+    """
+    length, constant = windows[-1]
+    growth = 1.0
+    if len(windows) > 1 and windows[-2][0] != length:
+        length_prev, constant_prev = windows[-2]
+        growth = float(np.clip(np.log(constant / constant_prev) / np.log(length / length_prev),
+                               _MIN_GROWTH, _MAX_GROWTH))
+    constant_full = constant * max(remaining / length, 1.0) ** growth
+    return safety * (target_error / constant_full) ** (1 / order)
+
+
+def auto_step_width(solver, fcn, t_interval: list, z0: np.ndarray, target_error: float,
+                    pilot_fraction: float = 0.1, pilot_steps: int = 8, max_iterations: int = 16,
+                    safety: float = 0.8, max_steps: int = 10 ** 7, pilot_budget: float = 0.5) -> float:
+    """
+    Largest step width h for which solver (e.g. euler_explicit or RK4) is expected to
+    reach a global error (max norm over the time points of the run) of target_error on
+    t_interval.
+    The first pilot window is the first pilot_fraction of t_interval, starting with
+    pilot_steps steps; all pilots together take at most about pilot_budget times the
+    steps of the final run. See module docstring. Raises a ValueError if the target
+    needs more than max_steps steps.
+    """
+    if target_error <= 0:
+        raise ValueError("target_error must be positive.")
+    z0 = np.asarray(z0, dtype=float)
+    key = (fcn, _ode_parameters(fcn), solver.__name__, tuple(map(float, t_interval)), z0.tobytes(),
+           float(target_error), pilot_fraction, pilot_steps, safety, max_steps, pilot_budget)
+    if key in _step_width_cache:
+        return _step_width_cache[key]
+
+    t_end = t_interval[-1]
+    span = t_end - t_interval[0]
+    tiny = 1e-9 * max(1.0, abs(t_end))
+    t0, z_start = t_interval[0], z0
+    length = pilot_fraction * span
+    h0 = length / pilot_steps
+    n_pilot = 0
+    # Order and coarsest asymptotic pilot step; windows without information are skipped
+    while True:
+        estimate, h0, t_window, z_end, n_steps = _richardson(solver, fcn, t0, length, z_start, h0,
+                                                             max_iterations, max_steps)
+        n_pilot += n_steps
+        if estimate is not None or t_window[1] >= t_end - tiny:
+            break
+        t0, z_start = t_window[1], z_end
+        length = min(2 * (t_window[1] - t_window[0]), t_end - t0)
+
+    if estimate is None:
+        # Exact up to round-off over the whole interval with the coarsest stable pilot steps
+        h = min(h0, span)
+    else:
+        # Error constant from windows of doubling length, while cheap compared to the final run
+        order, constant = estimate
+        windows = [(t_window[1] - t0, constant)]
+        h = min(_predicted_step_width(windows, t_end - t0, order, target_error, safety), h0)
+        while t_window[1] < t_end - tiny:
+            length = min(2 * windows[-1][0], t_end - t0)
+            if n_pilot + 3 * length / h0 > pilot_budget * span / h:
+                break
+            estimate, h0, t_window, _, n_steps = _richardson(solver, fcn, t0, length, z_start, h0,
+                                                             max_iterations, max_steps, order)
+            n_pilot += n_steps
+            if estimate is None:
+                break
+            windows.append((t_window[1] - t0, estimate[1]))
+            h_new = min(_predicted_step_width(windows, t_end - t0, order, target_error, safety), h0)
+            settled = abs(h_new / h - 1) < 0.1
+            h = h_new
+            if settled:
+                break
+        h = min(h, span)
+    if span / h > max_steps:
+        raise ValueError(f"target_error={target_error:g} needs about {span / h:.3g} steps of width {h:.3g} "
+                         f"with {solver.__name__}, more than max_steps={max_steps}. Loosen the target, "
+                         f"use a higher order method or raise max_steps.")
+    _step_width_cache[key] = h
+    return h
+
+
+def clear_step_width_cache() -> None:
+    _step_width_cache.clear()
@@ -0,0 +1,187 @@
+"""
+Iterator-style solver interface with bounded memory.
+
+Instead of returning the full trajectory, the stream_* functions yield (t, z)
+chunks of at most chunk_size points. Output can be decimated to every n-th
+step (the final point is always included) or restricted to given t_eval points.
+Memory use is O(chunk_size) regardless of the length of the time interval.
+
+Breakpoints (default: fcn.breakpoints) are handled like in the batch solvers: the
+fixed-step methods add them to their grid and evaluate the right-hand side one-sided
+on the steps touching them, see solver.events.
+"""
+
+import numpy as np
+from solver.events import interior_breakpoints, one_sided
+from solver.explicit_solver import number_of_steps, _euler_step, _rk4_step
+from solver.explicit_stepcontrol_solver import _mid_point_steps
+from solver.dense_output import HermiteDenseOutput
+
+
+def _check_t_eval(t_interval: list, t_eval) -> np.ndarray:
+    t_eval = np.asarray(t_eval, dtype=float)
+    if np.any(np.diff(t_eval) < 0):
+        raise ValueError("t_eval must be sorted in increasing order.")
+    if len(t_eval) and (t_eval[0] < t_interval[0] or t_eval[-1] > t_interval[-1]):
+        raise ValueError(f"t_eval must lie within t_interval {t_interval}.")
+    return t_eval
+
+
+def _select_output(points, partial_step, every_n: int, t_eval):
+    """
+    Decimates a stream of consecutive (t, z) points.
+
+    With t_eval, points in between two steps of a fixed-step method are computed with
+    partial_step(t, z, dt), i.e. a step of the same method from the last point, so the
+    trajectory itself is not altered. Adaptive methods use their dense output instead.
+    """
+    if t_eval is None:
+        n = -1
+        for n, (t, z) in enumerate(points):
+            if n % every_n == 0:
+                yield t, z
+        # Always include the final point
+        if n > 0 and n % every_n != 0:
+            yield t, z
+        return
+
+    i = 0
+    t_prev, z_prev = None, None
+    for t, z in points:
+        if t_prev is not None:
+            while i < len(t_eval) and t_eval[i] < t:
+                yield t_eval[i], partial_step(t_prev, z_prev, t_eval[i] - t_prev)
+                i += 1
+        while i < len(t_eval) and t_eval[i] == t:
+            yield t, z
+            i += 1
+        t_prev, z_prev = t, z
+
+
+def _chunked(samples, chunk_size: int):
+    """Collects (t, z) samples into (t_chunk, z_chunk) arrays of at most chunk_size points."""
+    t_buf, z_buf = None, None
+    k = 0
+    for t, z in samples:
+        if z_buf is None:
+            t_buf = np.empty(chunk_size)
+            z_buf = np.empty((chunk_size,) + np.shape(z))
+        t_buf[k] = t
+        z_buf[k] = z
+        k += 1
+        if k == chunk_size:
+            yield t_buf.copy(), z_buf.copy()
+            k = 0
+    if k:
+        yield t_buf[:k].copy(), z_buf[:k].copy()
+
+
+def _grid_points(t_interval: list, h: float, breakpoints: np.ndarray):
+    """The points of explicit_solver.time_grid one at a time, without allocating the grid."""
+    n_steps = number_of_steps(t_interval, h)
+    t0 = t_interval[0]
+    i = 0
+    for n in range(n_steps + 1):
+        t = t0 + n * h if n < n_steps else t_interval[-1]
+        while i < len(breakpoints) and breakpoints[i] < t:
+            yield breakpoints[i]
+            i += 1
+        # Grid points next to a breakpoint are replaced by it
+        near = ((i > 0 and t - breakpoints[i - 1] <= 1e-6 * h)
+                or (i < len(breakpoints) and breakpoints[i] - t <= 1e-6 * h))
+        if not near:
+            yield t
+
+
+def _fixed_step_points(step, fcn, t_interval: list, z0: np.ndarray, h: float, breakpoints: np.ndarray):
+    """Consecutive (t, z) points of a fixed-step method; two state buffers are swapped per step."""
+    grid = _grid_points(t_interval, h, breakpoints)
+    on_breakpoint = set(breakpoints.tolist())
+    t = next(grid)
+    z = np.array(z0, dtype=float)
+    z_new = np.empty_like(z)
+
+    yield t, z
+    for t_next in grid:
+        touches_breakpoint = t in on_breakpoint or t_next in on_breakpoint
+        step(one_sided(fcn, t, t_next) if touches_breakpoint else fcn, t, z, t_next - t, z_new)
+        z, z_new = z_new, z
+        t = t_next
+        yield t, z
+
+
+def _stream_fixed_step(step, fcn, t_interval: list, z0: np.ndarray, h: float,
+                       chunk_size: int, every_n: int, t_eval, breakpoints):
+    if t_eval is not None:
+        t_eval = _check_t_eval(t_interval, t_eval)
+    breakpoints = interior_breakpoints(fcn, t_interval, breakpoints)
+    on_breakpoint = set(breakpoints.tolist())
+
+    def partial_step(t, z, dt):
+        # Only a step starting on a breakpoint needs the right limit, t + dt is inside the step
+        z_eval = np.empty_like(z)
+        step(one_sided(fcn, t, t + dt) if t in on_breakpoint else fcn, t, z, dt, z_eval)
+        return z_eval
+
+    points = _fixed_step_points(step, fcn, t_interval, z0, h, breakpoints)
+    yield from _chunked(_select_output(points, partial_step, every_n, t_eval), chunk_size)
+
+
+def stream_euler_explicit(fcn, t_interval: list, z0: np.ndarray, h: float,
+                          chunk_size: int = 10000, every_n: int = 1, t_eval=None, breakpoints=None):
+    """Explicit Euler method, yielding (t, z) chunks. See module docstring for the options."""
+    yield from _stream_fixed_step(_euler_step, fcn, t_interval, z0, h, chunk_size, every_n, t_eval, breakpoints)
+
+
+def stream_RK4(fcn, t_interval: list, z0: np.ndarray, h: float,
+               chunk_size: int = 10000, every_n: int = 1, t_eval=None, breakpoints=None):
+    """Classic RK4 method, yielding (t, z) chunks. See module docstring for the options."""
+    z_stage = np.empty(np.shape(z0))
+
+    def step(fcn, t, z, h, z_new):
+        _rk4_step(fcn, t, z, h, z_new, z_stage)
+
+    yield from _stream_fixed_step(step, fcn, t_interval, z0, h, chunk_size, every_n, t_eval, breakpoints)
+
+
+def stream_stepcontrol_mid_point_rule(fcn, t_interval: list, z0: np.ndarray, h_init: float = 0.1,
+                                      chunk_size: int = 10000, every_n: int = 1, t_eval=None,
+                                      rtol: float = 1e-3, atol: float = 1e-6,
+                                      increase_factor: float = 1.4, decrease_factor: float = 0.5,
+                                      breakpoints=None):
+    """
+    Step-controlled midpoint rule, yielding (t, z) chunks of accepted steps.
+    See module docstring for the options.
+    """
+    steps = _mid_point_steps(fcn, t_interval, z0, h_init, rtol, atol, increase_factor, decrease_factor,
+                             breakpoints)
+    if t_eval is None:
+        points = ((t, z) for t, z, *_ in steps)
+        yield from _chunked(_select_output(points, None, every_n, None), chunk_size)
+        return
+
+    t_eval = _check_t_eval(t_interval, t_eval)
+    yield from _chunked(_dense_output_samples(steps, t_eval), chunk_size)
+
+
+def _dense_output_samples(steps, t_eval: np.ndarray):
+    """
+    Samples t_eval from a stream of accepted steps (t, z, h, error, dz, dz_next) using the
+    Hermite interpolant of each step, so no extra RHS evaluations are needed. A step
+    starts with the dz_next of its predecessor and ends with its own dz (the left
+    limit on a breakpoint).
+    """
+    i = 0
+    t_prev, z_prev, dz_prev = None, None, None
+    for t, z, _, _, dz, dz_next in steps:
+        j = np.searchsorted(t_eval, t, side='right')
+        if j > i:
+            if t_prev is None:
+                # Only points equal to the initial time can precede the first step
+                samples = np.broadcast_to(z, (j - i,) + np.shape(z))
+            else:
+                samples = HermiteDenseOutput([t_prev, t], [z_prev, z], [dz_prev, dz])(t_eval[i:j])
+            for t_k, z_k in zip(t_eval[i:j], samples):
+                yield t_k, z_k
+        i = j
+        t_prev, z_prev, dz_prev = t, z, dz_next
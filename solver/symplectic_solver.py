@@ -0,0 +1,131 @@
+"""
+Symplectic fixed-step integrators for mechanical systems with linear damping.
+
+The ODE exposes fcn.split() -> (velocity, force, damping) for states z = [q, p]
+(first half positions, second half momenta), see damped_pendulum_split:
+
+    dq/dt = velocity(t, p),    dp/dt = force(t, q) - damping * p
+
+Without damping the energy error of these methods stays bounded over arbitrarily long
+times instead of drifting like with RK4, so the step width only has to resolve the
+motion. With light damping, strang_splitting and yoshida4 integrate the damping flow
+exactly and keep the symplectic structure decaying at the exact rate (conformal
+symplectic), so the energy decays like the true solution.
+
+All methods take the same arguments as RK4. Each force evaluation counts as an RHS
+call in the stats; consecutive steps share the force at their common point, so
+Stormer-Verlet and strang_splitting need one force evaluation per step, yoshida4 three.
+"""
+
+import numpy as np
+from solver.explicit_solver import _fixed_step_solve, _resolve_step_width
+from solver.stats import _start_stats, _finish_stats, _step_with_callback, InstrumentedODE
+
+# Triple jump composition of a symmetric second order step (Yoshida 1990)
+_YOSHIDA_W1 = 1 / (2 - 2 ** (1 / 3))
+_YOSHIDA_W0 = 1 - 2 * _YOSHIDA_W1
+_YOSHIDA_WEIGHTS = (_YOSHIDA_W1, _YOSHIDA_W0, _YOSHIDA_W1)
+
+
+def _verlet_flow(velocity, force, t: float, q: np.ndarray, p: np.ndarray, h: float, f_q: np.ndarray):
+    """Conservative Stormer-Verlet (kick-drift-kick) over h; f_q = force(t, q). Returns (q, p, force at the new q)."""
+    p = p + h / 2 * f_q
+    q = q + h * velocity(t + h / 2, p)
+    f_q = force(t + h, q)
+    return q, p + h / 2 * f_q, f_q
+
+
+def _strang_flow(velocity, force, damping: float, t: float, q: np.ndarray, p: np.ndarray, h: float,
+                 f_q: np.ndarray):
+    """Exact damping over h/2, a conservative Verlet step, exact damping over h/2."""
+    decay = np.exp(-damping * h / 2)
+    q, p, f_q = _verlet_flow(velocity, force, t, q, decay * p, h, f_q)
+    return q, decay * p, f_q
+
+
+def _generalized_verlet_flow(velocity, force, damping: float, t: float, q: np.ndarray, p: np.ndarray,
+                             h: float, f_q: np.ndarray):
+    """
+    Stormer-Verlet for the momentum dependent force force(t, q) - damping * p: the
+    implicit first half kick is linear in p and solved in closed form.
+    """
+    p_half = (p + h / 2 * f_q) / (1 + damping * h / 2)
+    q = q + h * velocity(t + h / 2, p_half)
+    f_q = force(t + h, q)
+    return q, p_half + h / 2 * (f_q - damping * p_half), f_q
+
+
+def _yoshida_flow(velocity, force, damping: float, t: float, q: np.ndarray, p: np.ndarray, h: float,
+                  f_q: np.ndarray):
+    """Yoshida's triple jump of the symmetric strang_splitting step, fourth order also with damping."""
+    for weight in _YOSHIDA_WEIGHTS:
+        q, p, f_q = _strang_flow(velocity, force, damping, t, q, p, weight * h, f_q)
+        t += weight * h
+    return q, p, f_q
+
+
+def _split_step(flow, fcn, stats):
+    """
+    Fixed step function step(fcn, t, z, h, z_new) for _fixed_step_solve from a flow of
+    the split ODE. The force at the end of a step is reused by the next one as long as
+    the step starts from that state (an event may have replaced it).
+    """
+    split = getattr(fcn, 'split', None)
+    if split is None:
+        raise ValueError("The symplectic solvers need an ODE with a split() attribute, see damped_pendulum_split.")
+    velocity, force, damping = split()
+    if stats is not None:
+        force = InstrumentedODE(force, stats)
+    last = {'q': None, 'f_q': None}
+
+    def step(fcn, t, z, h, z_new):
+        n = len(z) // 2
+        q, p = z[:n], z[n:]
+        f_q = last['f_q'] if last['q'] is not None and np.array_equal(last['q'], q) else force(t, q)
+        q_new, p_new, last['f_q'] = flow(velocity, force, damping, t, q, p, h, f_q)
+        z_new[:n] = q_new
+        z_new[n:] = p_new
+        last['q'] = q_new
+    return step
+
+
+def _symplectic_solve(flow, solver, fcn, t_interval: list, z0: np.ndarray, h, out, breakpoints, events,
+                      stats, target_error) -> tuple:
+    h = _resolve_step_width(solver, fcn, t_interval, z0, h, target_error)
+    stats, fcn = _start_stats(stats, fcn)
+    step = _step_with_callback(_split_step(flow, fcn, stats), stats)
+    return _finish_stats(_fixed_step_solve(step, fcn, t_interval, z0, h, out, breakpoints, events), stats)
+
+
+def stormer_verlet(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                   breakpoints=None, events=None, stats=False, target_error: float = None):
+    """
+    Stormer-Verlet (leapfrog) method with fixed step width h, second order and
+    symmetric; symplectic without damping. The damping enters the kicks (linearly
+    implicit, no extra force evaluations). Needs fcn.split(), see module docstring.
+    Output handling, breakpoints, events, stats and h='auto' as in euler_explicit.
+    """
+    return _symplectic_solve(_generalized_verlet_flow, stormer_verlet, fcn, t_interval, z0, h, out, breakpoints,
+                             events, stats, target_error)
+
+
+def strang_splitting(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+                     breakpoints=None, events=None, stats=False, target_error: float = None):
+    """
+    Damping-aware Strang splitting with fixed step width h, second order: the damping
+    flow p -> exp(-damping*h/2) * p is solved exactly around a conservative
+    Stormer-Verlet step. Needs fcn.split(); arguments as in stormer_verlet.
+    """
+    return _symplectic_solve(_strang_flow, strang_splitting, fcn, t_interval, z0, h, out, breakpoints, events,
+                             stats, target_error)
+
+
+def yoshida4(fcn, t_interval: list, z0: np.ndarray, h: float, out: tuple = None,
+             breakpoints=None, events=None, stats=False, target_error: float = None):
+    """
+    Fourth order symplectic method of Yoshida with fixed step width h: three
+    strang_splitting substeps of widths w1*h, w0*h, w1*h (w0 < 0). Needs fcn.split();
+    arguments as in stormer_verlet.
+    """
+    return _symplectic_solve(_yoshida_flow, yoshida4, fcn, t_interval, z0, h, out, breakpoints, events,
+                             stats, target_error)
@@ -1,4 +1,5 @@
 import numpy as np
+from system_odes.load_profile import LoadProfile
 
 def get_battery_parameters():
     """Returns a dictionary of DP-Model parameters."""
@@ -14,41 +15,233 @@ def get_battery_parameters():
     }
 
 
+# Let's do a 20A pulse between 10s and 30s
+# and a small charging pulse (regen) between 60s and 70s (zero-order hold, each pulse ends before its end time)
+_load_profile = LoadProfile(times=[0.0, 10.0, 30.0, 60.0, 70.0],
+                            values=[0.0, 20.0, 0.0, -10.0, 0.0])
+
+
+def set_load_profile(load_profile: LoadProfile) -> None:
+    """Replaces the current profile used by the battery model, e.g. by a measured drive cycle."""
+    global _load_profile
+    _load_profile = load_profile
+    dp_ec_battery.breakpoints = get_current_breakpoints()
+    dp_ec_battery_vectorized.breakpoints = get_current_breakpoints()
+
+
+def get_load_profile() -> LoadProfile:
+    """Returns the active current profile."""
+    return _load_profile
+
+
 def current_profile(t):
     """
-    Returns current in Amperes.
+    Returns current in Amperes, for a scalar t or an array of times.
     Positive = Discharge, Negative = Charge.
+
+    The default profile holds 20 A on [10, 30) and -10 A on [60, 70): at exactly
+    t = 30 and t = 70 the current is already back to 0 A (the pulses used to include
+    their end points).
     """
-    # Let's do a 20A pulse between 10s and 30s
-    if 10.0 <= t <= 30.0:
-        return 20.0
-    # And a small charging pulse (regen) between 60s and 70s
-    elif 60.0 <= t <= 70.0:
-        return -10.0
-    else:
-        return 0.0
+    return _load_profile(t)
+
+def get_current_breakpoints():
+    """Returns the times [s] at which current_profile switches."""
+    return _load_profile.breakpoints
+
+
+def _coefficient(value):
+    """Plain float for scalar parameters (fast scalar arithmetic), float array otherwise."""
+    value = np.asarray(value, dtype=float)
+    return float(value) if value.ndim == 0 else value
+
+
+class BatteryModel:
+    """
+    DP-EC battery model with all coefficients precomputed once.
+
+    The parameters default to get_battery_parameters(), the current to the active
+    current_profile. Parameters may also be arrays of shape (n_runs,), which
+    broadcast against stacked states in rhs_vectorized (one parameter set per run).
+    """
+    __slots__ = ('R0', 'U_min', 'U_max', 'inv_Qn', 'inv_tau1', 'inv_C1', 'inv_tau2', 'inv_C2',
+                 'load_profile')
+
+    def __init__(self, params: dict = None, load_profile: LoadProfile = None) -> None:
+        if params is None:
+            params = get_battery_parameters()
+        p = {name: _coefficient(value) for name, value in params.items()}
+        self.R0 = p['R0']
+        self.U_min = p['U_min']
+        self.U_max = p['U_max']
+        self.inv_Qn = 1 / p['Qn']
+        self.inv_tau1 = 1 / (p['R1'] * p['C1'])
+        self.inv_C1 = 1 / p['C1']
+        self.inv_tau2 = 1 / (p['R2'] * p['C2'])
+        self.inv_C2 = 1 / p['C2']
+        self.load_profile = load_profile
+
+    def current(self, t):
+        """Current [A] at t (scalar or array); follows set_load_profile if no own profile is set."""
+        if self.load_profile is None:
+            return current_profile(t)
+        return self.load_profile(t)
+
+    @property
+    def breakpoints(self) -> np.ndarray:
+        if self.load_profile is None:
+            return get_current_breakpoints()
+        return self.load_profile.breakpoints
+
+    def rhs(self, t, z, out: np.ndarray = None) -> np.ndarray:
+        """dz/dt for a single state z = (soc, u1, u2), written into out if given."""
+        if out is None:
+            out = np.empty(3)
+        # Get current at time t (e.g., a pulse or constant discharge)
+        i = self.current(t)
+
+        # dSoC/dt (Current in Amperes, Qn in Ampere-seconds)
+        out[0] = -i * self.inv_Qn
+        # dU1/dt (Fast polarization)
+        out[1] = -z[1] * self.inv_tau1 + i * self.inv_C1
+        # dU2/dt (Slow polarization)
+        out[2] = -z[2] * self.inv_tau2 + i * self.inv_C2
+        return out
+
+    def rhs_vectorized(self, t, z, out: np.ndarray = None) -> np.ndarray:
+        """dz/dt for stacked states of shape (n_runs, 3), written into out if given."""
+        if out is None:
+            out = np.empty(np.shape(z))
+        # All runs share the same time, hence the same current
+        i = self.current(t)
+
+        out[..., 0] = -i * self.inv_Qn
+        out[..., 1] = -z[..., 1] * self.inv_tau1 + i * self.inv_C1
+        out[..., 2] = -z[..., 2] * self.inv_tau2 + i * self.inv_C2
+        return out
+
+    def jacobian(self, t, z) -> np.ndarray:
+        """
+        Analytic Jacobian d(rhs)/dz.
+        The current only enters as an additive input, so the Jacobian is constant.
+        """
+        return np.diag([0.0, -self.inv_tau1, -self.inv_tau2])
+
+    def state_space(self):
+        """
+        Returns (A, B, input_fcn) of the linear form dz/dt = A @ z + B * i(t),
+        with i(t) = input_fcn(t) the current profile.
+        With array parameters A and B are stacked per run: (n_runs, 3, 3) and (n_runs, 3).
+        """
+        shape = np.broadcast(self.inv_Qn, self.inv_tau1, self.inv_C1, self.inv_tau2, self.inv_C2).shape
+        A = np.zeros(shape + (3, 3))
+        A[..., 1, 1] = -self.inv_tau1
+        A[..., 2, 2] = -self.inv_tau2
+        B = np.empty(shape + (3,))
+        B[..., 0] = -self.inv_Qn
+        B[..., 1] = self.inv_C1
+        B[..., 2] = self.inv_C2
+        return A, B, self.current
+
+    def kernel_params(self) -> np.ndarray:
+        """
+        Coefficients and load profile packed into one float array for dp_ec_battery_kernel:
+        [inv_Qn, inv_tau1, inv_C1, inv_tau2, inv_C2, linear, n, times (n), values (n)].
+        Only scalar parameters are supported.
+        """
+        profile = self.load_profile if self.load_profile is not None else get_load_profile()
+        return np.concatenate([[self.inv_Qn, self.inv_tau1, self.inv_C1, self.inv_tau2, self.inv_C2,
+                                float(profile.interpolation == 'linear'), len(profile.times)],
+                               profile.times, profile.values])
+
+    def terminal_voltage(self, t, z):
+        """Terminal voltage U_term = U_oc(SoC) - U1 - U2 - i*R0 [V]."""
+        soc, u1, u2 = z[..., 0], z[..., 1], z[..., 2]
+        u_oc = self.U_min + (self.U_max - self.U_min) * soc
+        return u_oc - u1 - u2 - self.current(t) * self.R0
+
+
+_default_model = BatteryModel()
+
+
+def terminal_voltage(t, z):
+    """Terminal voltage U_term = U_oc(SoC) - U1 - U2 - i*R0 [V]."""
+    return _default_model.terminal_voltage(t, z)
+
+
+def voltage_limit_event(U_limit: float, terminal: bool = True, direction: float = 0):
+    """
+    Event function for the solvers that crosses zero when the terminal voltage reaches U_limit,
+    e.g. voltage_limit_event(get_battery_parameters()['U_min'], direction=-1) for the discharge cut-off.
+    """
+    def event(t, z):
+        return terminal_voltage(t, z) - U_limit
+
+    event.terminal = terminal
+    event.direction = direction
+    return event
+
 
 def dp_ec_battery(t, z):
-    soc, u1, u2 = z
+    return _default_model.rhs(t, z)
+
+
+def dp_ec_battery_vectorized(t, z):
+    """
+    Same dynamics as dp_ec_battery, but for stacked states.
+    z has shape (n_runs, 3), the result has the same shape.
+    """
+    return _default_model.rhs_vectorized(t, z)
+
 
-    params = get_battery_parameters()
-    R0 = params['R0']
-    R1 = params['R1']
-    R2 = params['R2']
-    C1 = params['C1']
-    C2 = params['C2']
-    Qn = params['Qn']
+def dp_ec_battery_jacobian(t, z):
+    """
+    Analytic Jacobian d(dp_ec_battery)/dz.
+    The current only enters as an additive input, so the Jacobian is constant.
+    """
+    return _default_model.jacobian(t, z)
 
-    # Get current at time t (e.g., a pulse or constant discharge)
-    i = current_profile(t)
 
-    # dSoC/dt (Current in Amperes, Qn in Ampere-seconds)
-    dsoc = -i / Qn
+def dp_ec_battery_kernel(t: float, z: np.ndarray, out: np.ndarray, params: np.ndarray) -> None:
+    """
+    Allocation free form of dp_ec_battery for the compiled solvers (solver.jit_solver):
+    writes dz/dt into out. params from BatteryModel.kernel_params(); the current is
+    looked up like in LoadProfile.
+    """
+    n = int(params[6])
+    times = params[7:7 + n]
+    values = params[7 + n:7 + 2 * n]
+    k = np.searchsorted(times, t, side='right') - 1
+    if k < 0:
+        i = values[0]
+    elif params[5] == 0.0 or k == n - 1:
+        i = values[k]
+    else:
+        i = values[k] + (t - times[k]) / (times[k + 1] - times[k]) * (values[k + 1] - values[k])
 
-    # dU1/dt (Fast polarization)
-    du1 = -u1 / (R1 * C1) + i / C1
+    out[0] = -i * params[0]
+    out[1] = -z[1] * params[1] + i * params[2]
+    out[2] = -z[2] * params[3] + i * params[4]
+
+
+def dp_ec_battery_kernel_params() -> np.ndarray:
+    """Kernel parameters of the default model with the active current profile."""
+    return _default_model.kernel_params()
+
+
+def get_battery_state_space():
+    """
+    Returns (A, B, input_fcn) of the linear form dz/dt = A @ z + B * i(t),
+    with i(t) = input_fcn(t) the current profile.
+    """
+    return _default_model.state_space()
 
-    # dU2/dt (Slow polarization)
-    du2 = -u2 / (R2 * C2) + i / C2
 
-    return np.array([dsoc, du1, du2])
\ No newline at end of file
+# Solvers pick these up when no explicit Jacobian / vectorized variant is passed
+dp_ec_battery.jacobian = dp_ec_battery_jacobian
+dp_ec_battery.vectorized = dp_ec_battery_vectorized
+dp_ec_battery.state_space = get_battery_state_space
+dp_ec_battery.kernel = dp_ec_battery_kernel
+dp_ec_battery.kernel_params = dp_ec_battery_kernel_params
+dp_ec_battery.breakpoints = get_current_breakpoints()
+dp_ec_battery_vectorized.breakpoints = get_current_breakpoints()
\ No newline at end of file
@@ -0,0 +1,86 @@
+from bisect import bisect_right
+import numpy as np
+
+class LoadProfile:
+    """
+    Current profile backed by sorted sample arrays.
+
+    Between samples the current is held (interpolation='zoh', the value of the last
+    sample at or before t) or interpolated linearly (interpolation='linear'). Outside
+    of the sample range the first / last value is held.
+
+    A zero-order hold is right-continuous: at a sample time the new value already
+    applies, so a pulse over [10, 30) is 0 again at exactly t = 30. Solvers that step
+    onto the jumps (see breakpoints) use the one-sided limits instead of these values.
+
+    Calls accept scalars and arrays. Scalar calls remember the last sample interval,
+    so the monotone time access of a solver is O(1) per call instead of a search.
+    """
+    times: np.ndarray
+    values: np.ndarray
+    interpolation: str
+
+    def __init__(self, times, values, interpolation: str = 'zoh') -> None:
+        self.times = np.asarray(times, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        if self.times.ndim != 1 or self.times.shape != self.values.shape or len(self.times) == 0:
+            raise ValueError("times and values must be non-empty 1D arrays of the same length.")
+        if np.any(np.diff(self.times) <= 0):
+            raise ValueError("times must be strictly increasing.")
+        if interpolation not in ('zoh', 'linear'):
+            raise ValueError(f"Unknown interpolation '{interpolation}', use 'zoh' or 'linear'.")
+        self.interpolation = interpolation
+
+        # Plain Python copies make the scalar path cheaper than NumPy scalar indexing
+        self._times_list = self.times.tolist()
+        self._values_list = self.values.tolist()
+        self._cursor = 0
+
+    @classmethod
+    def from_csv(cls, path: str, time_column: int = 0, current_column: int = 1,
+                 delimiter: str = ',', skip_header: int = 1, interpolation: str = 'zoh') -> 'LoadProfile':
+        """Loads a drive cycle from a CSV file with a time [s] and a current [A] column."""
+        data = np.genfromtxt(path, delimiter=delimiter, skip_header=skip_header,
+                             usecols=(time_column, current_column))
+        return cls(data[:, 0], data[:, 1], interpolation)
+
+    @classmethod
+    def from_npy(cls, path: str, interpolation: str = 'zoh') -> 'LoadProfile':
+        """Loads a drive cycle stored as an (N, 2) array of time [s] and current [A]."""
+        data = np.load(path)
+        return cls(data[:, 0], data[:, 1], interpolation)
+
+    @property
+    def breakpoints(self) -> np.ndarray:
+        """Times at which the profile is not smooth: jumps for 'zoh', kinks for 'linear'."""
+        if self.interpolation == 'zoh':
+            return self.times[1:][self.values[1:] != self.values[:-1]]
+        return self.times
+
+    def _scalar(self, t: float) -> float:
+        times = self._times_list
+        k = self._cursor
+        # Fast path: t is in the same or the next sample interval as in the last call
+        if not (times[k] <= t and (k + 1 == len(times) or t < times[k + 1])):
+            if k + 2 < len(times) and times[k + 1] <= t < times[k + 2]:
+                k += 1
+            else:
+                k = max(bisect_right(times, t) - 1, 0)
+            self._cursor = k
+
+        if t < times[0]:
+            return self._values_list[0]
+        if self.interpolation == 'zoh' or k + 1 == len(times):
+            return self._values_list[k]
+        weight = (t - times[k]) / (times[k + 1] - times[k])
+        return self._values_list[k] + weight * (self._values_list[k + 1] - self._values_list[k])
+
+    def __call__(self, t):
+        if np.ndim(t) == 0:
+            return self._scalar(float(t))
+
+        t = np.asarray(t, dtype=float)
+        if self.interpolation == 'linear':
+            return np.interp(t, self.times, self.values)
+        idx = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 1)
+        return self.values[idx]
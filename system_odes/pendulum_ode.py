@@ -1,5 +1,107 @@
 import numpy as np
 
+def get_pendulum_parameters():
+    """Returns a dictionary of damped pendulum parameters."""
+    return {
+        'g': 9.81,       # Gravitational acceleration [m/s^2]
+        'l': 1.0,        # Pendulum length [m]
+        'd': 0.3         # Damping coefficient [1/s]
+    }
+
+
 def damped_pendulum_ode(t: float, z: np.ndarray):
+    theta, omega = z
+
+    params = get_pendulum_parameters()
+    g = params['g']
+    l = params['l']
+    d = params['d']
+
+    dtheta = omega
+    domega = -g / l * np.sin(theta) - d * omega
+
+    return np.array([dtheta, domega])
+
+
+def damped_pendulum_ode_vectorized(t: float, z: np.ndarray):
+    """
+    Same dynamics as damped_pendulum_ode, but for stacked states.
+    z has shape (n_runs, 2), the result has the same shape.
+    """
+    params = get_pendulum_parameters()
+    g = params['g']
+    l = params['l']
+    d = params['d']
+
+    theta = z[..., 0]
+    omega = z[..., 1]
+
+    dz = np.empty_like(z, dtype=float)
+    dz[..., 0] = omega
+    dz[..., 1] = -g / l * np.sin(theta) - d * omega
+    return dz
+
+
+def damped_pendulum_jacobian(t: float, z: np.ndarray):
+    """Analytic Jacobian d(damped_pendulum_ode)/dz."""
+    params = get_pendulum_parameters()
+    g = params['g']
+    l = params['l']
+    d = params['d']
+
+    return np.array([[0.0, 1.0],
+                     [-g / l * np.cos(z[0]), -d]])
+
+
+def damped_pendulum_split():
+    """
+    Kinetic/potential splitting of damped_pendulum_ode for the symplectic solvers
+    (solver.symplectic_solver), with z = [theta, omega] = [q, p]:
+    dq/dt = velocity(t, p), dp/dt = force(t, q) - damping * p.
+    Returns (velocity, force, damping).
+    """
+    params = get_pendulum_parameters()
+    g = params['g']
+    l = params['l']
+    d = params['d']
+
+    def velocity(t: float, p: np.ndarray) -> np.ndarray:
+        return p
+
+    def force(t: float, q: np.ndarray) -> np.ndarray:
+        return -g / l * np.sin(q)
+
+    return velocity, force, d
+
+
+def damped_pendulum_energy(z: np.ndarray) -> np.ndarray:
+    """
+    Mechanical energy per unit m*l^2 of the states z (shape (2,) or (N, 2)),
+    zero at rest in the lower position. Without damping it is conserved.
+    """
+    params = get_pendulum_parameters()
+    theta = np.asarray(z)[..., 0]
+    omega = np.asarray(z)[..., 1]
+    return 0.5 * omega ** 2 + params['g'] / params['l'] * (1 - np.cos(theta))
+
+
+def damped_pendulum_kernel(t: float, z: np.ndarray, out: np.ndarray, params: np.ndarray) -> None:
+    """
+    Allocation free form of damped_pendulum_ode for the compiled solvers (solver.jit_solver):
+    writes dz/dt into out. params = [g, l, d] from damped_pendulum_kernel_params().
+    """
+    out[0] = z[1]
+    out[1] = -params[0] / params[1] * np.sin(z[0]) - params[2] * z[1]
+
+
+def damped_pendulum_kernel_params() -> np.ndarray:
+    params = get_pendulum_parameters()
+    return np.array([params['g'], params['l'], params['d']])
+
 
-    return # np.array(dz)
\ No newline at end of file
+# Solvers pick these up when no explicit Jacobian / vectorized variant is passed
+damped_pendulum_ode.jacobian = damped_pendulum_jacobian
+damped_pendulum_ode.vectorized = damped_pendulum_ode_vectorized
+damped_pendulum_ode.kernel = damped_pendulum_kernel
+damped_pendulum_ode.kernel_params = damped_pendulum_kernel_params
+damped_pendulum_ode.split = damped_pendulum_split
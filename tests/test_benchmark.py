@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+from analysis.benchmark import PROBLEMS, benchmark_run, _dense_reference
+from solver.exponential_solver import exponential_integrator
+
+
+class BenchmarkErrorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        spec = PROBLEMS['battery']
+        cls.reference = staticmethod(_dense_reference(spec['fcn'], spec['t_interval'], np.array(spec['z0'], dtype=float)))
+
+    def test_reference_matches_exact_battery_solution(self):
+        spec = PROBLEMS['battery']
+        t, u = exponential_integrator(spec['fcn'], list(spec['t_interval']), np.array(spec['z0'], dtype=float), 0.01)
+        np.testing.assert_allclose(self.reference(t), u, rtol=0, atol=1e-10)
+
+    def test_battery_error_resolves_the_step_width(self):
+        # The final state has relaxed at t = 100, the error after the load steps has not
+        errors = [benchmark_run('battery', 'RK4', h, repeat=1, reference=self.reference)['error']
+                  for h in (0.01, 0.005)]
+        self.assertGreater(errors[0], 1e-4)
+        self.assertGreater(np.log2(errors[0] / errors[1]), 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
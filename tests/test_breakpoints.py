@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+from solver.explicit_stepcontrol_solver import (stepcontrol_mid_point_rule, stepcontrol_dormand_prince,
+                                                stepcontrol_bogacki_shampine)
+from solver.explicit_solver import euler_explicit, RK4
+from solver.exponential_solver import exponential_integrator
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from solver.implicit_solver import euler_implicit, trapezoidal_rule, BDF2, stepcontrol_rosenbrock
+from solver.streaming import stream_stepcontrol_mid_point_rule, stream_euler_explicit, stream_RK4
+from system_odes.dp_ec_battery_model import dp_ec_battery
+
+Z0 = np.array([0.8, 0.0, 0.0])
+T_INTERVAL = [0.0, 100.0]
+# Just before and after the load steps at t = 30 and t = 70
+T_NEAR_BREAKPOINTS = np.array([29.9, 29.99, 30.01, 69.99, 70.01])
+
+
+def battery_reference(t_eval: np.ndarray) -> np.ndarray:
+    """Exact for the piecewise constant current, see solver.exponential_solver."""
+    return np.array([exponential_integrator(dp_ec_battery, [T_INTERVAL[0], t], Z0, 1e-3)[1][-1] for t in t_eval])
+
+
+class DenseOutputAtBreakpointsTest(unittest.TestCase):
+
+    def test_dense_output_matches_reference_next_to_breakpoints(self):
+        reference = battery_reference(T_NEAR_BREAKPOINTS)
+        for solver in (stepcontrol_mid_point_rule, stepcontrol_bogacki_shampine, stepcontrol_dormand_prince,
+                       stepcontrol_rosenbrock, stepcontrol_extrapolation):
+            with self.subTest(solver=solver.__name__):
+                dense_output = solver(dp_ec_battery, T_INTERVAL, Z0, rtol=1e-6, atol=1e-9, dense_output=True)[4]
+                np.testing.assert_allclose(dense_output(T_NEAR_BREAKPOINTS), reference, atol=1e-4)
+
+    def test_streamed_samples_match_reference_next_to_breakpoints(self):
+        chunks = stream_stepcontrol_mid_point_rule(dp_ec_battery, T_INTERVAL, Z0, rtol=1e-6, atol=1e-9,
+                                                   t_eval=T_NEAR_BREAKPOINTS)
+        z = np.concatenate([z for _, z in chunks])
+        np.testing.assert_allclose(z, battery_reference(T_NEAR_BREAKPOINTS), atol=1e-4)
+
+
+class FixedStepOrderWithBreakpointsTest(unittest.TestCase):
+    """The load steps must not reduce the order, also if the grid does not hit them."""
+
+    def assert_order(self, solver, order: float, step_widths=(0.07, 0.035)):
+        reference = battery_reference(T_INTERVAL[-1:])[0]
+        errors = [np.max(np.abs(solver(dp_ec_battery, T_INTERVAL, Z0, h)[1][-1] - reference)) for h in step_widths]
+        observed = np.log(errors[0] / errors[1]) / np.log(step_widths[0] / step_widths[1])
+        self.assertGreater(observed, order - 0.3, f"{solver.__name__}: errors {errors}")
+
+    def test_euler_implicit(self):
+        self.assert_order(euler_implicit, 1)
+
+    def test_trapezoidal_rule(self):
+        self.assert_order(trapezoidal_rule, 2)
+
+    def test_BDF2(self):
+        self.assert_order(BDF2, 2)
+
+
+class StreamingWithBreakpointsTest(unittest.TestCase):
+    """The streamed fixed-step solvers must step like their batch versions, also across the load steps."""
+
+    # The grid misses the breakpoints at 30 and 70
+    h = 0.007
+
+    def test_stream_matches_batch_solver(self):
+        for stream, solver in ((stream_euler_explicit, euler_explicit), (stream_RK4, RK4)):
+            with self.subTest(solver=solver.__name__):
+                chunks = list(stream(dp_ec_battery, T_INTERVAL, Z0, self.h, chunk_size=1000))
+                t, u = solver(dp_ec_battery, T_INTERVAL, Z0, self.h)
+                np.testing.assert_array_equal(np.concatenate([t for t, _ in chunks]), t)
+                np.testing.assert_array_equal(np.concatenate([z for _, z in chunks]), u)
+
+    def test_streamed_samples_match_reference_next_to_breakpoints(self):
+        chunks = stream_RK4(dp_ec_battery, T_INTERVAL, Z0, self.h, t_eval=T_NEAR_BREAKPOINTS)
+        z = np.concatenate([z for _, z in chunks])
+        # Stepping across the jumps instead is off by about 6e-3
+        np.testing.assert_allclose(z, battery_reference(T_NEAR_BREAKPOINTS), atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
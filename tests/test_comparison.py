@@ -0,0 +1,51 @@
+import os
+import unittest
+import numpy as np
+from analysis.comparison import comparison_cases, case_name, run_comparison
+
+
+class ComparisonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = comparison_cases(['RK4', 'stepcontrol_mid_point_rule'], odes=('pendulum', 'battery'),
+                                      h=[0.01], rtol=[1e-3])
+
+    def test_case_names_are_unique_across_odes(self):
+        names = [case_name(case) for case in self.cases]
+        self.assertEqual(len(names), 4)
+        self.assertEqual(len(set(names)), len(names))
+        self.assertIn('RK4 (battery, h=0.01)', names)
+
+    def test_parallel_run_matches_sequential_run(self):
+        parallel = run_comparison(self.cases, max_workers=2)
+        sequential = run_comparison(self.cases, max_workers=1)
+        self.assertEqual(list(parallel), [case_name(case) for case in self.cases])
+        for name, result in sequential.items():
+            with self.subTest(case=name):
+                for expected, actual in zip(result, parallel[name]):
+                    np.testing.assert_array_equal(actual, expected)
+
+    def test_parallel_run_restores_dense_outputs(self):
+        cases = comparison_cases(['stepcontrol_mid_point_rule', 'stepcontrol_extrapolation'], rtol=[1e-6],
+                                 dense_output=[True])
+        parallel = run_comparison(cases, max_workers=2)
+        sequential = run_comparison(cases, max_workers=1)
+        t_sample = np.linspace(0.0, 1.0, 11)
+        for name, result in sequential.items():
+            with self.subTest(case=name):
+                self.assertIs(type(parallel[name][4]), type(result[4]))
+                np.testing.assert_array_equal(parallel[name][4](t_sample), result[4](t_sample))
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "Needs /dev/shm to list shared memory blocks")
+    def test_failing_case_frees_the_blocks_of_the_others(self):
+        # RK4 does not accept rtol, so the middle case raises a TypeError in its worker
+        cases = [{'solver': 'RK4', 'h': 0.01}, {'solver': 'RK4', 'h': 0.01, 'rtol': 1e-3},
+                 {'solver': 'stepcontrol_mid_point_rule', 'rtol': 1e-3}]
+        blocks_before = set(os.listdir('/dev/shm'))
+        with self.assertRaises(TypeError):
+            run_comparison(cases, max_workers=3)
+        self.assertEqual(set(os.listdir('/dev/shm')) - blocks_before, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.dense_output import HermiteDenseOutput, PolynomialDenseOutput
+from solver.explicit_stepcontrol_solver import stepcontrol_mid_point_rule
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from system_odes.pendulum_ode import damped_pendulum_ode
+
+Z0 = np.array([np.deg2rad(75), 0.0])
+T_INTERVAL = [0.0, 5.0]
+
+
+class HermiteDenseOutputTest(unittest.TestCase):
+
+    def test_fourth_order_between_points(self):
+        errors = []
+        for h in (0.1, 0.05):
+            t = np.arange(0.0, 2 * np.pi, h)
+            dense_output = HermiteDenseOutput(t, np.sin(t)[:, None], np.cos(t)[:, None])
+            t_mid = (t[:-1] + t[1:]) / 2
+            errors.append(np.max(np.abs(dense_output(t_mid)[:, 0] - np.sin(t_mid))))
+            # Error bound of cubic Hermite interpolation, max |sin''''| = 1
+            self.assertLessEqual(errors[-1], h ** 4 / 384)
+        self.assertAlmostEqual(np.log2(errors[0] / errors[1]), 4.0, delta=0.05)
+
+    def test_scalar_and_array_times(self):
+        dense_output = HermiteDenseOutput([0.0, 1.0], [[0.0], [1.0]], [[1.0], [1.0]])
+        self.assertEqual(dense_output(0.5).shape, (1,))
+        self.assertEqual(dense_output([0.25, 0.5]).shape, (2, 1))
+        with self.assertRaises(ValueError):
+            dense_output(1.5)
+
+
+class PolynomialDenseOutputTest(unittest.TestCase):
+
+    def test_evaluates_the_step_polynomials(self):
+        # Steps [0, 1] and [1, 3] with x = (t - t_k) / w_k - 1/2, the first of lower degree
+        dense_output = PolynomialDenseOutput([0.0, 1.0, 3.0], [1.0, 2.0], [[[1.0], [2.0]], [[0.0], [1.0], [3.0]]])
+        t = np.array([0.0, 0.5, 1.0, 2.0, 3.0])
+        x = np.where(t < 1.0, t - 0.5, (t - 1.0) / 2 - 0.5)
+        expected = np.where(t < 1.0, 1 + 2 * x, x + 3 * x ** 2)
+        np.testing.assert_allclose(dense_output(t)[:, 0], expected, rtol=1e-15, atol=1e-15)
+
+
+class SolverDenseOutputTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = solve_ivp(damped_pendulum_ode, T_INTERVAL, Z0, method='DOP853', rtol=1e-13, atol=1e-13,
+                                  dense_output=True).sol
+
+    def assert_accurate_between_steps(self, t, u, dense_output):
+        np.testing.assert_allclose(dense_output(t), u, rtol=0, atol=1e-14)
+        # Between the steps the interpolant adds little to the global error at the steps
+        t_mid = (t[:-1] + t[1:]) / 2
+        error_steps = np.max(np.abs(u - self.reference(t).T))
+        error_mid = np.max(np.abs(dense_output(t_mid) - self.reference(t_mid).T))
+        self.assertLess(error_mid, 1.5 * error_steps)
+
+    def test_mid_point_rule(self):
+        for rtol in (1e-4, 1e-6):
+            with self.subTest(rtol=rtol):
+                t, u, _, _, dense_output = stepcontrol_mid_point_rule(damped_pendulum_ode, T_INTERVAL, Z0, rtol=rtol,
+                                                                      atol=rtol, dense_output=True)
+                self.assertIs(type(dense_output), HermiteDenseOutput)
+                self.assert_accurate_between_steps(t, u, dense_output)
+
+    def test_extrapolation(self):
+        for rtol in (1e-6, 1e-9):
+            with self.subTest(rtol=rtol):
+                t, u, _, _, dense_output = stepcontrol_extrapolation(damped_pendulum_ode, T_INTERVAL, Z0, rtol=rtol,
+                                                                     atol=rtol, dense_output=True)
+                self.assertIs(type(dense_output), PolynomialDenseOutput)
+                self.assert_accurate_between_steps(t, u, dense_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from visualization.downsample import minmax_indices, minmax_decimate, lttb_indices, interpolate_rows
+
+
+def signal(n: int = 10001) -> tuple:
+    t = np.linspace(0.0, 10.0, n)
+    values = np.column_stack([np.sin(7 * t) + 0.1 * np.cos(113 * t), np.exp(-t) * np.cos(31 * t)])
+    # Isolated spikes that plain resampling would miss
+    values[1234, 0] = 5.0
+    values[8765, 1] = -3.0
+    return t, values
+
+
+class MinMaxTest(unittest.TestCase):
+
+    def test_endpoints_and_extrema_are_kept(self):
+        t, values = signal()
+        bucket_width = 0.1
+        idx = minmax_indices(t, values, bucket_width)
+        self.assertEqual(idx[0], 0)
+        self.assertEqual(idx[-1], len(t) - 1)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertIn(1234, idx)
+        self.assertIn(8765, idx)
+
+        bucket = ((t - t[0]) // bucket_width).astype(int)
+        for b in np.unique(bucket):
+            in_bucket = bucket == b
+            kept = idx[in_bucket[idx]]
+            for column in values.T:
+                self.assertEqual(column[kept].min(), column[in_bucket].min())
+                self.assertEqual(column[kept].max(), column[in_bucket].max())
+            self.assertLessEqual(len(kept), 2 * values.shape[1] + 1)
+
+    def test_one_dimensional_values(self):
+        t, values = signal()
+        t_kept, values_kept = minmax_decimate(t, values[:, 0], 0.5)
+        self.assertEqual(values_kept.max(), values[:, 0].max())
+        self.assertEqual(values_kept.min(), values[:, 0].min())
+        self.assertEqual((t_kept[0], t_kept[-1]), (t[0], t[-1]))
+
+    def test_short_input_is_kept(self):
+        np.testing.assert_array_equal(minmax_indices(np.array([0.0, 1.0]), np.zeros((2, 3)), 0.1), [0, 1])
+
+    def test_interpolate_rows_matches_np_interp(self):
+        t = np.linspace(0.0, 10.0, 101)
+        values = np.column_stack([np.sin(t), t ** 2])
+        t_new = np.linspace(-1.0, 11.0, 257)
+        expected = np.column_stack([np.interp(t_new, t, column) for column in values.T])
+        np.testing.assert_allclose(interpolate_rows(t, values, t_new), expected, rtol=1e-14, atol=1e-14)
+
+
+class LTTBTest(unittest.TestCase):
+
+    def test_endpoints_and_one_point_per_bucket(self):
+        t, values = signal()
+        n_out = 200
+        idx = lttb_indices(t, values[:, 0], n_out)
+        self.assertEqual(len(idx), n_out)
+        self.assertEqual((idx[0], idx[-1]), (0, len(t) - 1))
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        # The inner points come one from each of the n_out - 2 buckets between the endpoints
+        starts = np.linspace(1, len(t) - 1, n_out - 1).astype(int)
+        np.testing.assert_array_equal(np.searchsorted(starts, idx[1:-1], side='right') - 1, np.arange(n_out - 2))
+
+    def test_spikes_are_kept(self):
+        t, values = signal()
+        self.assertIn(1234, lttb_indices(t, values[:, 0], 100))
+        self.assertIn(8765, lttb_indices(t, values[:, 1], 100))
+
+    def test_short_input_is_kept(self):
+        t = np.linspace(0.0, 1.0, 50)
+        np.testing.assert_array_equal(lttb_indices(t, np.sin(t), 100), np.arange(50))
+        np.testing.assert_array_equal(lttb_indices(t, np.sin(t), 2), np.arange(50))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from solver.explicit_solver import euler_explicit, RK4, euler_explicit_ensemble, RK4_ensemble
+from solver.jit_solver import euler_explicit_jit, RK4_jit
+from system_odes.dp_ec_battery_model import dp_ec_battery, dp_ec_battery_vectorized
+from system_odes.pendulum_ode import damped_pendulum_ode, damped_pendulum_ode_vectorized
+
+PENDULUM_Z0 = np.array([[0.1, 0.0], [1.0, -0.5], [np.deg2rad(75), 0.0], [3.0, 2.0]])
+BATTERY_Z0 = np.array([[0.8, 0.0, 0.0], [0.5, 0.01, -0.02], [0.2, 0.0, 0.03]])
+CASES = (
+    (damped_pendulum_ode, damped_pendulum_ode_vectorized, [0.0, 5.0], PENDULUM_Z0, 0.01),
+    # Crosses the load steps at 10, 30, 60 and 70 s
+    (dp_ec_battery, dp_ec_battery_vectorized, [0.0, 100.0], BATTERY_Z0, 0.005),
+)
+
+
+class EnsembleTest(unittest.TestCase):
+
+    def test_ensemble_matches_single_runs(self):
+        for single, ensemble in ((euler_explicit, euler_explicit_ensemble), (RK4, RK4_ensemble)):
+            for fcn, fcn_vectorized, t_interval, Z0, h in CASES:
+                with self.subTest(solver=ensemble.__name__, ode=fcn.__name__):
+                    t, u = ensemble(fcn_vectorized, t_interval, Z0, h)
+                    self.assertEqual(u.shape, (len(Z0), len(t), Z0.shape[1]))
+                    for z0, u_run in zip(Z0, u):
+                        t_single, u_single = single(fcn, t_interval, z0, h)
+                        np.testing.assert_array_equal(t, t_single)
+                        np.testing.assert_allclose(u_run, u_single, rtol=1e-12, atol=1e-14)
+
+    def test_jit_variants_accept_batches(self):
+        for single, jit in ((euler_explicit, euler_explicit_jit), (RK4, RK4_jit)):
+            with self.subTest(solver=jit.__name__):
+                t, u = jit(damped_pendulum_ode, [0.0, 5.0], PENDULUM_Z0, 0.01)[:2]
+                for z0, u_run in zip(PENDULUM_Z0, u):
+                    np.testing.assert_allclose(u_run, single(damped_pendulum_ode, [0.0, 5.0], z0, 0.01)[1],
+                                               rtol=1e-12, atol=1e-14)
+
+    def test_stats_count_one_call_per_run(self):
+        *_, stats = RK4_ensemble(damped_pendulum_ode_vectorized, [0.0, 1.0], PENDULUM_Z0, 0.1, stats=True)
+        self.assertEqual(stats.n_rhs, 4 * 10 * len(PENDULUM_Z0))
+
+
+if __name__ == '__main__':
+    unittest.main()
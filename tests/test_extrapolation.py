@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.dense_output import PolynomialDenseOutput
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from system_odes.pendulum_ode import damped_pendulum_ode
+
+Z0 = np.array([np.deg2rad(75), 0.0])
+T_INTERVAL = [0.0, 10.0]
+T_EVAL = np.arange(0.0, 10.0, 0.01)
+
+
+class ExtrapolationDenseOutputTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = solve_ivp(damped_pendulum_ode, T_INTERVAL, Z0, method='DOP853', rtol=1e-13, atol=1e-14,
+                                  dense_output=True).sol
+
+    def test_dense_output_keeps_step_accuracy(self):
+        for tol, atol in ((1e-6, 1e-4), (1e-9, 1e-7), (1e-12, 1e-10)):
+            with self.subTest(tol=tol):
+                t, _, _, _, dense_output, stats = stepcontrol_extrapolation(
+                    damped_pendulum_ode, T_INTERVAL, Z0, rtol=tol, atol=tol, dense_output=True, stats=True)
+                self.assertIsInstance(dense_output, PolynomialDenseOutput)
+                np.testing.assert_allclose(dense_output(T_EVAL), self.reference(T_EVAL).T, rtol=0, atol=atol)
+                # Long steps: far fewer RHS calls than grid points times the order
+                self.assertLess(stats.n_rhs, 5000)
+
+    def test_dense_output_reproduces_step_points(self):
+        t, u, _, _, dense_output = stepcontrol_extrapolation(damped_pendulum_ode, T_INTERVAL, Z0, rtol=1e-9,
+                                                             atol=1e-9, dense_output=True)
+        np.testing.assert_allclose(dense_output(t), u, rtol=0, atol=1e-12)
+
+    def test_dense_output_ends_at_terminal_event(self):
+        def zero_angle(t, z):
+            return z[0]
+        zero_angle.terminal = True
+        t, u, _, _, dense_output, t_events, _ = stepcontrol_extrapolation(
+            damped_pendulum_ode, T_INTERVAL, Z0, rtol=1e-9, atol=1e-9, dense_output=True, events=[zero_angle])
+        self.assertEqual(dense_output.t_max, t_events[0][0])
+        t_sample = np.linspace(0.0, t_events[0][0], 50)
+        np.testing.assert_allclose(dense_output(t_sample), self.reference(t_sample).T, rtol=0, atol=1e-7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from solver.jacobian import JacobianProvider
+from system_odes.dp_ec_battery_model import dp_ec_battery
+from system_odes.pendulum_ode import damped_pendulum_ode, damped_pendulum_jacobian
+
+
+class ConstantColumnsTest(unittest.TestCase):
+
+    def test_symmetric_column_is_not_frozen(self):
+        # cos(theta) has the same value at theta = -0.05 and +0.05
+        for jac in (None, damped_pendulum_jacobian):
+            with self.subTest(analytic=jac is not None):
+                provider = JacobianProvider(damped_pendulum_ode, jac)
+                provider(0.0, np.array([-0.05, 0.0]))
+                self.assertFalse(provider._constant_columns[0])
+                z = np.array([1.5, 0.3])
+                np.testing.assert_allclose(provider(1.0, z), damped_pendulum_jacobian(1.0, z), atol=1e-6)
+
+    def test_linear_columns_are_detected(self):
+        provider = JacobianProvider(damped_pendulum_ode)
+        provider(0.0, np.array([-0.05, 0.0]))
+        np.testing.assert_array_equal(provider._constant_columns, [False, True])
+
+    def test_linear_ode_is_constant(self):
+        provider = JacobianProvider(dp_ec_battery)
+        J = provider(0.0, np.array([0.8, 0.0, 0.0]))
+        self.assertTrue(provider.is_constant)
+        np.testing.assert_array_equal(provider(50.0, np.array([0.5, 0.01, 0.02])), J)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from system_odes.dp_ec_battery_model import current_profile, dp_ec_battery_kernel, dp_ec_battery_kernel_params
+from system_odes.load_profile import LoadProfile
+
+# Pulse starts and ends of the default profile, the current just before and at each of them
+T_SWITCH = np.array([10.0, 30.0, 60.0, 70.0])
+CURRENT_BEFORE = np.array([0.0, 20.0, 0.0, -10.0])
+CURRENT_AT = np.array([20.0, 0.0, -10.0, 0.0])
+
+
+class DefaultLoadProfileTest(unittest.TestCase):
+
+    def test_current_switches_at_pulse_start_and_end(self):
+        np.testing.assert_array_equal([current_profile(t) for t in T_SWITCH], CURRENT_AT)
+        np.testing.assert_array_equal([current_profile(np.nextafter(t, 0.0)) for t in T_SWITCH], CURRENT_BEFORE)
+
+    def test_array_and_kernel_agree_with_scalar_calls(self):
+        np.testing.assert_array_equal(current_profile(T_SWITCH), CURRENT_AT)
+        params = dp_ec_battery_kernel_params()
+        out = np.empty(3)
+        for t, current in zip(T_SWITCH, CURRENT_AT):
+            dp_ec_battery_kernel(t, np.zeros(3), out, params)
+            self.assertEqual(out[0], -current * params[0])
+
+
+class LoadProfileTest(unittest.TestCase):
+
+    def test_linear_interpolation_and_held_ends(self):
+        profile = LoadProfile([0.0, 10.0], [0.0, 5.0], interpolation='linear')
+        self.assertEqual(profile(-1.0), 0.0)
+        self.assertEqual(profile(4.0), 2.0)
+        self.assertEqual(profile(20.0), 5.0)
+        np.testing.assert_array_equal(profile(np.array([-1.0, 4.0, 20.0])), [0.0, 2.0, 5.0])
+
+    def test_zoh_breakpoints_skip_repeated_values(self):
+        profile = LoadProfile([0.0, 1.0, 2.0, 3.0], [1.0, 1.0, 2.0, 2.0])
+        np.testing.assert_array_equal(profile.breakpoints, [2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from solver.explicit_solver import euler_explicit, RK4, RK4_ensemble, time_grid
+from solver.exponential_solver import exponential_integrator
+from solver.implicit_solver import euler_implicit, trapezoidal_rule, BDF2
+from solver.jit_solver import euler_explicit_jit, RK4_jit
+from solver.symplectic_solver import stormer_verlet, yoshida4
+from system_odes.dp_ec_battery_model import dp_ec_battery
+from system_odes.pendulum_ode import damped_pendulum_ode, damped_pendulum_ode_vectorized
+
+PENDULUM = (damped_pendulum_ode, [0.0, 2.0], np.array([1.0, 0.0]), 0.01)
+BATTERY = (dp_ec_battery, [0.0, 100.0], np.array([0.8, 0.0, 0.0]), 0.1)
+SOLVERS = (
+    (euler_explicit, PENDULUM), (RK4, PENDULUM), (euler_explicit_jit, PENDULUM), (RK4_jit, PENDULUM),
+    (stormer_verlet, PENDULUM), (yoshida4, PENDULUM),
+    (euler_implicit, BATTERY), (trapezoidal_rule, BATTERY), (BDF2, BATTERY), (exponential_integrator, BATTERY),
+)
+
+
+def buffers(fcn, t_interval, z0, h) -> tuple:
+    n_points = len(time_grid(t_interval, h, getattr(fcn, 'breakpoints', ())))
+    return np.full(n_points, np.nan), np.full((n_points, len(z0)), np.nan)
+
+
+class OutputBufferTest(unittest.TestCase):
+
+    def test_results_are_written_into_the_buffers(self):
+        for solver, (fcn, t_interval, z0, h) in SOLVERS:
+            with self.subTest(solver=solver.__name__):
+                t_out, u_out = buffers(fcn, t_interval, z0, h)
+                t, u = solver(fcn, t_interval, z0, h, out=(t_out, u_out))[:2]
+                self.assertIs(t, t_out)
+                self.assertIs(u, u_out)
+                t_new, u_new = solver(fcn, t_interval, z0, h)[:2]
+                np.testing.assert_array_equal(t_out, t_new)
+                np.testing.assert_array_equal(u_out, u_new)
+
+    def test_buffers_are_reused_across_runs(self):
+        t_out, u_out = buffers(*PENDULUM)
+        for theta0 in (0.5, 1.0):
+            z0 = np.array([theta0, 0.0])
+            RK4(damped_pendulum_ode, [0.0, 2.0], z0, 0.01, out=(t_out, u_out))
+            np.testing.assert_array_equal(u_out, RK4(damped_pendulum_ode, [0.0, 2.0], z0, 0.01)[1])
+
+    def test_ensemble_buffers(self):
+        Z0 = np.array([[0.5, 0.0], [1.0, 0.0], [1.5, 0.0]])
+        t_out, u_out = np.empty(201), np.empty((3, 201, 2))
+        t, u = RK4_ensemble(damped_pendulum_ode_vectorized, [0.0, 2.0], Z0, 0.01, out=(t_out, u_out))
+        self.assertIs(u, u_out)
+        np.testing.assert_array_equal(u_out, RK4_ensemble(damped_pendulum_ode_vectorized, [0.0, 2.0], Z0, 0.01)[1])
+
+    def test_wrong_buffer_shape_raises(self):
+        with self.assertRaises(ValueError):
+            RK4(damped_pendulum_ode, [0.0, 2.0], np.array([1.0, 0.0]), 0.01, out=(np.empty(200), np.empty((200, 2))))
+
+
+if __name__ == '__main__':
+    unittest.main()
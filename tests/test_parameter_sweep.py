@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from analysis.parameter_sweep import SweepStore, run_key, run_sweep, sample_parameters
+
+
+class Interrupted(Exception):
+    pass
+
+
+def sorted_by_key(columns: dict) -> dict:
+    order = np.argsort(columns['key'])
+    return {name: values[order] for name, values in columns.items()}
+
+
+class ResumeSweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.parameter_sets = sample_parameters({'R0': ('uniform', 0.004, 0.006), 'C1': ('normal', 2000.0, 200.0)},
+                                                n_samples=10, seed=3)
+        self.settings = dict(t_interval=(0.0, 20.0), h=0.1, batch_size=3)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resumed_sweep_matches_single_process_run(self):
+        write_batch = SweepStore.write_batch
+        calls = []
+
+        def interrupt_after_two_batches(store, columns):
+            if len(calls) == 2:
+                raise Interrupted()
+            calls.append(columns['key'])
+            write_batch(store, columns)
+
+        resumed_dir = f'{self._tmp.name}/resumed'
+        with mock.patch.object(SweepStore, 'write_batch', interrupt_after_two_batches):
+            with self.assertRaises(Interrupted):
+                run_sweep(self.parameter_sets, resumed_dir, max_workers=2, **self.settings)
+        self.assertEqual(len(SweepStore(resumed_dir).completed_keys()), 6)
+
+        resumed = run_sweep(self.parameter_sets, resumed_dir, max_workers=2, **self.settings)
+        single = run_sweep(self.parameter_sets, f'{self._tmp.name}/single', max_workers=1, **self.settings)
+
+        expected_keys = {run_key(params) for params in self.parameter_sets}
+        self.assertEqual(resumed.completed_keys(), expected_keys)
+        self.assertEqual(single.completed_keys(), expected_keys)
+
+        t_resumed, columns_resumed = resumed.load()
+        t_single, columns_single = single.load()
+        np.testing.assert_array_equal(t_resumed, t_single)
+        self.assertEqual(len(columns_resumed['key']), len(self.parameter_sets))
+        columns_resumed, columns_single = sorted_by_key(columns_resumed), sorted_by_key(columns_single)
+        for name, values in columns_single.items():
+            with self.subTest(column=name):
+                np.testing.assert_array_equal(columns_resumed[name], values)
+
+
+if __name__ == '__main__':
+    unittest.main()
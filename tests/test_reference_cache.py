@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from system_odes.pendulum_ode import damped_pendulum_ode, get_pendulum_parameters
+from visualization.pendulum.reference_cache import ReferenceCache, reference_key
+
+
+def key(**kwargs) -> str:
+    arguments = dict(fcn=damped_pendulum_ode, z0=[0.5, 0.0], t_span=(0.0, 10.0), rtol=1e-12, atol=1e-12,
+                     step_width=0.01, method='GBS', params=get_pendulum_parameters())
+    return reference_key(**dict(arguments, **kwargs))
+
+
+class ReferenceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_hit_skips_compute(self):
+        cache = ReferenceCache(os.path.join(self._tmp.name, 'cache'))
+        data = np.arange(6.0).reshape(2, 3)
+        np.testing.assert_array_equal(cache.get_or_compute('a', lambda: data), data)
+        np.testing.assert_array_equal(cache.get_or_compute('a', lambda: self.fail('recomputed')), data)
+
+    def test_unwritable_directory_returns_computed_array(self):
+        # The cache directory cannot be created below a regular file
+        blocker = os.path.join(self._tmp.name, 'file')
+        open(blocker, 'w').close()
+        cache = ReferenceCache(os.path.join(blocker, 'cache'))
+        data = np.ones((2, 3))
+        np.testing.assert_array_equal(cache.get_or_compute('a', lambda: data), data)
+
+    def test_key_depends_on_solver(self):
+        self.assertEqual(key(solver=(stepcontrol_extrapolation,)), key(solver=(stepcontrol_extrapolation,)))
+        self.assertNotEqual(key(), key(solver=(stepcontrol_extrapolation,)))
+        self.assertNotEqual(key(), key(rtol=1e-10))
+
+
+if __name__ == '__main__':
+    unittest.main()
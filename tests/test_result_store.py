@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from analysis.result_store import ResultWriter, open_run, save_run
+from system_odes.pendulum_ode import damped_pendulum_ode, get_pendulum_parameters
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'run')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_round_trip(self):
+        t = np.linspace(0.0, 1.0, 11)
+        z = np.column_stack([np.sin(t), np.cos(t)])
+        h = np.full(11, 0.1)
+        save_run(self.path, t, z, h, solver='RK4', ode=damped_pendulum_ode, params=get_pendulum_parameters(),
+                 tolerances={'h': 0.1})
+        run = open_run(self.path)
+        np.testing.assert_array_equal(run.t, t)
+        np.testing.assert_array_equal(run.z, z)
+        np.testing.assert_array_equal(run.h, h)
+        self.assertIsNone(run.error)
+        self.assertTrue(run.complete)
+        self.assertEqual(run.metadata['ode'], 'damped_pendulum_ode')
+        self.assertEqual(run.metadata['params'], get_pendulum_parameters())
+        t_run, z_run = run
+        self.assertIs(t_run, run.t)
+        self.assertIn('n_points=11', repr(run))
+
+    def test_chunks_are_appended(self):
+        with ResultWriter(self.path, solver='RK4') as writer:
+            for start in range(0, 10, 4):
+                t = np.arange(start, min(start + 4, 10), dtype=float)
+                writer.write(t, np.column_stack([t, -t]))
+        run = open_run(self.path)
+        np.testing.assert_array_equal(run.t, np.arange(10.0))
+        np.testing.assert_array_equal(run.z[:, 1], -np.arange(10.0))
+
+    def test_interrupted_run_is_readable(self):
+        writer = ResultWriter(self.path, solver='RK4')
+        writer.write(np.arange(3.0), np.zeros((3, 2)))
+        run = open_run(self.path)
+        self.assertFalse(run.complete)
+        self.assertEqual(len(run.t), 3)
+        writer.close()
+
+    def test_empty_run(self):
+        ResultWriter(self.path, solver='RK4').close()
+        run = open_run(self.path)
+        self.assertEqual(len(run.t), 0)
+        self.assertEqual(len(run.z), 0)
+        self.assertIn('n_points=0', repr(run))
+        t, z = run.decimated(1.0)
+        self.assertEqual((len(t), len(z)), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.implicit_solver import stepcontrol_rosenbrock
+from solver.stats import InstrumentedODE, SolverStats
+from solver.symplectic_solver import stormer_verlet
+from system_odes.pendulum_ode import damped_pendulum_ode
+
+Z0 = np.array([1.0, 0.0])
+
+
+class InstrumentedODETest(unittest.TestCase):
+
+    def test_counts_calls_of_external_solvers(self):
+        stats = SolverStats()
+        counted = InstrumentedODE(damped_pendulum_ode, stats, count_attributes=True)
+        sol = solve_ivp(counted, [0.0, 5.0], Z0, method='BDF', jac=counted.jacobian)
+        self.assertEqual(stats.n_rhs, sol.nfev)
+        self.assertEqual(stats.n_jacobian, sol.njev)
+
+    def test_counts_split_forces(self):
+        stats = SolverStats()
+        stormer_verlet(InstrumentedODE(damped_pendulum_ode, stats, count_attributes=True), [0.0, 1.0], Z0, 0.01)
+        self.assertEqual(stats.n_rhs, 101)
+
+    def test_matches_the_solver_stats(self):
+        stats = SolverStats()
+        own_stats = stepcontrol_rosenbrock(InstrumentedODE(damped_pendulum_ode, stats, count_attributes=True),
+                                           [0.0, 5.0], Z0, rtol=1e-4, stats=True)[-1]
+        self.assertEqual(stats.n_rhs, own_stats.n_rhs)
+        self.assertEqual(stats.n_jacobian, own_stats.n_jacobian)
+
+
+if __name__ == '__main__':
+    unittest.main()
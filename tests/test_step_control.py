@@ -0,0 +1,48 @@
+import unittest
+import warnings
+import numpy as np
+from solver.explicit_stepcontrol_solver import (stepcontrol_mid_point_rule, stepcontrol_dormand_prince,
+                                                stepcontrol_bogacki_shampine)
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from solver.implicit_solver import stepcontrol_rosenbrock
+from solver.jit_solver import stepcontrol_mid_point_rule_jit
+
+ADAPTIVE_SOLVERS = (stepcontrol_mid_point_rule, stepcontrol_bogacki_shampine, stepcontrol_dormand_prince,
+                    stepcontrol_extrapolation, stepcontrol_rosenbrock, stepcontrol_mid_point_rule_jit)
+
+
+def nan_after_half(t: float, z: np.ndarray) -> np.ndarray:
+    return -z if t <= 0.5 else np.full_like(z, np.nan)
+
+
+def blow_up(t: float, z: np.ndarray) -> np.ndarray:
+    # z = 1 / (1 - t), singular at t = 1
+    return z ** 2
+
+
+class StepRejectionTest(unittest.TestCase):
+
+    def test_nan_error_is_rejected(self):
+        for solver in ADAPTIVE_SOLVERS:
+            with self.subTest(solver=solver.__name__), warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                with self.assertRaises(RuntimeError):
+                    solver(nan_after_half, [0.0, 1.0], np.array([1.0]))
+
+    def test_singularity_raises_instead_of_stalling(self):
+        for solver in ADAPTIVE_SOLVERS:
+            with self.subTest(solver=solver.__name__), warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                with self.assertRaises(RuntimeError):
+                    solver(blow_up, [0.0, 2.0], np.array([1.0]), rtol=1e-6, atol=1e-9)
+
+    def test_accepted_points_are_finite(self):
+        for solver in ADAPTIVE_SOLVERS:
+            with self.subTest(solver=solver.__name__):
+                t, u = solver(blow_up, [0.0, 0.9], np.array([1.0]), rtol=1e-6, atol=1e-9)[:2]
+                self.assertTrue(np.all(np.isfinite(u)))
+                np.testing.assert_allclose(u[-1, 0], 10.0, rtol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.explicit_solver import euler_explicit, RK4
+from solver.exponential_solver import exponential_integrator
+from solver.step_size import auto_step_width, clear_step_width_cache
+from system_odes.dp_ec_battery_model import dp_ec_battery
+from system_odes.pendulum_ode import damped_pendulum_ode
+
+Z0 = np.array([np.deg2rad(75), 0.0])
+T_INTERVAL = [0.0, 5.0]
+BATTERY_Z0 = np.array([0.8, 0.0, 0.0])
+BATTERY_T_INTERVAL = [0.0, 100.0]
+
+
+class CountedODE:
+    """Counts the calls of fcn; a new object per test, so auto_step_width does not reuse memoized results."""
+
+    def __init__(self, fcn) -> None:
+        self.fcn = fcn
+        self.breakpoints = getattr(fcn, 'breakpoints', ())
+        self.n_calls = 0
+
+    def __call__(self, t, z):
+        self.n_calls += 1
+        return self.fcn(t, z)
+
+
+class AutoStepWidthTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = solve_ivp(damped_pendulum_ode, T_INTERVAL, Z0, method='DOP853', rtol=1e-13,
+                                  atol=1e-13, dense_output=True).sol
+
+    def setUp(self):
+        clear_step_width_cache()
+
+    def test_achieved_error_is_close_to_target(self):
+        for solver, target_error in ((euler_explicit, 1e-2), (RK4, 1e-4), (RK4, 1e-6)):
+            with self.subTest(solver=solver.__name__, target_error=target_error):
+                t, u = solver(damped_pendulum_ode, T_INTERVAL, Z0, h='auto', target_error=target_error)
+                error = np.max(np.abs(u - self.reference(t).T))
+                self.assertLess(error, target_error)
+                # Not more than a few times more accurate (and expensive) than asked for
+                self.assertGreater(error, 0.2 * target_error)
+
+    def test_battery_error_over_the_trajectory(self):
+        # The load steps excite transients that have decayed by the end of the interval
+        h = auto_step_width(RK4, dp_ec_battery, BATTERY_T_INTERVAL, BATTERY_Z0, 1e-3)
+        t, u = RK4(dp_ec_battery, BATTERY_T_INTERVAL, BATTERY_Z0, h)
+        # Exact on the same grid, see solver.exponential_solver
+        error = np.max(np.abs(u - exponential_integrator(dp_ec_battery, BATTERY_T_INTERVAL, BATTERY_Z0, h)[1]))
+        self.assertLess(error, 1e-3)
+        self.assertGreater(error, 1e-4)
+
+    def test_pilots_cost_less_than_the_final_run(self):
+        for fcn, t_interval, z0, target_error in ((damped_pendulum_ode, T_INTERVAL, Z0, 1e-6),
+                                                 (dp_ec_battery, BATTERY_T_INTERVAL, BATTERY_Z0, 1e-4)):
+            with self.subTest(fcn=fcn.__name__):
+                counted = CountedODE(fcn)
+                h = auto_step_width(RK4, counted, t_interval, z0, target_error)
+                pilot_calls, counted.n_calls = counted.n_calls, 0
+                RK4(counted, t_interval, z0, h)
+                self.assertLess(pilot_calls, counted.n_calls)
+
+    def test_unreachable_target_raises(self):
+        with self.assertRaisesRegex(ValueError, 'max_steps'):
+            auto_step_width(euler_explicit, damped_pendulum_ode, T_INTERVAL, Z0, 1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
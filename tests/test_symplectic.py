@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from solver.explicit_solver import RK4
+from solver.symplectic_solver import stormer_verlet, strang_splitting, yoshida4
+
+G = 9.81
+Z0 = np.array([np.deg2rad(75), 0.0])
+
+
+def undamped_pendulum(t: float, z: np.ndarray) -> np.ndarray:
+    return np.array([z[1], -G * np.sin(z[0])])
+
+
+def undamped_pendulum_split():
+    return (lambda t, p: p), (lambda t, q: -G * np.sin(q)), 0.0
+
+
+undamped_pendulum.split = undamped_pendulum_split
+
+
+def energy(z: np.ndarray) -> np.ndarray:
+    return 0.5 * z[..., 1] ** 2 + G * (1 - np.cos(z[..., 0]))
+
+
+class SymplecticSolverTest(unittest.TestCase):
+
+    def test_energy_error_stays_bounded_at_equal_cost(self):
+        # Four RHS calls per RK4 step, one force per Stormer-Verlet step, three per yoshida4 step
+        energy_errors = {}
+        for solver, h in ((RK4, 0.2), (stormer_verlet, 0.05), (yoshida4, 0.15)):
+            t, u, stats = solver(undamped_pendulum, [0.0, 1000.0], Z0, h, stats=True)
+            self.assertAlmostEqual(stats.n_rhs, 20000, delta=5)
+            energy_errors[solver.__name__] = np.abs(energy(u) - energy(Z0))
+
+        rk4 = energy_errors.pop('RK4')
+        for name, error in energy_errors.items():
+            with self.subTest(solver=name):
+                self.assertLess(error.max(), 0.01 * rk4[-1])
+                # No drift: the last tenth is no worse than the first
+                n = len(error) // 10
+                self.assertLess(error[-n:].max(), 1.01 * error[:n].max())
+
+    def test_order_on_undamped_pendulum(self):
+        reference = solve_ivp(undamped_pendulum, [0.0, 10.0], Z0, method='DOP853', rtol=1e-13, atol=1e-13).y[:, -1]
+        for solver, order in ((stormer_verlet, 2), (strang_splitting, 2), (yoshida4, 4)):
+            with self.subTest(solver=solver.__name__):
+                errors = [np.max(np.abs(solver(undamped_pendulum, [0.0, 10.0], Z0, h)[1][-1] - reference))
+                          for h in (0.04, 0.02, 0.01)]
+                observed = np.log2(np.array(errors[:-1]) / np.array(errors[1:]))
+                np.testing.assert_allclose(observed, order, atol=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
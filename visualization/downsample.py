@@ -0,0 +1,102 @@
+"""
+Downsampling of long solver outputs for plotting and animation.
+
+Plain interpolation onto a coarse grid misses peaks that fall between grid points.
+Min/max decimation instead splits the time axis into buckets and keeps, per bucket
+and state component, the samples with the smallest and the largest value, so the
+envelope of the signal survives. All functions work on all components in one pass
+and return indices, so the caller decides whether to copy.
+
+For a single line, lttb_indices (Largest-Triangle-Three-Buckets) keeps a fixed number
+of points that preserve the visual shape.
+"""
+
+import numpy as np
+
+
+def _bucket_starts(values_time: np.ndarray, bucket_width: float):
+    """Bucket number of every sample and the index of the first sample of every bucket."""
+    bucket = ((values_time - values_time[0]) // bucket_width).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    return starts
+
+
+def _first_per_bucket(is_extreme: np.ndarray, bucket_of_sample: np.ndarray) -> np.ndarray:
+    candidates = np.flatnonzero(is_extreme)
+    _, first = np.unique(bucket_of_sample[candidates], return_index=True)
+    return candidates[first]
+
+
+def minmax_indices(values_time: np.ndarray, values: np.ndarray, bucket_width: float) -> np.ndarray:
+    """
+    Sorted indices of the samples to keep: per bucket of width bucket_width, the minimum
+    and maximum of every component of values (shape (N,) or (N, dof)), plus the first
+    and the last sample. At most 2 * dof + 1 samples per bucket are kept.
+    """
+    values_time = np.asarray(values_time)
+    values = np.asarray(values).reshape(len(values_time), -1)
+    n = len(values_time)
+    if n <= 2:
+        return np.arange(n)
+
+    starts = _bucket_starts(values_time, bucket_width)
+    bucket_of_sample = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+
+    keep = [np.array([0, n - 1])]
+    for column in values.T:
+        keep.append(_first_per_bucket(column == np.minimum.reduceat(column, starts)[bucket_of_sample],
+                                      bucket_of_sample))
+        keep.append(_first_per_bucket(column == np.maximum.reduceat(column, starts)[bucket_of_sample],
+                                      bucket_of_sample))
+    return np.unique(np.concatenate(keep))
+
+
+def minmax_decimate(values_time: np.ndarray, values: np.ndarray, bucket_width: float):
+    """(values_time, values) reduced to the samples selected by minmax_indices."""
+    idx = minmax_indices(values_time, values, bucket_width)
+    return np.asarray(values_time)[idx], np.asarray(values)[idx]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Sorted indices of n_out points of the line (x, y) chosen by Largest-Triangle-Three-
+    Buckets: the first and last point, and per bucket the point spanning the largest
+    triangle with the previously kept point and the mean of the next bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the first and the last point, which is its own last bucket
+    starts = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(np.append(starts, n))
+    mean_x = np.add.reduceat(x, starts) / counts
+    mean_y = np.add.reduceat(y, starts) / counts
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = starts[b], starts[b + 1]
+        area = np.abs((x[a] - mean_x[b + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[b + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[b + 1] = a
+    return idx
+
+
+def interpolate_rows(values_time: np.ndarray, values: np.ndarray, time_new: np.ndarray) -> np.ndarray:
+    """
+    Linear interpolation of all components of values (N, dof) at time_new in one pass:
+    the interval search and the weights are computed once instead of once per component
+    as with np.interp. Outside of values_time the first / last row is held.
+    """
+    values_time = np.asarray(values_time)
+    values = np.asarray(values)
+    k = np.clip(np.searchsorted(values_time, time_new, side='right') - 1, 0, len(values_time) - 2)
+    weight = (time_new - values_time[k]) / (values_time[k + 1] - values_time[k])
+    np.clip(weight, 0.0, 1.0, out=weight)
+    weight = weight.astype(values.dtype, copy=False).reshape((-1,) + (1,) * (values.ndim - 1))
+    return values[k] + weight * (values[k + 1] - values[k])
@@ -1,25 +1,41 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from system_odes.dp_ec_battery_model import get_battery_parameters, current_profile
-from visualization.helper import smart_plot
+from visualization.helper import smart_plot, plot_downsampled
+
+# Stored runs (analysis.result_store) are min/max decimated to this many time buckets
+PLOT_BUCKETS = 4000
+
+
+def _in_memory(run):
+    """(t, z) of a solver result or of a stored run, which may be larger than memory."""
+    if hasattr(run, 'decimated'):
+        return run.decimated((run.t[-1] - run.t[0]) / PLOT_BUCKETS)
+    return run
+
 
 def get_plotting_data(t_arr, z_arr):
-    """Computes U_term, U_oc, and current array for plotting."""
+    """Computes the current, U_term, U1, U2 and SoC arrays for plotting."""
     params = get_battery_parameters()
     R0 = params['R0']
     U_min, U_max = params['U_min'], params['U_max']
 
     # Handle shape: we need (N, 3) for the unpacking below
-    if z_arr.shape[0] == 3 and z_arr.shape[1] != 3:
-        z_arr = z_arr.T
-
-    soc = z_arr[:, 0]
-    u1 = z_arr[:, 1]
-    u2 = z_arr[:, 2]
-
-    i_arr = np.array([current_profile(t) for t in t_arr])
-    u_oc = U_min + (U_max - U_min) * soc
-    u_term = u_oc - u1 - u2 - i_arr * R0
+    z = np.asarray(z_arr)
+    if z.shape[0] == 3 and z.shape[1] != 3:
+        z = z.T
+
+    soc = z[:, 0]
+    u1 = z[:, 1]
+    u2 = z[:, 2]
+
+    # U_term = U_oc(SoC) - U1 - U2 - i*R0, built in place to avoid temporaries of full length
+    i_arr = current_profile(t_arr)
+    u_term = (U_max - U_min) * soc
+    u_term += U_min
+    u_term -= u1
+    u_term -= u2
+    u_term -= R0 * i_arr
 
     return i_arr, u_term, u1, u2, soc
 
@@ -27,7 +43,9 @@ def get_plotting_data(t_arr, z_arr):
 def visualize_dp_ec_battery(results_dict):
     """
     results_dict: { "Solver Name": (t_array, z_array), ... }
+    A value may also be a StoredRun of analysis.result_store.
     """
+    results_dict = {name: _in_memory(run) for name, run in results_dict.items()}
     # 4 Rows: Effort, Input, State, Output
     fig, (ax_curr, ax_soc, ax_term,  ax_volt_1, ax_volt_2) = plt.subplots(5, 1, figsize=(11, 14), sharex=True,
                                                              gridspec_kw={'height_ratios': [0.8, 0.8, 1, 1, 1]})
@@ -37,30 +55,32 @@ def visualize_dp_ec_battery(results_dict):
     fig.suptitle('Battery Model Comparison: ' + ' vs '.join(counts),
                  fontsize=14, fontweight='bold', y=0.98)
 
+    # Calculate plotting vectors once per run
+    plotting_data = {name: get_plotting_data(t, z) for name, (t, z) in results_dict.items()}
+
+    # Lines are downsampled to the axis width, so drawing time does not grow with the run length
     for name, (t, z) in results_dict.items():
-        # Calculate plotting vectors
-        i_arr, u_term, u1, u2, soc = get_plotting_data(t, z)
+        i_arr, u_term, u1, u2, soc = plotting_data[name]
 
         # Plot 1: Cumulative Steps (Workload)
-        ax_curr.plot(t, i_arr, label=name)
+        plot_downsampled(ax_curr, t, i_arr, label=name)
 
         # Plot 2: SoC
-        ax_soc.plot(t, soc * 100, label=f"SoC ({name})")
+        plot_downsampled(ax_soc, t, soc * 100, label=f"SoC ({name})")
 
         # Plot 3: U terminal
-        ax_term.plot(t, u_term, label=f"U_terminal ({name})")
+        plot_downsampled(ax_term, t, u_term, label=f"U_terminal ({name})")
 
         # Plot 4: Voltage 1
-        ax_volt_1.plot(t, u1, label=f"U_1 (fast - {name})")
+        plot_downsampled(ax_volt_1, t, u1, label=f"U_1 (fast - {name})")
 
         # Plot 5: Voltage 2
-        ax_volt_2.plot(t, u2, label=f"U_2 (slow - {name})")
+        plot_downsampled(ax_volt_2, t, u2, label=f"U_2 (slow - {name})")
 
 
-    # Row 1 Styling: Current Profile (Common to all)
-    t_first, _ = next(iter(results_dict.values()))
-    i_vals = [current_profile(ti) for ti in t_first]
-    ax_curr.plot(t_first, i_vals, 'k-', linewidth=1.5)
+    # Row 1 Styling: Current Profile (Common to all), the current of the first run
+    first_name, (t_first, _) = next(iter(results_dict.items()))
+    plot_downsampled(ax_curr, t_first, plotting_data[first_name][0], 'k-', linewidth=1.5)
     ax_curr.set_ylabel('Current / A')
     ax_curr.set_title('Load Profile')
     ax_curr.grid(True, alpha=0.3)
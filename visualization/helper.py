@@ -1,5 +1,7 @@
 import os
+import numpy as np
 import matplotlib.pyplot as plt
+from visualization.downsample import minmax_indices, lttb_indices
 
 def smart_plot(fig, filename="plot_output.png"):
     """
@@ -14,4 +16,41 @@ def smart_plot(fig, filename="plot_output.png"):
         print(f"✅ Success! Click '{filename}' in the sidebar to view.")
     else:
         print("💻 Local detected: Opening plot window...")
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+
+def _downsampled(ax, t: np.ndarray, y: np.ndarray, method: str, t_lo: float, t_hi: float):
+    """The part of (t, y) within [t_lo, t_hi], reduced to about two points per pixel of ax."""
+    lo = max(np.searchsorted(t, t_lo, side='right') - 1, 0)
+    hi = min(np.searchsorted(t, t_hi, side='left') + 1, len(t))
+    t, y = t[lo:hi], y[lo:hi]
+    pixels = max(int(ax.bbox.width), 100)
+    if len(t) <= 2 * pixels:
+        return t, y
+    if method == 'lttb':
+        idx = lttb_indices(t, y, 2 * pixels)
+    else:
+        idx = minmax_indices(t, y, (t[-1] - t[0]) / pixels)
+    return t[idx], y[idx]
+
+
+def plot_downsampled(ax, t, y, *args, method: str = 'minmax', **kwargs):
+    """
+    ax.plot(t, y, ...) for long series: only about two points per pixel of the axis width
+    are drawn, chosen by min/max decimation (keeps every peak) or 'lttb'. The line is
+    re-sampled from the full data when the x limits change, e.g. when zooming in.
+    """
+    if method not in ('minmax', 'lttb'):
+        raise ValueError(f"Unknown method '{method}', use 'minmax' or 'lttb'.")
+    t = np.asarray(t)
+    y = np.asarray(y)
+    if len(t) < 2:
+        return ax.plot(t, y, *args, **kwargs)[0]
+
+    line, = ax.plot(*_downsampled(ax, t, y, method, t[0], t[-1]), *args, **kwargs)
+
+    def refresh(ax) -> None:
+        line.set_data(*_downsampled(ax, t, y, method, *ax.get_xlim()))
+
+    ax.callbacks.connect('xlim_changed', refresh)
+    return line
@@ -1,33 +1,55 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 import numpy as np
-from scipy.integrate import solve_ivp
-from system_odes.pendulum_ode import damped_pendulum_ode
+from system_odes.pendulum_ode import damped_pendulum_ode, get_pendulum_parameters
+from solver.dense_output import HermiteDenseOutput, PolynomialDenseOutput
+from solver.extrapolation_solver import stepcontrol_extrapolation
+from visualization.pendulum.reference_cache import ReferenceCache, reference_key
+from visualization.downsample import minmax_indices, interpolate_rows
 
 class PendulumData:
     """
     Manages the data for the pendulum simulation, including input values,
     down-sampling, and computing a reference solution.
+
+    values_angle and values_dangle are column views of one (N, 2) state array
+    (values_state), stored with the given dtype, e.g. np.float32 to halve the memory of
+    long runs. Fine uniform grids are interpolated onto ref_step_width; fine adaptive
+    (non-uniform) output is reduced by min/max decimation, which keeps the extremes.
     """
     values_time: np.ndarray
     values_angle: np.ndarray
     values_dangle: np.ndarray
+    values_state: np.ndarray
     reference: bool
     values_time_ref: Optional[np.ndarray] = None # Make Optional as it might not be computed
     values_angle_ref: Optional[np.ndarray] = None # Make Optional
     ref_step_width: float = 0.01
+    # Continuous solution of adaptive runs, if the solver returned one
+    dense_output: Optional[Union[HermiteDenseOutput, PolynomialDenseOutput]] = None
+    # Set to None to always recompute the reference solution
+    reference_cache: Optional[ReferenceCache] = ReferenceCache()
     init_step_width: float
     step_width: float
 
     def __init__(self, values_time: np.ndarray, values_state: np.ndarray,
-                 reference: bool = False) -> None:
+                 reference: bool = False, dense_output: Optional[Union[HermiteDenseOutput, PolynomialDenseOutput]] = None,
+                 dtype=np.float64) -> None:
         self.reference = reference
-        self._assign_values(values_time, values_state)
+        self.dtype = np.dtype(dtype)
+        self.dense_output = dense_output
+        if dense_output is not None:
+            # Adaptive runs with a continuous solution are sampled exactly on the reference grid
+            self._assign_init_step_width(np.asarray(values_time).flatten())
+            self._sample_dense_output_and_assign(dense_output)
+        else:
+            self._assign_values(values_time, values_state)
 
         if self.reference:
             self._compute_and_assign_reference_solution()
 
     def _normalize_shapes(self, values_time: np.ndarray, values_state: np.ndarray):
-        values_time = np.asarray(values_time).flatten()
+        # Views only: no copy unless the dtype changes
+        values_time = np.asarray(values_time).reshape(-1)
         values_state = np.asarray(values_state)
         N = len(values_time)
 
@@ -45,50 +67,77 @@ class PendulumData:
                              f"but state array has shape {values_state.shape}.")
         return values_time, values_state
 
+    def _set_state(self, values_time: np.ndarray, values_state: np.ndarray, step_width: float) -> None:
+        self.values_time = values_time
+        # Full precision start for the reference solution, independent of the storage dtype
+        self._initial_state = np.array(values_state[0], dtype=float)
+        self.values_state = values_state.astype(self.dtype, copy=False)
+        self.values_angle = self.values_state[:, 0]
+        self.values_dangle = self.values_state[:, 1]
+        self.step_width = step_width
 
     def _assign_values(self, values_time: np.ndarray, values_state: np.ndarray) -> None:
 
         # Use the gatekeeper first to get always the correct orientation
-        self.values_time, values_state = self._normalize_shapes(values_time, values_state)
+        values_time, values_state = self._normalize_shapes(values_time, values_state)
 
         self._assign_init_step_width(values_time)
-        if self.init_step_width >= self.ref_step_width:
-            self.values_time = values_time
-            self.values_angle = values_state[:, 0]
-            self.values_dangle = values_state[:, 1]
-            self.step_width = self.init_step_width
-        else:
+        mean_step_width = (values_time[-1] - values_time[0]) / max(len(values_time) - 1, 1)
+        if min(self.init_step_width, mean_step_width) >= self.ref_step_width:
+            self._set_state(values_time, values_state, self.init_step_width)
+        elif self._is_uniform(values_time):
             self._sample_data_down_and_assign(values_time, values_state)
+        else:
+            self._decimate_and_assign(values_time, values_state)
 
     def _assign_init_step_width(self, values_time: np.ndarray) -> None:
         self.init_step_width = values_time[1] - values_time[0]
 
+    def _is_uniform(self, values_time: np.ndarray) -> bool:
+        """Fixed-step grids; the last step may be shorter."""
+        steps = np.diff(values_time[:-1])
+        return len(steps) == 0 or bool(np.all(np.abs(steps - self.init_step_width) <= 1e-6 * self.init_step_width))
+
     def _sample_data_down_and_assign(self, values_time: np.ndarray, values_state: np.ndarray) -> None:
         values_time_interpolated = np.arange(values_time[0], values_time[-1] + self.ref_step_width, self.ref_step_width)
-        values_angle_interpolated = np.interp(values_time_interpolated, values_time, values_state[:, 0])
-        values_dangle_interpolated = np.interp(values_time_interpolated, values_time, values_state[:, 1])
+        # All components in one pass: one interval search, one weight array
+        values_state_interpolated = interpolate_rows(values_time, values_state, values_time_interpolated)
+        self._set_state(values_time_interpolated, values_state_interpolated, self.ref_step_width)
 
-        self.values_time = values_time_interpolated
-        self.values_angle = values_angle_interpolated
-        self.values_dangle = values_dangle_interpolated
-        self.step_width = self.ref_step_width
+    def _decimate_and_assign(self, values_time: np.ndarray, values_state: np.ndarray) -> None:
+        # Adaptive steps cluster where the solution changes fast; keep the extremes per ref_step_width bucket
+        idx = minmax_indices(values_time, values_state, self.ref_step_width)
+        self._set_state(values_time[idx], values_state[idx], self.ref_step_width)
+
+    def _sample_dense_output_and_assign(self, dense_output: Union[HermiteDenseOutput, PolynomialDenseOutput]) -> None:
+        values_time_sampled = np.arange(dense_output.t_min, dense_output.t_max, self.ref_step_width)
+        if values_time_sampled[-1] < dense_output.t_max:
+            values_time_sampled = np.append(values_time_sampled, dense_output.t_max)
+        self._set_state(values_time_sampled, dense_output(values_time_sampled), self.ref_step_width)
 
     def _compute_and_assign_reference_solution(self) -> None:
         t_min: float = self.values_time[0]
         t_max: float = self.values_time[-1]
-        theta_start: float = self.values_angle[0]
-        omega_start: float = self.values_dangle[0]
+        theta_start: float = self._initial_state[0]
+        omega_start: float = self._initial_state[1]
 
         t_eval = np.arange(t_min, t_max, self.ref_step_width)
+        rtol = atol = 1e-12
+
+        def solve() -> np.ndarray:
+            # Free steps, sampled on the grid by the high-order dense output of the extrapolation
+            *_, dense_output = stepcontrol_extrapolation(
+                damped_pendulum_ode, [t_min, t_max], [theta_start, omega_start],
+                rtol=rtol, atol=atol, dense_output=True)
+            return np.vstack([t_eval, dense_output(t_eval).T])
+
+        if self.reference_cache is None:
+            reference = solve()
+        else:
+            key = reference_key(damped_pendulum_ode, [theta_start, omega_start], (t_min, t_max),
+                                rtol, atol, self.ref_step_width, "GBS", get_pendulum_parameters(),
+                                solver=(stepcontrol_extrapolation, PolynomialDenseOutput))
+            reference = self.reference_cache.get_or_compute(key, solve)
 
-        sol = solve_ivp(
-            damped_pendulum_ode,
-            (t_min, t_max),
-            [theta_start, omega_start], 
-            method="RK45",
-            t_eval=t_eval,
-            rtol=1e-9,
-            atol=1e-9
-        )
-        self.values_time_ref = sol.t
-        self.values_angle_ref = sol.y[0]
\ No newline at end of file
+        self.values_time_ref = reference[0]
+        self.values_angle_ref = reference[1]
\ No newline at end of file
@@ -1,6 +1,6 @@
 # pendulum_plot_utils.py
 
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
@@ -37,12 +37,18 @@ class PendulumPlotInitializer:
         """
         pass # No specific initialization needed for now, constants are class attributes
 
-    def create_figure_and_axes(self) -> Tuple[Figure, Axes, Axes]:
+    def create_figure_and_axes(self, figure: Optional[Figure] = None) -> Tuple[Figure, Axes, Axes]:
         """
         Creates the main figure and two subplots (time and pendulum animation).
-        """
-        fig, (ax_time, ax_pend) = plt.subplots(1, 2, figsize=(12, 6))
-        return fig, ax_time, ax_pend
+        A given figure (e.g. one not managed by pyplot, for off-screen rendering)
+        is used instead of a new pyplot figure.
+        """
+        if figure is None:
+            fig, (ax_time, ax_pend) = plt.subplots(1, 2, figsize=(12, 6))
+            return fig, ax_time, ax_pend
+        figure.set_size_inches(12, 6)
+        ax_time, ax_pend = figure.subplots(1, 2)
+        return figure, ax_time, ax_pend
 
     def setup_time_axis(self, ax_time: Axes, min_time: float, max_time: float, 
                         min_angle_deg: float, max_angle_deg: float) -> None:
@@ -105,7 +111,7 @@ class PendulumPlotInitializer:
         """
         Creates and returns the line artist for the reference solution on the time plot.
         """
-        line, = ax_time.plot([], [], color=self.reference_color, linestyle='--', label='Reference (RK45)', alpha=self.alpha_value)
+        line, = ax_time.plot([], [], color=self.reference_color, linestyle='--', label='Reference (GBS)', alpha=self.alpha_value)
         return line
 
     def create_reference_pendulum_artists(self, ax_pend: Axes) -> Tuple[plt.Line2D, Rectangle]:
@@ -0,0 +1,146 @@
+"""
+Persistent cache for reference solutions.
+
+Entries are addressed by a hash of everything that determines the solution: the ODE
+(module, name, byte code and parameters), the initial state, the time span, the
+tolerances, the output step width, the method and the source code of the solver. Each entry is a single .npy file
+that is opened memory-mapped, so a cache hit costs a file open instead of a solve.
+
+The cache is bounded in size: when it grows beyond max_bytes, the least recently used
+entries (by file modification time, refreshed on every hit) are deleted.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Callable, Optional
+import numpy as np
+
+
+def _default_cache_dir() -> str:
+    return os.getenv('PENDULUM_REFERENCE_CACHE',
+                     os.path.join(os.path.expanduser('~'), '.cache', 'pendulum_reference'))
+
+
+def _source_digest(obj) -> Optional[str]:
+    """Hash of the source file of the module defining obj, None if there is none."""
+    path = getattr(sys.modules.get(getattr(obj, '__module__', None)), '__file__', None)
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def reference_key(fcn, z0, t_span, rtol: float, atol: float, step_width: float,
+                  method: str, params: Optional[dict] = None, solver: tuple = ()) -> str:
+    """
+    Hex digest identifying a reference solution. Floats enter via float.hex, so the
+    key is exact; a change of the ODE code or of params gives a new key. solver holds
+    the functions and classes computing the solution: a change to the source of their
+    modules gives a new key as well.
+    """
+    code = getattr(fcn, '__code__', None)
+    identity = {
+        'fcn': f"{getattr(fcn, '__module__', '')}.{getattr(fcn, '__qualname__', repr(fcn))}",
+        'code': hashlib.sha256(code.co_code + repr(code.co_consts).encode()).hexdigest() if code else None,
+        'params': {name: float(value).hex() for name, value in sorted((params or {}).items())},
+        'z0': [float(z).hex() for z in np.ravel(z0)],
+        't_span': [float(t).hex() for t in t_span],
+        'rtol': float(rtol).hex(),
+        'atol': float(atol).hex(),
+        'step_width': float(step_width).hex(),
+        'method': method,
+        'solver': [_source_digest(obj) for obj in solver],
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+
+class ReferenceCache:
+    """
+    Directory of memory-mapped .npy reference solutions with LRU eviction by total size.
+    Entries are stored as (dof + 1, N) arrays: the time row followed by one row per state.
+    """
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024**2) -> None:
+        self.directory = directory if directory is not None else _default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npy')
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """Memory-mapped entry, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            # Missing or unreadable (e.g. truncated by a crash), recomputed by the caller
+            return None
+        try:
+            os.utime(path)   # Mark as recently used
+        except OSError:
+            pass   # Read-only cache, the entry just ages
+        return data
+
+    def store(self, key: str, data: np.ndarray) -> np.ndarray:
+        """Writes an entry atomically, evicts old entries and returns the memory-mapped entry."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(data, dtype=float))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict(keep=path)
+        return np.load(path, mmap_mode='r')
+
+    def get_or_compute(self, key: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Cached entry, or the result of compute() on a miss. If the entry cannot be written
+        (read-only or full disk, ...), the computed array is returned uncached.
+        """
+        data = self.load(key)
+        if data is None:
+            data = compute()
+            try:
+                data = self.store(key, data)
+            except OSError:
+                pass
+        return data
+
+    def _evict(self, keep: str) -> None:
+        """Deletes the least recently used entries until the cache fits into max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue   # Removed concurrently
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.directory, name))
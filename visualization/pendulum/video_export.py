@@ -0,0 +1,126 @@
+"""
+Parallel, headless video export for VisualizePendulum.
+
+The frames follow the output frame rate, not the simulation tick: output frame k shows
+the simulation at t = k * speed / fps, like the master timeline of the animation.
+Worker processes each build the figure once and render chunks of frames into raw RGB
+buffers, which the main process pipes in order into ffmpeg's stdin. At most a few chunks per worker are in flight,
+so memory stays bounded for long videos. The figure is not managed by pyplot and draws
+on an explicit Agg canvas, so neither the active backend nor pyplot's figures of the
+calling process are touched, also when it renders itself (workers=1).
+"""
+
+import copy
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+
+# Per worker process: the visualization with its figure, built once by _init_worker
+_worker_viz = None
+
+
+def _build_visualization(state: dict, dpi: float):
+    """A VisualizePendulum from the exported state, drawing into a pyplot-free figure on an Agg canvas."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from visualization.pendulum.visualize_pendulum import VisualizePendulum
+
+    viz = VisualizePendulum.__new__(VisualizePendulum)
+    viz.__dict__.update(state)
+    figure = Figure(dpi=dpi)
+    FigureCanvasAgg(figure)
+    viz._create_animation_figure(figure)
+    viz.fig.suptitle("Pendulum Animation (Synchronized)")
+    return viz
+
+
+def _init_worker(state: dict, dpi: float) -> None:
+    global _worker_viz
+    _worker_viz = _build_visualization(state, dpi)
+
+
+def _render_frames(indices: np.ndarray, viz=None) -> tuple:
+    """
+    Renders the given frames (master timeline indices) with viz, by default the one of
+    this worker; returns (width, height, rgb bytes of all frames).
+    """
+    viz = viz if viz is not None else _worker_viz
+    canvas = viz.fig.canvas
+    frames = []
+    for idx in indices:
+        viz._update_animation(int(idx))
+        canvas.draw()
+        frames.append(np.asarray(canvas.buffer_rgba())[..., :3].tobytes())
+    width, height = canvas.get_width_height()
+    return width, height, b''.join(frames)
+
+
+def _open_ffmpeg(path: str, width: int, height: int, fps: float) -> subprocess.Popen:
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg was not found on the PATH, it is needed for the video export.")
+    command = [ffmpeg, '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+               # H.264 with yuv420p needs even dimensions
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', path]
+    return subprocess.Popen(command, stdin=subprocess.PIPE)
+
+
+def export_video(viz, path: str, fps: float = 30, speed: float = 1.0, dpi: float = 100,
+                 workers: Optional[int] = None, chunk_size: int = 16) -> int:
+    """
+    Renders the animation of a VisualizePendulum into path (e.g. an .mp4) and returns
+    the number of frames. workers=1 renders in this process.
+    """
+    # A timeline for the video's fps and speed, without touching the one of viz
+    video_viz = copy.copy(viz)
+    video_viz.fps = fps
+    video_viz.speed = speed
+    video_viz._synchronize_data_for_animation()
+    indices = np.arange(len(video_viz.master_time))
+    chunks = [indices[k:k + chunk_size] for k in range(0, len(indices), chunk_size)]
+    # Only the data is sent to the workers, not figures or animations of this process
+    state = {name: value for name, value in video_viz.__dict__.items()
+             if name in ('pendulum_data_runs', 'plot_initializer', 'ref_step_width', 'fps', 'speed',
+                         'interpolation', 'master_time', 'anim_data', 'reference_pendulum_data')}
+
+    ffmpeg = None
+
+    def write(rendered) -> None:
+        nonlocal ffmpeg
+        for width, height, frames in rendered:
+            if ffmpeg is None:
+                # The frame size is only known after the first rendered frame
+                ffmpeg = _open_ffmpeg(path, width, height, fps)
+            ffmpeg.stdin.write(frames)
+
+    try:
+        if workers == 1:
+            local_viz = _build_visualization(state, dpi)
+            write(_render_frames(chunk, local_viz) for chunk in chunks)
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(state, dpi)) as executor:
+                write(_in_order(executor, chunks, window=2 * workers))
+    finally:
+        if ffmpeg is not None:
+            ffmpeg.stdin.close()
+            ffmpeg.wait()
+    if ffmpeg is not None and ffmpeg.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {ffmpeg.returncode}.")
+    return len(indices)
+
+
+def _in_order(executor: ProcessPoolExecutor, chunks: list, window: int):
+    """Yields the rendered chunks in order, keeping at most window chunks in flight."""
+    futures = [executor.submit(_render_frames, chunk) for chunk in chunks[:window]]
+    for k in range(len(chunks)):
+        result = futures[k].result()
+        futures[k] = None   # Release the frames once written
+        if k + window < len(chunks):
+            futures.append(executor.submit(_render_frames, chunks[k + window]))
+        yield result
@@ -5,32 +5,58 @@ import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
 from matplotlib.transforms import Affine2D
 
 # Keep your imports
 from visualization.pendulum.pendulum_data import PendulumData
 from visualization.pendulum.pendulum_plot_utils import PendulumPlotInitializer
+from visualization.pendulum.video_export import export_video
 
 
 class VisualizePendulum():
+    """
+    Synchronized animation of several pendulum runs. The animation clock ticks once per
+    frame: fps frames per second of playback, speed simulated seconds per second.
+    interpolation selects how the runs are evaluated between their samples: 'zoh'
+    (previous sample), 'linear' or 'dense' (the dense output of adaptive runs, linear
+    for runs without one).
+    """
+    INTERPOLATIONS = ('zoh', 'linear', 'dense')
+
     def __init__(self, simulation_results: Dict[str, Tuple[np.ndarray, np.ndarray]],
-                 reference: bool = False, ref_step_width: float = 0.01) -> None:
+                 reference: bool = False, ref_step_width: float = 0.01, fps: float = 30,
+                 speed: float = 1.0, interpolation: str = 'zoh') -> None:
+        if interpolation not in self.INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {self.INTERPOLATIONS}, not '{interpolation}'.")
 
         self.pendulum_data_runs = {}
         self.plot_initializer = PendulumPlotInitializer()
         self.ref_step_width = ref_step_width
+        self.fps = fps
+        self.speed = speed
+        self.interpolation = interpolation
+        self.reference_pendulum_data = None
 
         # 1. Load Data
         run_names = list(simulation_results.keys())
         first_run_name = run_names[0] if run_names else None
 
-        for name, (t_vals, u_vals) in simulation_results.items():
+        for name, run in simulation_results.items():
+            # Runs are (t, u) or, for adaptive solvers with dense output, (t, u, dense_output)
+            if hasattr(run, 'decimated'):
+                # A StoredRun (analysis.result_store), read in chunks down to the reference resolution
+                run = run.decimated(ref_step_width)
+            t_vals, u_vals = run[0], run[1]
+            dense_output = run[2] if len(run) > 2 else None
+
             # Use the "Gatekeeper" logic we discussed implicitly here or in PendulumData
             current_pendulum_data = PendulumData(
                 values_time=t_vals,
                 values_state=u_vals,
                 reference=(reference if name == first_run_name else False),
+                dense_output=dense_output,
             )
             self.pendulum_data_runs[name] = current_pendulum_data
 
@@ -44,7 +70,7 @@ class VisualizePendulum():
         if os.getenv('CODESPACES') == 'true':
             print(f"🌐 Cloud detected: Saving to {save_path}...")
             plt.close(fig)
-            ani.save(save_path, writer='ffmpeg', fps=30)
+            self.export_video(save_path)
 
             # Start HTTP server in background
             print(f"🚀 Starting HTTP server on port {port}...")
@@ -60,49 +86,56 @@ class VisualizePendulum():
             plt.show()
 
 
+    def export_video(self, save_path: str = "pendulum_animation.mp4", fps: Optional[float] = None,
+                     speed: Optional[float] = None, dpi: float = 100, workers: Optional[int] = None) -> int:
+        """
+        Renders the animation headlessly into a video file, with the frames split across
+        worker processes and piped into ffmpeg. fps and speed default to those of the
+        animation. Returns the number of frames.
+        """
+        return export_video(self, save_path, fps=fps or self.fps, speed=speed or self.speed, dpi=dpi,
+                            workers=workers)
+
     def _synchronize_data_for_animation(self):
         """
-        Creates a 'Master Timeline' and resamples all simulation runs to match it
-        using Forward Fill (Zero-Order Hold).
+        Creates a 'Master Timeline' with one tick per animation frame and, for every run,
+        the index of its last sample at or before each tick. Only these indices are
+        stored; the angles are evaluated per frame by _angle_at.
         """
         # A: Find the global time boundaries
-        all_max_times = [data.values_time[-1] for data in self.pendulum_data_runs.values()]
-        max_time = max(all_max_times)
-
-        # B: Create the Master Time array (uniform grid)
-        # We use ref_step_width as the 'tick' for the animation clock
-        self.master_time = np.arange(0, max_time, self.ref_step_width)
-
-        # C: Resample each run to match master_time exactly
-        self.anim_data = {}  # Stores the normalized (N_master,) arrays
-
-        for name, data in self.pendulum_data_runs.items():
-            # precise_indices maps the Master Clock to the Simulation's coarser clock.
-            # 'side=right' + subtracting 1 gives us the "Previous" neighbor (Forward Fill)
-            idx = np.searchsorted(data.values_time, self.master_time, side='right') - 1
+        max_time = max(data.values_time[-1] for data in self.pendulum_data_runs.values())
 
-            # Safety clamp: ensure we don't go out of bounds (e.g. at t=0)
-            idx = np.clip(idx, 0, len(data.values_time) - 1)
+        # B: Create the Master Time array (uniform grid), ending exactly at max_time
+        tick = self.speed / self.fps
+        self.master_time = np.arange(0, max_time, tick)
+        if len(self.master_time) == 0 or self.master_time[-1] < max_time:
+            self.master_time = np.append(self.master_time, max_time)
 
-            # Create the synchronized arrays
-            # This is the "Stepwise" look: we grab the value at 'idx' for every master tick
-            synchronized_angle = data.values_angle[idx]
-
-            self.anim_data[name] = {
-                'time': self.master_time,  # Technically redundant, but keeps structure clean
-                'angle': synchronized_angle
-            }
+        # C: Map the Master Clock onto each simulation's clock
+        self.anim_data = {name: {'index': self._timeline_indices(data.values_time)}
+                          for name, data in self.pendulum_data_runs.items()}
 
         # Handle Reference Data Synchronization (if it exists)
         if self.reference_pendulum_data and self.reference_pendulum_data.values_angle_ref is not None:
-            ref_data = self.reference_pendulum_data
-            idx_ref = np.searchsorted(ref_data.values_time_ref, self.master_time, side='right') - 1
-            idx_ref = np.clip(idx_ref, 0, len(ref_data.values_time_ref) - 1)
-
             self.anim_data['REFERENCE'] = {
-                'angle': ref_data.values_angle_ref[idx_ref]
+                'index': self._timeline_indices(self.reference_pendulum_data.values_time_ref)
             }
 
+    def _timeline_indices(self, values_time: np.ndarray) -> np.ndarray:
+        # 'side=right' - 1 gives the previous neighbor; clamped for ticks before the first sample
+        idx = np.searchsorted(values_time, self.master_time, side='right') - 1
+        return np.clip(idx, 0, len(values_time) - 1).astype(np.int32)
+
+    def _angle_at(self, t: float, k: int, values_time: np.ndarray, values_angle: np.ndarray,
+                  dense_output=None) -> float:
+        """Angle of one run at time t, where k is the index of its last sample at or before t."""
+        if self.interpolation == 'dense' and dense_output is not None:
+            return dense_output(min(max(t, dense_output.t_min), dense_output.t_max))[0]
+        if self.interpolation == 'zoh' or k == len(values_time) - 1:
+            return values_angle[k]
+        weight = min(max((t - values_time[k]) / (values_time[k + 1] - values_time[k]), 0.0), 1.0)
+        return values_angle[k] + weight * (values_angle[k + 1] - values_angle[k])
+
     def _init_animation(self) -> Tuple:
         all_artists = []
         # Clear main lines
@@ -146,17 +179,16 @@ class VisualizePendulum():
         all_artists.append(self.text_pend)
 
         # 2. Update Simulation Runs
-        for i, (name, _) in enumerate(self.pendulum_data_runs.items()):
-            # Retrieve the PRE-CALCULATED synchronized data
-            synced = self.anim_data[name]
-
-            # Get the current angle directly using the frame index
-            current_angle = synced['angle'][safe_idx]
+        for i, (name, data) in enumerate(self.pendulum_data_runs.items()):
+            # Index of the run's last sample at or before the current time
+            k = self.anim_data[name]['index'][safe_idx]
+            current_angle = self._angle_at(current_time, k, data.values_time, data.values_angle,
+                                           data.dense_output)
 
             # --- Update Time Plot (History trace) ---
-            # We plot the history up to the current frame
-            # (Optional: Decimate this if it gets too slow, e.g. synced['time'][:safe_idx:5])
-            self.time_lines[i].set_data(synced['time'][:safe_idx], np.rad2deg(synced['angle'][:safe_idx]))
+            # The run's own samples up to the current time, ending at the current angle
+            self.time_lines[i].set_data(np.append(data.values_time[:k + 1], current_time),
+                                        np.rad2deg(np.append(data.values_angle[:k + 1], current_angle)))
             all_artists.append(self.time_lines[i])
 
             # Marker at the tip
@@ -182,7 +214,9 @@ class VisualizePendulum():
 
         # 3. Update Reference (if exists)
         if 'REFERENCE' in self.anim_data and self.reference_pendulum_line:
-            ref_angle = self.anim_data['REFERENCE']['angle'][safe_idx]
+            ref_data = self.reference_pendulum_data
+            ref_angle = self._angle_at(current_time, self.anim_data['REFERENCE']['index'][safe_idx],
+                                       ref_data.values_time_ref, ref_data.values_angle_ref)
 
             x_ref = self.plot_initializer.length_pend * np.sin(ref_angle)
             y_ref = -self.plot_initializer.length_pend * np.cos(ref_angle)
@@ -206,7 +240,7 @@ class VisualizePendulum():
 
         # Frames = Length of the Master Timeline
         total_frames = len(self.master_time)
-        interval_ms = self.ref_step_width * 1000  # Real-time speed
+        interval_ms = 1000 / self.fps
 
         self.ani = FuncAnimation(
             self.fig,
@@ -223,15 +257,18 @@ class VisualizePendulum():
 
     # (Keep your existing _create_animation_figure and plot methods as they were)
     # Just ensure _create_animation_figure uses 'self.pendulum_data_runs' as before.
-    def _create_animation_figure(self) -> None:
+    def _create_animation_figure(self, figure: Optional[Figure] = None) -> None:
         # Copy-paste your previous _create_animation_figure code here
         # It is compatible because self.pendulum_data_runs is still set in __init__
-        self.fig, self.ax_time, self.ax_pend = self.plot_initializer.create_figure_and_axes()
+        # figure: draw into this figure instead of a new pyplot one (off-screen video export)
+        self.fig, self.ax_time, self.ax_pend = self.plot_initializer.create_figure_and_axes(figure)
 
         self.time_lines = []
         self.time_markers = []
         self.pendulum_lines = []
         self.pendulum_rects = []
+        self.reference_pendulum_line = None
+        self.reference_pendulum_rect = None
 
         min_angle_deg = 0
         max_angle_deg = 0